@@ -50,4 +50,144 @@ import ExportToDir_ui
 class ExportToDir(QDialog, ExportToDir_ui.Ui_exportToDirDlg):
     def __init__(self):
         QDialog.__init__(self)
-        self.setupUi(self)
\ No newline at end of file
+        self.setupUi(self)
+        self.setupSequenceUi()
+        self.setupSyncUi()
+        self.setupFilterUi()
+        self.setupQueueUi()
+        self.setupEstimateUi()
+
+        #   Called before the dialogue closes, set by the plugin
+        self.closeCallback = None
+
+
+    #   Adds the frame range and frame number offset of image sequence exports
+    #   next to the sequence options
+    def setupSequenceUi(self):
+        self.l_frameRange = QLabel("Frames:", self)
+        self.l_frameRange.setObjectName(u"l_frameRange")
+        self.e_frameRange = QLineEdit(self)
+        self.e_frameRange.setObjectName(u"e_frameRange")
+        self.e_frameRange.setMaximumWidth(200)
+        self.l_frameOffset = QLabel("Offset:", self)
+        self.l_frameOffset.setObjectName(u"l_frameOffset")
+        self.sp_frameOffset = QSpinBox(self)
+        self.sp_frameOffset.setObjectName(u"sp_frameOffset")
+        self.sp_frameOffset.setRange(-1000000, 1000000)
+
+        seqIndex = self.f_sequenceSelection.indexOf(self.rb_imageSeq)
+        self.f_sequenceSelection.insertSpacing(seqIndex + 1, 20)
+        self.f_sequenceSelection.insertWidget(seqIndex + 2, self.l_frameRange)
+        self.f_sequenceSelection.insertWidget(seqIndex + 3, self.e_frameRange)
+        self.f_sequenceSelection.insertWidget(seqIndex + 4, self.l_frameOffset)
+        self.f_sequenceSelection.insertWidget(seqIndex + 5, self.sp_frameOffset)
+
+        self.l_frameRange.hide()
+        self.e_frameRange.hide()
+        self.l_frameOffset.hide()
+        self.sp_frameOffset.hide()
+
+
+    #   Adds the incremental (sync) export options below the Output line
+    def setupSyncUi(self):
+        self.f_syncOptions = QHBoxLayout()
+        self.f_syncOptions.setObjectName(u"f_syncOptions")
+
+        self.chb_sync = QCheckBox("Sync (only copy new or changed files)", self)
+        self.chb_sync.setObjectName(u"chb_sync")
+        self.chb_syncHash = QCheckBox("Compare contents", self)
+        self.chb_syncHash.setObjectName(u"chb_syncHash")
+        self.chb_syncDelete = QCheckBox("Delete orphans", self)
+        self.chb_syncDelete.setObjectName(u"chb_syncDelete")
+
+        self.f_syncOptions.addWidget(self.chb_sync)
+        self.f_syncOptions.addWidget(self.chb_syncHash)
+        self.f_syncOptions.addWidget(self.chb_syncDelete)
+        self.f_syncOptions.addStretch()
+        self.f_outputPath.addLayout(self.f_syncOptions)
+
+        self.chb_syncHash.setEnabled(False)
+        self.chb_syncDelete.setEnabled(False)
+        self.chb_sync.toggled.connect(self.chb_syncHash.setEnabled)
+        self.chb_sync.toggled.connect(self.chb_syncDelete.setEnabled)
+
+
+    #   Adds the include / exclude patterns of tree exports below the sync options,
+    #   with a button that previews the files and bytes left after filtering
+    def setupFilterUi(self):
+        self.f_filterOptions = QHBoxLayout()
+        self.f_filterOptions.setObjectName(u"f_filterOptions")
+
+        self.l_filterInclude = QLabel("Include:", self)
+        self.l_filterInclude.setObjectName(u"l_filterInclude")
+        self.e_filterInclude = QLineEdit(self)
+        self.e_filterInclude.setObjectName(u"e_filterInclude")
+        self.l_filterExclude = QLabel("Exclude:", self)
+        self.l_filterExclude.setObjectName(u"l_filterExclude")
+        self.e_filterExclude = QLineEdit(self)
+        self.e_filterExclude.setObjectName(u"e_filterExclude")
+        self.but_filterPreview = QPushButton("Preview", self)
+        self.but_filterPreview.setObjectName(u"but_filterPreview")
+
+        self.f_filterOptions.addWidget(self.l_filterInclude)
+        self.f_filterOptions.addWidget(self.e_filterInclude)
+        self.f_filterOptions.addWidget(self.l_filterExclude)
+        self.f_filterOptions.addWidget(self.e_filterExclude)
+        self.f_filterOptions.addWidget(self.but_filterPreview)
+        self.f_outputPath.addLayout(self.f_filterOptions)
+
+
+    #   Shows or hides the filter row, only tree exports are filtered
+    def setFilterVisible(self, visible):
+        for widget in (self.l_filterInclude, self.e_filterInclude, self.l_filterExclude, self.e_filterExclude,
+                       self.but_filterPreview):
+            widget.setVisible(visible)
+
+
+    #   Adds the job priority and the queue panel button next to Execute
+    def setupQueueUi(self):
+        self.l_priority = QLabel("Priority:", self)
+        self.l_priority.setObjectName(u"l_priority")
+        self.cb_priority = QComboBox(self)
+        self.cb_priority.setObjectName(u"cb_priority")
+        self.but_queue = QPushButton("Queue...", self)
+        self.but_queue.setObjectName(u"but_queue")
+        self.but_pause = QPushButton("Pause", self)
+        self.but_pause.setObjectName(u"but_pause")
+        self.but_cancel = QPushButton("Cancel", self)
+        self.but_cancel.setObjectName(u"but_cancel")
+
+        executeIndex = self.f_buttonsSub.indexOf(self.but_execute)
+        self.f_buttonsSub.insertWidget(executeIndex, self.l_priority)
+        self.f_buttonsSub.insertWidget(executeIndex + 1, self.cb_priority)
+        self.f_buttonsSub.insertWidget(executeIndex + 2, self.but_queue)
+        self.f_buttonsSub.insertWidget(executeIndex + 3, self.but_pause)
+        self.f_buttonsSub.insertWidget(executeIndex + 4, self.but_cancel)
+
+        #   Jobs last started from this dialogue (several for a batch), used by Pause and Cancel
+        self.jobIds = []
+        self.batchTimer = None
+        self.but_pause.setEnabled(False)
+        self.but_cancel.setEnabled(False)
+
+
+    #   Adds the pre-flight size estimate and ETA to the right of the status line
+    def setupEstimateUi(self):
+        self.l_estimate = QLabel("", self)
+        self.l_estimate.setObjectName(u"l_estimate")
+        self.horizontalLayout_3.addWidget(self.l_estimate)
+
+
+    #   The Close button, the window X and Esc all close through reject
+    def reject(self):
+        if self.closeCallback is not None:
+            self.closeCallback()
+        QDialog.reject(self)
+
+
+    #   Connected to the export worker, called in the main thread
+    @Slot(bool)
+    def onExportFinished(self, success):
+        self.but_pause.setText("Pause")
+        self.but_pause.setEnabled(False)
+        self.but_cancel.setEnabled(False)
\ No newline at end of file
@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Benchmark suite for the copy, scan and zip paths.  Builds synthetic
+#   Prism-like trees (deep shot hierarchy, image sequence, large caches) and
+#   times every export case with ExportRunner, without Prism or Qt.  Each
+#   benchmark runs in its own process so peak memory and syscall counts are
+#   measured per benchmark.  Results can be saved as a baseline and later
+#   runs are compared against it.
+#
+#   example:
+#       python ExportToDir_Benchmark.py --profile quick --save-baseline
+#       python ExportToDir_Benchmark.py --profile quick
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from ExportToDir_Runner import ExportRunner
+from ExportToDir_Scanner import scanDirectory
+from ExportToDir_Engine import COPY_ENGINES, getEngineSettings, formatSize
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+logger = logging.getLogger(__name__)
+
+
+BENCHMARK_VERSION = 1
+
+BLOCK_SIZE = 1024 * 1024
+MB = 1024 * 1024
+
+#   Runs slower than the baseline by more than this are reported as regressions
+DEFAULT_THRESHOLD = 10.0
+
+#   Synthetic tree sizes.  "full" needs about 30 GB of free space.
+PROFILES = {
+    "quick": {"Sequences": 2,
+              "Shots": 4,
+              "Tasks": ["Anim", "Lighting", "FX"],
+              "Versions": 3,
+              "SceneSize": 256 * 1024,
+              "Frames": 500,
+              "FrameSize": 256 * 1024,
+              "Caches": 2,
+              "CacheSize": 64 * MB},
+    "full": {"Sequences": 4,
+             "Shots": 10,
+             "Tasks": ["Layout", "Anim", "Lighting", "FX", "Comp"],
+             "Versions": 5,
+             "SceneSize": 2 * MB,
+             "Frames": 10000,
+             "FrameSize": 2 * MB,
+             "Caches": 3,
+             "CacheSize": 2048 * MB},
+}
+
+#   (name, case, source, zip).  Case None times the scanner only.
+BENCHMARKS = [
+    ("scan_tree", None, "Tree", False),
+    ("case1_copy", 1, "Cache", False),
+    ("case1_zip", 1, "Scene", True),
+    ("case2_tree_copy", 2, "Tree", False),
+    ("case3_seq_copy", 3, "Sequence", False),
+    ("case4_tree_zip", 4, "Tree", True),
+    ("case5_seq_zip", 5, "Sequence", True),
+]
+
+
+def writeFile(path, size, block):
+    with open(path, "wb") as outFile:
+        remaining = size
+        while remaining > 0:
+            chunk = min(remaining, len(block))
+            outFile.write(block[:chunk])
+            remaining -= chunk
+
+
+#   Builds the synthetic trees once per profile, later runs reuse them
+def buildTrees(workDir, profileName):
+    profile = PROFILES[profileName]
+    dataDir = os.path.join(workDir, f"data_{profileName}")
+    markerPath = os.path.join(dataDir, "complete.json")
+
+    sources = {"Tree": os.path.join(dataDir, "Project"),
+               "Sequence": os.path.join(dataDir, "Sequence")}
+
+    if os.path.isfile(markerPath):
+        with open(markerPath, "r") as markerFile:
+            sources.update(json.load(markerFile))
+        return sources
+
+    print(f"Building {profileName} benchmark data in {dataDir} ...", file=sys.stderr)
+    shutil.rmtree(dataDir, ignore_errors=True)
+
+    #   Incompressible data like EXR frames and caches, compressible data like scene files
+    randomBlock = os.urandom(BLOCK_SIZE)
+    textBlock = (b"{\"node\": \"/obj/geo1\", \"parm\": [0.0, 1.0, 0.5], \"expr\": \"$F4\"}\n"
+                 * (BLOCK_SIZE // 64 + 1))[:BLOCK_SIZE]
+
+    #   Deep shot hierarchy:  Shots/sq010/sh010/Scenefiles/Anim/v0001/...
+    shotsDir = os.path.join(sources["Tree"], "03_Production", "Shots")
+    for seqNum in range(1, profile["Sequences"] + 1):
+        for shotNum in range(1, profile["Shots"] + 1):
+            shotDir = os.path.join(shotsDir, f"sq{seqNum:02d}0", f"sh{shotNum:02d}0")
+            for task in profile["Tasks"]:
+                for version in range(1, profile["Versions"] + 1):
+                    versionDir = os.path.join(shotDir, "Scenefiles", task, f"v{version:04d}")
+                    os.makedirs(versionDir, exist_ok=True)
+                    baseName = f"sq{seqNum:02d}0-sh{shotNum:02d}0_{task}_v{version:04d}"
+                    writeFile(os.path.join(versionDir, baseName + ".hip"), profile["SceneSize"], textBlock)
+                    writeFile(os.path.join(versionDir, baseName + "versioninfo.json"), 512, textBlock)
+                    writeFile(os.path.join(versionDir, baseName + "preview.jpg"), 64 * 1024, randomBlock)
+
+            os.makedirs(os.path.join(shotDir, "Export", "_pipeline"), exist_ok=True)
+            writeFile(os.path.join(shotDir, "Export", "_pipeline", "shotinfo.json"), 1024, textBlock)
+
+    #   A few large caches inside the tree
+    cacheDir = os.path.join(shotsDir, "sq010", "sh010", "Export", "FX_Sim", "v0001")
+    os.makedirs(cacheDir, exist_ok=True)
+    for cacheNum in range(profile["Caches"]):
+        cachePath = os.path.join(cacheDir, f"sim_cache_{cacheNum:02d}.bgeo.sc")
+        writeFile(cachePath, profile["CacheSize"], randomBlock)
+        if cacheNum == 0:
+            sources["Cache"] = cachePath
+
+    #   Compressible scene file used for the single file zip
+    scenePath = os.path.join(dataDir, "lighting_master.hip")
+    writeFile(scenePath, profile["CacheSize"], textBlock)
+    sources["Scene"] = scenePath
+
+    #   Image sequence in a single directory
+    os.makedirs(sources["Sequence"], exist_ok=True)
+    for frame in range(1001, 1001 + profile["Frames"]):
+        writeFile(os.path.join(sources["Sequence"], f"sh010_beauty.{frame:04d}.exr"),
+                  profile["FrameSize"], randomBlock)
+
+    with open(markerPath, "w") as markerFile:
+        json.dump(sources, markerFile, indent=4)
+
+    return sources
+
+
+#   Returns (peak RSS bytes, read syscalls, write syscalls), None where unavailable
+def getProcessStats():
+    peakRss = readCalls = writeCalls = None
+
+    if psutil is not None:
+        process = psutil.Process()
+        memoryInfo = process.memory_info()
+        peakRss = getattr(memoryInfo, "peak_wset", None)
+        try:
+            ioCounters = process.io_counters()
+            readCalls, writeCalls = ioCounters.read_count, ioCounters.write_count
+        except (AttributeError, psutil.Error):
+            pass
+
+    if peakRss is None and resource is not None:
+        maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        #   Linux reports KB, macOS bytes
+        peakRss = maxRss if sys.platform == "darwin" else maxRss * 1024
+
+    if readCalls is None and os.path.isfile("/proc/self/io"):
+        with open("/proc/self/io", "r") as ioFile:
+            counters = dict(line.split(": ") for line in ioFile.read().splitlines())
+        readCalls, writeCalls = int(counters["syscr"]), int(counters["syscw"])
+
+    return peakRss, readCalls, writeCalls
+
+
+#   Runs one benchmark in a worker process and returns its metrics
+def runBenchmark(name, case, sourcePath, outputPath, zipFiles, engineSettings, workers):
+    _, startReads, startWrites = getProcessStats()
+    startTime = time.perf_counter()
+    error = None
+
+    if case is None:
+        manifest = scanDirectory(sourcePath, recursive=True)
+        totalFiles, totalBytes = manifest.totalFiles, 0
+    else:
+        runner = ExportRunner(case, sourcePath, outputPath, zipFiles,
+                              engineSettings=engineSettings,
+                              workers=workers)
+        errors = []
+        runner.onError = errors.append
+        runner.run()
+        if runner.failed:
+            error = errors[0] if errors else "Export failed"
+
+        if runner.manifest is not None:
+            totalFiles, totalBytes = runner.manifest.totalFiles, runner.manifest.totalBytes
+        else:
+            totalFiles, totalBytes = 1, os.path.getsize(sourcePath)
+
+    seconds = max(time.perf_counter() - startTime, 1e-9)
+    peakRss, endReads, endWrites = getProcessStats()
+
+    result = {"Seconds": round(seconds, 4),
+              "Files": totalFiles,
+              "Bytes": totalBytes,
+              "MBps": round(totalBytes / MB / seconds, 2),
+              "FilesPerSec": round(totalFiles / seconds, 1),
+              "PeakRssMB": round(peakRss / MB, 1) if peakRss else None,
+              "ReadCalls": endReads - startReads if endReads is not None else None,
+              "WriteCalls": endWrites - startWrites if endWrites is not None else None}
+
+    if error:
+        result["Error"] = error
+
+    return name, result
+
+
+def getOutputPath(outDir, name, case, sourcePath, zipFiles):
+    if case is None:
+        return None
+    if case == 3:
+        return os.path.join(outDir, name)
+    if zipFiles:
+        return os.path.join(outDir, os.path.splitext(os.path.basename(sourcePath))[0] + ".zip")
+    if case == 1:
+        return os.path.join(outDir, os.path.basename(sourcePath))
+
+    return os.path.join(outDir, name)
+
+
+def runSuite(sources, workDir, names, engineSettings, workers, repeat):
+    results = {}
+    mpContext = multiprocessing.get_context("spawn")
+
+    for name, case, sourceKey, zipFiles in BENCHMARKS:
+        if names and name not in names:
+            continue
+
+        sourcePath = sources[sourceKey]
+        best = None
+        for _ in range(repeat):
+            #   Output is removed before each run so every run writes everything
+            outDir = os.path.join(workDir, "out")
+            shutil.rmtree(outDir, ignore_errors=True)
+            os.makedirs(outDir)
+            outputPath = getOutputPath(outDir, name, case, sourcePath, zipFiles)
+            if case == 3:
+                os.makedirs(outputPath)
+
+            #   Fresh process per run so peak RSS belongs to this benchmark only
+            with ProcessPoolExecutor(max_workers=1, mp_context=mpContext) as executor:
+                _, result = executor.submit(runBenchmark, name, case, sourcePath, outputPath,
+                                            zipFiles, engineSettings, workers).result()
+
+            if best is None or result["Seconds"] < best["Seconds"]:
+                best = result
+
+        shutil.rmtree(os.path.join(workDir, "out"), ignore_errors=True)
+        results[name] = best
+        printResult(name, best)
+
+    return results
+
+
+def formatValue(value, digits=1):
+    if value is None:
+        return "--"
+    return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+
+def printResult(name, result):
+    line = (f"{name:<18} {result['Seconds']:>9.3f}s {result['MBps']:>9.1f} MB/s "
+            f"{result['FilesPerSec']:>10.1f} files/s  RSS {formatValue(result['PeakRssMB'])} MB  "
+            f"syscalls r/w {formatValue(result['ReadCalls'])}/{formatValue(result['WriteCalls'])}")
+    if result.get("Error"):
+        line += f"  ERROR: {result['Error']}"
+    print(line)
+
+
+#   Prints the change against the baseline and returns the names that regressed
+def compareBaseline(results, baseline, threshold):
+    regressions = []
+    print(f"\nCompared to baseline ({baseline.get('Date', 'unknown date')}):")
+
+    for name, result in results.items():
+        baseResult = baseline["Results"].get(name)
+        if not baseResult:
+            print(f"{name:<18} no baseline")
+            continue
+
+        #   Positive is faster than the baseline
+        change = (baseResult["Seconds"] / result["Seconds"] - 1.0) * 100.0
+        note = ""
+        if result.get("Error") or change < -threshold:
+            regressions.append(name)
+            note = "  REGRESSION"
+
+        print(f"{name:<18} {baseResult['Seconds']:>9.3f}s -> {result['Seconds']:>9.3f}s  {change:+6.1f}%{note}")
+
+    return regressions
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(
+        prog="ExportToDir_Benchmark",
+        description="Times the ExportToDir copy, scan and zip paths on synthetic Prism-like data.")
+
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="Size of the synthetic data")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "ExportToDir_Benchmark"),
+                        help="Directory for the synthetic data and outputs (default: system temp)")
+    parser.add_argument("--only", nargs="+", choices=[bench[0] for bench in BENCHMARKS],
+                        help="Only run these benchmarks")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark, the fastest is kept")
+    parser.add_argument("--engine", choices=COPY_ENGINES, help="Copy engine")
+    parser.add_argument("--buffer-size", type=int, metavar="MB", help="Buffered copy size in MB")
+    parser.add_argument("--workers", type=int, default=4, help="Files copied at once")
+    parser.add_argument("--zip-workers", type=int, help="CPU cores used for zipping (0 = all)")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against "
+                                           "(default: ExportToDir_Baseline_<profile>.json in workdir)")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Percent slower than the baseline reported as a regression")
+    parser.add_argument("--clean", action="store_true", help="Remove the synthetic data and exit")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    workDir = os.path.abspath(args.workdir)
+    if args.clean:
+        shutil.rmtree(workDir, ignore_errors=True)
+        return 0
+
+    engineSettings = {}
+    for key, value in (("Engine", args.engine), ("BufferSize", args.buffer_size),
+                       ("ZipWorkers", args.zip_workers)):
+        if value is not None:
+            engineSettings[key] = value
+    engineSettings = getEngineSettings(engineSettings)
+
+    os.makedirs(workDir, exist_ok=True)
+    sources = buildTrees(workDir, args.profile)
+
+    print(f"ExportToDir benchmark  profile: {args.profile}  engine: {engineSettings['Engine']}  "
+          f"workers: {args.workers}  python: {platform.python_version()}")
+    results = runSuite(sources, workDir, args.only, engineSettings, args.workers, max(args.repeat, 1))
+
+    report = {"Version": BENCHMARK_VERSION,
+              "Date": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "Profile": args.profile,
+              "Platform": platform.platform(),
+              "Python": platform.python_version(),
+              "EngineSettings": engineSettings,
+              "Workers": args.workers,
+              "Results": results}
+
+    if args.json:
+        with open(args.json, "w") as jsonFile:
+            json.dump(report, jsonFile, indent=4)
+
+    baselinePath = args.baseline or os.path.join(workDir, f"ExportToDir_Baseline_{args.profile}.json")
+    regressions = []
+    if os.path.isfile(baselinePath) and not args.save_baseline:
+        with open(baselinePath, "r") as baselineFile:
+            baseline = json.load(baselineFile)
+
+        if baseline.get("Profile") != args.profile:
+            print(f"WARNING: Baseline was made with profile {baseline.get('Profile')}", file=sys.stderr)
+        regressions = compareBaseline(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(baselinePath, "w") as baselineFile:
+            json.dump(report, baselineFile, indent=4)
+        print(f"\nSaved baseline to {baselinePath}")
+
+    totalBytes = sum(result["Bytes"] for result in results.values())
+    print(f"\nMoved {formatSize(totalBytes)} in {len(results)} benchmarks")
+
+    failed = [name for name, result in results.items() if result.get("Error")]
+    if regressions or failed:
+        print(f"Regressions or failures: {', '.join(sorted(set(regressions + failed)))}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
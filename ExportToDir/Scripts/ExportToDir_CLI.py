@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Headless export runner.  Runs the same ExportRunner as the plugin without
+#   Prism or Qt, so exports can be scripted, scheduled and benchmarked.
+#
+#   example:
+#       python ExportToDir_CLI.py D:/Renders/sh010 //share/client --name "@PROJECT@_@FILENAME@"
+#                                 --set PROJECT=Demo --zip
+
+import os
+import sys
+import json
+import getpass
+import argparse
+import signal
+import threading
+import time
+import logging
+from datetime import datetime
+
+from ExportToDir_Runner import ExportRunner
+from ExportToDir_Journal import getJournalPath
+from ExportToDir_Sequence import splitFrame, findSequence, selectFrames, formatFrameRanges, getFrameNames
+from ExportToDir_Preflight import estimateExport, checkFreeSpace, getSpaceReport
+from ExportToDir_Telemetry import readRecords, getAverageThroughput
+from ExportToDir_Template import DATE_FORMAT, resolveTemplate, sanitizeName, getOutputFilename
+from ExportToDir_Zip import getCompressionPolicy
+from ExportToDir_Verify import HASH_ALGORITHMS, MANIFEST_FORMATS, getVerifySettings
+from ExportToDir_Filter import FILTER_TYPES, getFilterRules, getFilterErrors
+from ExportToDir_Engine import (COPY_ENGINES, ZIP_MODES, LINK_MODES, getEngineSettings, getWorkerCount,
+                                formatSize)
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_EXISTS = 3
+EXIT_NO_SPACE = 4
+EXIT_CANCELLED = 130
+
+#   Seconds between progress lines when output is not a terminal
+LOG_INTERVAL = 2.0
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "ExportToDir_Config.json")
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(
+        prog="ExportToDir_CLI",
+        description="Export a file or directory with the ExportToDir copy and zip engine.")
+
+    parser.add_argument("source", help="File or directory to export")
+    parser.add_argument("dest", help="Output directory")
+    parser.add_argument("--name", default="@FILENAME@",
+                        help="Naming template, e.g. \"@PROJECT@--@FILENAME@\" (default: @FILENAME@)")
+    parser.add_argument("--set", dest="values", action="append", default=[], metavar="TOKEN=VALUE",
+                        help="Value for a template token, e.g. --set PROJECT=Demo (repeatable)")
+    parser.add_argument("--zip", action="store_true", help="Zip the export to a single .zip file")
+    parser.add_argument("--sequence", action="store_true",
+                        help="Export an image sequence.  A frame file as source exports the frames of its "
+                             "sequence, a directory exports its files (not sub dirs)")
+    parser.add_argument("--frames", metavar="RANGE",
+                        help="Frames of the sequence to export, e.g. 1001-1100x2 or 1001,1010-1020 (with --sequence)")
+    parser.add_argument("--frame-offset", type=int, default=0, metavar="N",
+                        help="Added to the frame numbers of renamed frames.  Frames are named from --name, "
+                             "the \"#\" in it set the frame padding")
+    parser.add_argument("--filter", choices=[filterType.split()[0] for filterType in FILTER_TYPES],
+                        help="Use the filter rules of this export type from the config (directory exports)")
+    parser.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                        help="Only export files matching the glob (or \"re:\" regex) pattern (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="Skip files and directories matching the pattern, excluded directories are not "
+                             "scanned (repeatable)")
+    parser.add_argument("--sync", action="store_true", help="Only copy new or changed files")
+    parser.add_argument("--hash", action="store_true", help="Sync compares file contents")
+    parser.add_argument("--delete-orphans", action="store_true",
+                        help="Sync deletes output files that are not in the export")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted export")
+    parser.add_argument("--overwrite", action="store_true", help="Overwrite an existing output")
+    parser.add_argument("--no-space-check", action="store_true",
+                        help="Start even if the pre-flight check finds too little free space")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="ExportToDir_Config.json to read settings from")
+    parser.add_argument("--engine", choices=COPY_ENGINES, help="Copy engine")
+    parser.add_argument("--buffer-size", type=int, metavar="MB", help="Buffered copy size in MB")
+    parser.add_argument("--workers", type=int, help="Files copied at once (default from settings)")
+    parser.add_argument("--zip-mode", choices=ZIP_MODES, help="Write zips to the output or a temp dir")
+    parser.add_argument("--zip-workers", type=int, help="CPU cores used for zipping (0 = all)")
+    parser.add_argument("--link-mode", choices=LINK_MODES,
+                        help="Link files to the source instead of copying them where the output supports it")
+    parser.add_argument("--verify", choices=HASH_ALGORITHMS,
+                        help="Hash the export while copying, read back the output and write a checksum manifest")
+    parser.add_argument("--manifest", choices=MANIFEST_FORMATS, help="Checksum manifest format")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="Append a telemetry record (phase timings, bytes, throughput) to this .jsonl file")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary and errors")
+    parser.add_argument("--verbose", action="store_true", help="Print debug logging")
+
+    return parser.parse_args(argv)
+
+
+def loadConfig(configPath):
+    #   Plugin settings are optional, defaults are used without them
+    if not configPath or not os.path.isfile(configPath):
+        return {}
+
+    with open(configPath, "r") as configFile:
+        return json.load(configFile)
+
+
+def getTemplateValues(args, sourcePath):
+    #   Same data the dialogue fills in, with extra values from --set
+    if os.path.isdir(sourcePath):
+        fileNameNoExt = os.path.basename(os.path.normpath(sourcePath))
+        sourceExt = ""
+    else:
+        fileNameNoExt, sourceExt = os.path.splitext(os.path.basename(sourcePath))
+
+    #   A frame file of a sequence is named like the sequence, e.g. shot.####
+    if args.sequence and sourceExt:
+        prefix, frame, suffix = splitFrame(fileNameNoExt)
+        if frame is not None:
+            fileNameNoExt = prefix + "#" * len(frame) + suffix
+
+    values = {"USER": getpass.getuser(),
+              "DATE": datetime.now().strftime(DATE_FORMAT),
+              "FILENAME": sanitizeName(fileNameNoExt) + sourceExt,
+              "FILETYPE": sourceExt.removeprefix(".").upper(),
+              "EXTENSION": sourceExt}
+
+    for item in args.values:
+        token, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid --set value (expected TOKEN=VALUE): {item}")
+        values[token.strip("@").upper()] = value
+
+    return values, sourceExt
+
+
+#   Returns (case, sourcePath, outputPath) using the same cases as the dialogue
+def getExportCase(args, sourcePath, outputName):
+    isDir = os.path.isdir(sourcePath)
+
+    #   Image sequence: frames of the source file's sequence (or all files of
+    #   the directory) are copied into dest, or zipped
+    if args.sequence:
+        exportSource = sourcePath if isDir else getFrameList(args, sourcePath)
+        if args.zip:
+            return 5, exportSource, os.path.join(args.dest, outputName)
+        return 3, exportSource, args.dest
+
+    if isDir:
+        return (4 if args.zip else 2), sourcePath, os.path.join(args.dest, outputName)
+
+    return 1, sourcePath, os.path.join(args.dest, outputName)
+
+
+#   Frames of the sequence of sourcePath in the --frames range, missing frames are reported
+def getFrameList(args, sourcePath):
+    frameList, missing = selectFrames(findSequence(sourcePath), args.frames)
+    if missing and not args.quiet:
+        print(f"WARNING: {len(missing)} frames are missing: {formatFrameRanges(missing)}", file=sys.stderr)
+    if not frameList:
+        raise ValueError(f"No frames of the sequence are in the frame range: {args.frames}")
+
+    return frameList
+
+
+class ProgressPrinter(object):
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.isTerminal = sys.stderr.isatty()
+        self.lastLine = 0.0
+        self.lineLength = 0
+
+
+    def status(self, text):
+        if self.quiet:
+            return
+
+        if self.isTerminal:
+            sys.stderr.write("\r" + text.ljust(self.lineLength))
+            sys.stderr.flush()
+            self.lineLength = len(text)
+            return
+
+        now = time.monotonic()
+        if now - self.lastLine >= LOG_INTERVAL:
+            self.lastLine = now
+            print(text, file=sys.stderr)
+
+
+    def end(self):
+        if self.isTerminal and self.lineLength and not self.quiet:
+            sys.stderr.write("\n")
+            self.lineLength = 0
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    sourcePath = os.path.normpath(os.path.abspath(args.source))
+    if not os.path.exists(sourcePath):
+        print(f"ERROR: Source does not exist: {sourcePath}", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        config = loadConfig(args.config)
+        values, sourceExt = getTemplateValues(args, sourcePath)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    #   Settings from the plugin config, overridden by the command line
+    engineSettings = dict(config.get("EngineSettings") or {})
+    for key, value in (("Engine", args.engine), ("BufferSize", args.buffer_size),
+                       ("ZipMode", args.zip_mode), ("ZipWorkers", args.zip_workers),
+                       ("LinkMode", args.link_mode)):
+        if value is not None:
+            engineSettings[key] = value
+    engineSettings = getEngineSettings(engineSettings)
+    compressionPolicy = getCompressionPolicy(config.get("CompressionPolicy"))
+    verifySettings = dict(config.get("VerifySettings") or {})
+    for key, value in (("Algorithm", args.verify), ("ManifestFormat", args.manifest)):
+        if value is not None:
+            verifySettings[key] = value
+    verifySettings = getVerifySettings(verifySettings)
+
+    #   Filter rules of the export type, extended by the command line patterns
+    filterRules = {"Include": [], "Exclude": []}
+    if args.filter:
+        filterRules = getFilterRules(config.get("FilterRules"))[f"{args.filter} Files:"]
+    filterRules = {"Include": filterRules["Include"] + args.include,
+                   "Exclude": filterRules["Exclude"] + args.exclude}
+    filterErrors = getFilterErrors(filterRules["Include"] + filterRules["Exclude"])
+    if filterErrors:
+        print("ERROR: " + "\n".join(filterErrors), file=sys.stderr)
+        return EXIT_USAGE
+
+    resolvedName = resolveTemplate(args.name, values)
+    outputName = getOutputFilename(resolvedName, sourceExt, zipFiles=args.zip,
+                                   singleFile=not args.sequence)
+    if args.frames and not (args.sequence and os.path.isfile(sourcePath)):
+        print("ERROR: --frames needs --sequence and a frame file as source", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        case, exportSource, outputPath = getExportCase(args, sourcePath, outputName)
+
+        #   Frames of a sequence are named from the resolved name
+        frameNaming = None
+        if isinstance(exportSource, list):
+            frameNaming = {"Name": os.path.splitext(resolvedName)[0] + sourceExt, "Offset": args.frame_offset}
+            getFrameNames(exportSource, frameNaming["Name"], frameNaming["Offset"])
+
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    outputPath = os.path.normpath(os.path.abspath(outputPath))
+
+    #   Only directory trees are filtered
+    if case not in [2, 4] or not (filterRules["Include"] or filterRules["Exclude"]):
+        filterRules = None
+
+    syncOptions = None
+    if args.sync and not args.zip and case != 1:
+        syncOptions = {"Hash": args.hash, "DeleteOrphans": args.delete_orphans}
+
+    isDirOutput = case in (2, 3)
+    resume = args.resume and os.path.isfile(getJournalPath(outputPath, isDirOutput))
+    if (os.path.exists(outputPath) and not (resume or args.overwrite or syncOptions)
+            and not (isDirOutput and not os.listdir(outputPath))):
+        print(f"ERROR: Output already exists (use --overwrite, --sync or --resume): {outputPath}",
+              file=sys.stderr)
+        return EXIT_EXISTS
+
+    #   Pre-flight size estimate and free space check before anything is written
+    try:
+        estimate = estimateExport(case, exportSource, outputPath, args.zip, engineSettings["ZipMode"],
+                                  compressionPolicy, linkMode=engineSettings["LinkMode"], filterRules=filterRules)
+    except OSError as e:
+        print(f"ERROR: Unable to read the export source: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    throughput = getAverageThroughput(readRecords(args.telemetry), args.zip) if args.telemetry else None
+    if not args.quiet:
+        print(estimate.getReport(throughput), file=sys.stderr)
+
+    problems = checkFreeSpace([estimate])
+    if problems and not args.no_space_check:
+        print(f"ERROR: Not enough free space (use --no-space-check to start anyway):\n"
+              f"{getSpaceReport(problems)}", file=sys.stderr)
+        return EXIT_NO_SPACE
+
+    #   An output directory is made by the export, so a cancel can remove it
+    os.makedirs(os.path.dirname(os.path.abspath(outputPath)), exist_ok=True)
+
+    workers = args.workers or getWorkerCount(outputPath, engineSettings, config.get("ExportPaths"))
+    runner = ExportRunner(case, exportSource, outputPath, args.zip,
+                          engineSettings=engineSettings,
+                          workers=workers,
+                          compressionPolicy=compressionPolicy,
+                          syncOptions=syncOptions,
+                          resume=resume,
+                          telemetryPath=args.telemetry,
+                          verifySettings=verifySettings,
+                          frameNaming=frameNaming,
+                          filterRules=filterRules,
+                          manifest=estimate.manifest)
+
+    printer = ProgressPrinter(args.quiet)
+    result = {}
+    runner.onStatus = printer.status
+    runner.onError = lambda message: result.setdefault("error", message)
+    runner.onState = lambda state: result.setdefault("state", state)
+
+    if not args.quiet:
+        print(f"Exporting {runner.sourceLabel} -> {outputPath} (case {case}, {workers} workers)", file=sys.stderr)
+
+    #   Runs in a worker thread, Ctrl+C cancels through the token so partial
+    #   output is cleaned up like a cancel from the dialogue
+    signal.signal(signal.SIGINT, lambda signum, frame: runner.token.cancel())
+
+    startTime = time.perf_counter()
+    thread = threading.Thread(target=runner.run, name="ExportToDir_CLI")
+    thread.start()
+    while thread.is_alive():
+        thread.join(0.2)
+
+    elapsed = time.perf_counter() - startTime
+    printer.end()
+
+    if runner.token.isCancelled():
+        print("Cancelled.", file=sys.stderr)
+        return EXIT_CANCELLED
+
+    if runner.failed:
+        print(f"ERROR: {result.get('error', 'Export failed')}", file=sys.stderr)
+        return EXIT_FAILED
+
+    print(runner.getCompleteStatus())
+    if runner.manifest is not None:
+        print(f"{runner.manifest.totalFiles} files, {formatSize(runner.manifest.totalBytes)} "
+              f"in {elapsed:.1f} s")
+
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
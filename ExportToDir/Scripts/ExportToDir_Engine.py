@@ -0,0 +1,870 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Copy engine used by CopyThread.  Kept free of Qt and Prism imports
+#   so it can be driven outside of the Prism GUI.
+
+import os
+import sys
+import errno
+import shutil
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Available copy engines (displayed in User Settings)
+ENGINE_AUTO = "Auto"
+ENGINE_KERNEL = "Kernel"
+ENGINE_SHUTIL = "Shutil"
+ENGINE_BUFFERED = "Buffered"
+COPY_ENGINES = [ENGINE_AUTO, ENGINE_KERNEL, ENGINE_SHUTIL, ENGINE_BUFFERED]
+
+#   Buffer sizes in MB
+DEFAULT_BUFFER_SIZE = 8
+BUFFER_SIZES = [1, 4, 8, 16, 32, 64]
+
+#   Max bytes handed to the kernel per call so progress and cancel are still checked
+KERNEL_CHUNK = 16 * 1024 * 1024
+
+#   Errors that mean the kernel copy is not supported for this file pair
+KERNEL_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                          errno.ENOTSUP, errno.EOPNOTSUPP}
+
+MEGABYTE = 1024 * 1024
+
+#   Link modes: files are linked to the source instead of copied when the
+#   destination supports it, and copied when it does not
+LINK_COPY = "Copy"
+LINK_HARDLINK = "Hardlink"
+LINK_REFLINK = "Reflink"
+LINK_SYMLINK = "Symlink"
+LINK_MODES = [LINK_COPY, LINK_HARDLINK, LINK_REFLINK, LINK_SYMLINK]
+
+#   Linux ioctl cloning a whole file copy-on-write (Btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+#   Errors that mean the link is not supported for this source and destination
+LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOSYS, errno.EINVAL,
+                        errno.ENOTTY, errno.EBADF, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+#   Same for Windows: invalid function, not same device, not supported,
+#   too many links, privilege not held (symlinks without Developer Mode)
+LINK_FALLBACK_WINERRORS = {1, 17, 50, 1142, 1314}
+
+#   Zip modes: write straight to the output, or stage in a temp dir and copy
+ZIP_MODE_STREAM = "Stream"
+ZIP_MODE_TEMP = "Temp Dir"
+ZIP_MODES = [ZIP_MODE_STREAM, ZIP_MODE_TEMP]
+
+#   Suffix of files being written before they are renamed into place
+PARTIAL_EXT = ".partial"
+
+#   Parallel copy worker defaults
+DEFAULT_LOCAL_WORKERS = 4
+DEFAULT_NETWORK_WORKERS = 8
+MAX_WORKERS = 64
+
+#   Max progress callbacks per second
+PROGRESS_RATE = 20
+
+#   Export jobs allowed to write to the same destination volume at once
+DEFAULT_DEST_JOBS = 1
+MAX_DEST_JOBS = 16
+
+#   Filesystem types treated as network shares
+NETWORK_FILESYSTEMS = {"cifs", "smb", "smbfs", "smb2", "smb3", "nfs", "nfs4",
+                       "afpfs", "webdav", "davfs", "fuse.sshfs", "9p"}
+
+
+def kernelCopyAvailable():
+    #   copy_file_range / sendfile to a regular file are only reliable on Linux
+    if not sys.platform.startswith("linux"):
+        return False
+    return hasattr(os, "copy_file_range") or hasattr(os, "sendfile")
+
+
+def getEngineSettings(settings):
+    #   Returns sanitized engine settings with defaults for missing keys
+    settings = settings or {}
+
+    engine = settings.get("Engine", ENGINE_AUTO)
+    if engine not in COPY_ENGINES:
+        engine = ENGINE_AUTO
+
+    try:
+        bufferSize = int(settings.get("BufferSize", DEFAULT_BUFFER_SIZE))
+    except (TypeError, ValueError):
+        bufferSize = DEFAULT_BUFFER_SIZE
+    if bufferSize < 1:
+        bufferSize = DEFAULT_BUFFER_SIZE
+
+    workers = {}
+    for key, default in (("LocalWorkers", DEFAULT_LOCAL_WORKERS),
+                         ("NetworkWorkers", DEFAULT_NETWORK_WORKERS)):
+        try:
+            value = int(settings.get(key, default))
+        except (TypeError, ValueError):
+            value = default
+        workers[key] = min(max(value, 1), MAX_WORKERS)
+
+    zipMode = settings.get("ZipMode", ZIP_MODE_STREAM)
+    if zipMode not in ZIP_MODES:
+        zipMode = ZIP_MODE_STREAM
+
+    #   0 uses one zip worker per core
+    try:
+        zipWorkers = max(int(settings.get("ZipWorkers", 0)), 0)
+    except (TypeError, ValueError):
+        zipWorkers = 0
+
+    try:
+        destJobs = min(max(int(settings.get("JobsPerDestination", DEFAULT_DEST_JOBS)), 1), MAX_DEST_JOBS)
+    except (TypeError, ValueError):
+        destJobs = DEFAULT_DEST_JOBS
+
+    linkMode = settings.get("LinkMode", LINK_COPY)
+    if linkMode not in LINK_MODES:
+        linkMode = LINK_COPY
+
+    return {"Engine": engine,
+            "BufferSize": bufferSize,
+            "LocalWorkers": workers["LocalWorkers"],
+            "NetworkWorkers": workers["NetworkWorkers"],
+            "ZipMode": zipMode,
+            "ZipWorkers": zipWorkers,
+            "JobsPerDestination": destJobs,
+            "LinkMode": linkMode}
+
+
+def isLinkUnsupported(e):
+    #   True if the OSError means the link cannot be made here, not that the export failed
+    if getattr(e, "winerror", None) in LINK_FALLBACK_WINERRORS:
+        return True
+    return e.errno in LINK_FALLBACK_ERRNOS
+
+
+def getPartialPath(path):
+    #   Temporary name used while writing path
+    return path + PARTIAL_EXT
+
+
+def isNetworkPath(path):
+    #   Checks if path is on a network share (UNC path, mapped drive or network mount)
+    path = os.path.abspath(path)
+    if path.startswith("\\\\") or path.startswith("//"):
+        return True
+
+    if sys.platform == "win32":
+        drive = os.path.splitdrive(path)[0]
+        if not drive:
+            return False
+        try:
+            import ctypes
+            DRIVE_REMOTE = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+        except Exception:
+            return False
+
+    #   Finds the filesystem type of the deepest mount point containing path
+    try:
+        with open("/proc/mounts", "r") as mountsFile:
+            mounts = [line.split() for line in mountsFile]
+    except OSError:
+        return False
+
+    fsType = None
+    mountLength = -1
+    for mount in mounts:
+        if len(mount) < 3:
+            continue
+        mountPoint = mount[1].replace("\\040", " ")
+        if path == mountPoint or path.startswith(mountPoint.rstrip("/") + "/"):
+            if len(mountPoint) > mountLength:
+                mountLength = len(mountPoint)
+                fsType = mount[2]
+
+    return fsType in NETWORK_FILESYSTEMS
+
+
+def getWorkerCount(outputPath, settings, exportPaths=None):
+    #   Worker count set on a User Settings export dir takes priority
+    settings = getEngineSettings(settings)
+    outputPath = os.path.normcase(os.path.normpath(outputPath))
+
+    matchLength = -1
+    workers = 0
+    for item in exportPaths or []:
+        dirPath = item.get("Path")
+        dirWorkers = item.get("Workers", 0)
+        if not dirPath or not dirWorkers:
+            continue
+        dirPath = os.path.normcase(os.path.normpath(dirPath))
+        if outputPath == dirPath or outputPath.startswith(dirPath.rstrip(os.sep) + os.sep):
+            if len(dirPath) > matchLength:
+                matchLength = len(dirPath)
+                workers = dirWorkers
+
+    if workers:
+        return min(max(int(workers), 1), MAX_WORKERS)
+
+    if isNetworkPath(outputPath):
+        return settings["NetworkWorkers"]
+
+    return settings["LocalWorkers"]
+
+
+def formatThroughput(numBytes, seconds):
+    #   Returns human readable MB/s
+    if seconds <= 0:
+        return "-- MB/s"
+    return f"{numBytes / MEGABYTE / seconds:.1f} MB/s"
+
+
+def formatEta(seconds):
+    #   Returns h:mm:ss or m:ss
+    if seconds is None:
+        return "--:--"
+
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def formatSize(numBytes):
+    #   Returns human readable size
+    size = float(numBytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+    return f"{size:.1f} TB"
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+#   Cooperative cancel and pause shared by the export and its workers.
+#   Workers call check() between chunks, files and zip members.
+class ControlToken(object):
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._interrupted = False
+
+        #   Time spent paused, so rates and ETAs only count transfer time
+        self._pausedTime = 0.0
+        self._pauseStart = None
+        self._pauseLock = threading.Lock()
+
+
+    def cancel(self):
+        self._cancelled.set()
+        #   Wakes workers waiting in a pause so they can stop
+        self._running.set()
+
+
+    #   Stops like cancel, but the partial output and journal are kept so the
+    #   export can be resumed (used when Prism closes)
+    def interrupt(self):
+        self._interrupted = True
+        self.cancel()
+
+
+    def pause(self):
+        with self._pauseLock:
+            if not self._cancelled.is_set() and self._pauseStart is None:
+                self._pauseStart = time.perf_counter()
+                self._running.clear()
+
+
+    def resume(self):
+        with self._pauseLock:
+            if self._pauseStart is not None:
+                self._pausedTime += time.perf_counter() - self._pauseStart
+                self._pauseStart = None
+            self._running.set()
+
+
+    #   Total seconds paused, including a pause still going on
+    def getPausedTime(self):
+        with self._pauseLock:
+            if self._pauseStart is None:
+                return self._pausedTime
+            return self._pausedTime + time.perf_counter() - self._pauseStart
+
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+
+    def isInterrupted(self):
+        return self._interrupted
+
+
+    def isPaused(self):
+        return not self._running.is_set()
+
+
+    #   Blocks while paused, raises ExportCancelled once cancelled
+    def check(self):
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise ExportCancelled("Export cancelled")
+
+
+#   Thread-safe progress totals shared by all copy workers.  Updates are
+#   byte weighted and the callback is coalesced to at most maxRate calls a
+#   second, and only made when the percentage or ETA changes.
+class TransferProgress(object):
+    def __init__(self, totalFiles, totalBytes, callback=None, maxRate=PROGRESS_RATE, token=None):
+        self.totalFiles = totalFiles
+        self.totalBytes = totalBytes
+        self.callback = callback
+        self.interval = 1.0 / maxRate if maxRate else 0.0
+
+        self.filesDone = 0
+        self.bytesDone = 0
+        #   Bytes done by an earlier run (resume) do not count for throughput
+        self.bytesSkipped = 0
+        self.startTime = time.perf_counter()
+
+        #   Optional ControlToken, time paused is left out of the elapsed time
+        self.token = token
+        self.startPaused = token.getPausedTime() if token is not None else 0.0
+
+        self._lastNotify = 0.0
+        self._lastState = None
+        self._lock = threading.Lock()
+
+
+    def addBytes(self, numBytes):
+        with self._lock:
+            self.bytesDone += numBytes
+        self._notify()
+
+
+    def fileDone(self):
+        with self._lock:
+            self.filesDone += 1
+            finished = self.filesDone >= self.totalFiles
+        self._notify(force=finished)
+
+
+    #   Counts bytes and files that were already done before this run
+    def skip(self, numBytes, numFiles=0):
+        with self._lock:
+            self.bytesDone += numBytes
+            self.bytesSkipped += numBytes
+            self.filesDone += numFiles
+        self._notify()
+
+
+    def getPercent(self):
+        if self.totalBytes:
+            return min(int(self.bytesDone / self.totalBytes * 100), 100)
+        if self.totalFiles:
+            return min(int(self.filesDone / self.totalFiles * 100), 100)
+        return 100
+
+
+    def getElapsed(self):
+        elapsed = time.perf_counter() - self.startTime
+        if self.token is not None:
+            elapsed -= self.token.getPausedTime() - self.startPaused
+        return elapsed
+
+
+    #   Bytes per second moved in this run
+    def getRate(self):
+        elapsed = self.getElapsed()
+        if elapsed <= 0:
+            return 0.0
+        return (self.bytesDone - self.bytesSkipped) / elapsed
+
+
+    #   Seconds remaining, None until there is a rate to estimate from
+    def getEta(self):
+        rate = self.getRate()
+        if rate <= 0:
+            return None
+        return max(self.totalBytes - self.bytesDone, 0) / rate
+
+
+    def getStatus(self):
+        return (f"{self.filesDone} / {self.totalFiles} files    "
+                f"{formatSize(self.bytesDone)} / {formatSize(self.totalBytes)}    "
+                f"{formatThroughput(self.bytesDone - self.bytesSkipped, self.getElapsed())}    "
+                f"ETA {formatEta(self.getEta())}")
+
+
+    def _notify(self, force=False):
+        if not self.callback:
+            return
+
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._lastNotify < self.interval:
+                return
+
+            state = (self.getPercent(), formatEta(self.getEta()))
+            if not force and state == self._lastState:
+                return
+
+            self._lastNotify = now
+            self._lastState = state
+
+        self.callback(self)
+
+
+class CopyEngine(object):
+    def __init__(self, engine=ENGINE_AUTO, bufferSize=DEFAULT_BUFFER_SIZE, linkMode=LINK_COPY):
+        self.engine = engine
+        self.bufferSize = int(bufferSize) * MEGABYTE
+
+        #   Links files instead of copying them where the destination allows.
+        #   Support is remembered per (mode, source volume, destination volume).
+        self.linkMode = linkMode
+        self._linkSupport = {}
+
+        #   Copy buffers are reused per thread
+        self._local = threading.local()
+        self._statsLock = threading.Lock()
+
+        #   Sets dest mtime to the source mtime after copying (used by sync exports)
+        self.preserveTimes = False
+
+        #   Optional ControlToken checked between chunks
+        self.token = None
+
+        #   Optional hash constructor (verify).  Source data is hashed while it is
+        #   copied and the hex digest is kept in sourceHashes by dest path.
+        self.hashFactory = None
+        self.sourceHashes = {}
+
+        #   Dest files that did not exist before, removed if the export is cancelled
+        self.createdFiles = []
+
+        self.bytesCopied = 0
+        self.copyTime = 0.0
+        self.hashTime = 0.0
+        self.filesLinked = 0
+        self.bytesLinked = 0
+
+
+    @classmethod
+    def fromSettings(cls, settings):
+        settings = getEngineSettings(settings)
+        return cls(settings["Engine"], settings["BufferSize"], settings["LinkMode"])
+
+
+    #   Resolves "Auto" to the fastest engine for this platform.  Hashing needs
+    #   the data in user space, which kernel and native copies never see.
+    def resolveEngine(self):
+        if self.hashFactory is not None:
+            return ENGINE_BUFFERED
+
+        if self.engine == ENGINE_AUTO:
+            if kernelCopyAvailable():
+                return ENGINE_KERNEL
+            return ENGINE_BUFFERED
+
+        if self.engine == ENGINE_KERNEL and not kernelCopyAvailable():
+            return ENGINE_BUFFERED
+
+        return self.engine
+
+
+    def resetStats(self):
+        with self._statsLock:
+            self.bytesCopied = 0
+            self.copyTime = 0.0
+            self.hashTime = 0.0
+            self.sourceHashes = {}
+            self.createdFiles = []
+            self.filesLinked = 0
+            self.bytesLinked = 0
+
+
+    #   Average MB/s of all copies since last reset
+    def getThroughput(self):
+        return formatThroughput(self.bytesCopied, self.copyTime)
+
+
+    #   Copies file data from src to dest.  progressCallback(copiedBytes, totalBytes)
+    #   is called after every chunk.  If offset is given the first offset bytes
+    #   of dest are kept and the copy continues from there (resumed exports).
+    #   Returns number of bytes copied.
+    def copyFile(self, src, dest, progressCallback=None, offset=0):
+        startTime = time.perf_counter()
+        startPaused = self.getPausedTime()
+        totalSize = os.path.getsize(src)
+        engine = self.resolveEngine()
+
+        if not os.path.lexists(dest):
+            with self._statsLock:
+                self.createdFiles.append(dest)
+
+        if not offset:
+            if self.linkFile(src, dest):
+                with self._statsLock:
+                    self.filesLinked += 1
+                    self.bytesLinked += totalSize
+                if progressCallback:
+                    progressCallback(totalSize, totalSize)
+                return 0
+
+            #   Writing through a link left by an earlier linked export would change the source
+            self.removeSharedDest(src, dest)
+
+        #   Native copy cannot continue a partial file
+        if engine == ENGINE_SHUTIL and offset:
+            engine = ENGINE_BUFFERED
+
+        hasher = self.hashFactory() if self.hashFactory else None
+
+        self.checkToken()
+
+        try:
+            if engine == ENGINE_SHUTIL:
+                copiedSize = self._copyShutil(src, dest, totalSize, progressCallback)
+            else:
+                destMode = "r+b" if offset else "wb"
+                with open(src, "rb") as srcFile, open(dest, destMode) as destFile:
+                    if offset:
+                        #   Bytes copied by the earlier run are read again for the hash
+                        if hasher is not None:
+                            self._hashRange(srcFile, hasher, offset)
+                        srcFile.seek(offset)
+                        destFile.seek(offset)
+                        destFile.truncate()
+
+                    copiedSize = None
+                    if engine == ENGINE_KERNEL:
+                        copiedSize = self._copyKernel(srcFile, destFile, totalSize, progressCallback, offset)
+
+                    #   Kernel copy not supported for this file pair
+                    if copiedSize is None:
+                        copiedSize = self._copyBuffered(srcFile, destFile, totalSize, progressCallback, offset,
+                                                        hasher)
+
+                    copiedSize -= offset
+
+        except ExportCancelled:
+            #   Partially written file is removed on cancel, a continued file
+            #   is cut back to the bytes of the earlier run.  An interrupted
+            #   file is kept for resume, the journal never records more than was written.
+            if self.token is not None and self.token.isInterrupted():
+                pass
+            elif offset:
+                os.truncate(dest, offset)
+            elif os.path.exists(dest):
+                os.remove(dest)
+            raise
+
+        if self.preserveTimes:
+            srcStat = os.stat(src)
+            os.utime(dest, ns=(srcStat.st_atime_ns, srcStat.st_mtime_ns))
+
+        #   Time paused during this file does not count for throughput
+        elapsed = time.perf_counter() - startTime - (self.getPausedTime() - startPaused)
+        with self._statsLock:
+            self.bytesCopied += copiedSize
+            self.copyTime += elapsed
+            if hasher is not None:
+                self.sourceHashes[dest] = hasher.hexdigest()
+
+        logger.debug(f"Copied {copiedSize} bytes with {engine} engine "
+                     f"({formatThroughput(copiedSize, elapsed)})")
+
+        return copiedSize
+
+
+    #   Links dest to src with the link mode.  Returns False if the mode is Copy
+    #   or the destination does not support the link, the file is copied then.
+    def linkFile(self, src, dest):
+        if self.linkMode == LINK_COPY:
+            return False
+
+        srcDevice = os.stat(src).st_dev
+        destDevice = os.stat(os.path.dirname(os.path.abspath(dest))).st_dev
+        supportKey = (self.linkMode, srcDevice, destDevice)
+        if self._linkSupport.get(supportKey) is False:
+            return False
+
+        #   Hardlinks and reflinks only work within one volume
+        if self.linkMode != LINK_SYMLINK and srcDevice != destDevice:
+            self._setLinkSupport(supportKey, False, "source and destination are on different volumes")
+            return False
+
+        self.checkToken()
+
+        try:
+            if self.linkMode == LINK_REFLINK:
+                self._reflink(src, dest)
+            else:
+                if os.path.lexists(dest):
+                    os.remove(dest)
+                if self.linkMode == LINK_HARDLINK:
+                    os.link(src, dest)
+                else:
+                    os.symlink(os.path.abspath(src), dest)
+
+        except OSError as e:
+            if not isLinkUnsupported(e):
+                raise
+            self._setLinkSupport(supportKey, False, e)
+            return False
+
+        #   Hardlinks and symlinks already show the source times (and utime would change the source)
+        if self.preserveTimes and self.linkMode == LINK_REFLINK:
+            srcStat = os.stat(src)
+            os.utime(dest, ns=(srcStat.st_atime_ns, srcStat.st_mtime_ns))
+
+        self._setLinkSupport(supportKey, True)
+
+        return True
+
+
+    def _setLinkSupport(self, supportKey, supported, reason=None):
+        with self._statsLock:
+            if supportKey in self._linkSupport:
+                return
+            self._linkSupport[supportKey] = supported
+
+        if supported:
+            logger.debug(f"{self.linkMode} supported for this destination")
+        else:
+            logger.info(f"{self.linkMode} not possible, copying instead: {reason}")
+
+
+    def _reflink(self, src, dest):
+        if fcntl is None or not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform")
+
+        #   Opening with "wb" would truncate the source if dest is a link to it
+        self.removeSharedDest(src, dest)
+        try:
+            with open(src, "rb") as srcFile, open(dest, "wb") as destFile:
+                fcntl.ioctl(destFile.fileno(), FICLONE, srcFile.fileno())
+        except OSError:
+            if os.path.exists(dest):
+                os.remove(dest)
+            raise
+
+
+    #   Removes dest if it is a symlink or hardlink to src, so it is replaced
+    #   by a new file instead of written through
+    def removeSharedDest(self, src, dest):
+        if os.path.islink(dest) or (os.path.exists(dest) and os.path.samefile(src, dest)):
+            os.remove(dest)
+
+
+    #   Copies a list of (src, dest, size) items using a bounded pool of
+    #   worker threads.  Stops at and re-raises the first failed file.
+    #   An optional journal is used to skip or continue files of an interrupted export.
+    def copyFileList(self, fileList, workers=1, progress=None, journal=None):
+        workers = min(max(int(workers), 1), MAX_WORKERS)
+
+        if workers == 1 or len(fileList) < 2:
+            for src, dest, size in fileList:
+                self._copyTracked(src, dest, progress, journal)
+            return
+
+        logger.debug(f"Copying {len(fileList)} files with {workers} workers")
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ExportToDir")
+        try:
+            futures = [executor.submit(self._copyTracked, src, dest, progress, journal)
+                       for src, dest, size in fileList]
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            #   Drops queued files if a copy failed
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+    def _copyTracked(self, src, dest, progress, journal=None):
+        offset = 0
+        if journal is not None:
+            offset = journal.getResumeOffset(src, dest)
+
+            #   Already completed by an earlier run
+            if offset is None:
+                if progress is not None:
+                    progress.skip(os.path.getsize(src), 1)
+                return
+
+        #   Converts the per-file running total into deltas for the shared progress
+        lastSize = [offset]
+        if progress is not None and offset:
+            progress.skip(offset)
+
+        def fileProgress(copiedSize, totalSize):
+            if progress is not None:
+                progress.addBytes(copiedSize - lastSize[0])
+            lastSize[0] = copiedSize
+            if journal is not None:
+                journal.addRange(src, dest, copiedSize)
+
+        self.copyFile(src, dest, progressCallback=fileProgress, offset=offset)
+
+        if journal is not None:
+            journal.fileDone(src, dest)
+        if progress is not None:
+            progress.fileDone()
+
+
+    def checkToken(self):
+        if self.token is not None:
+            self.token.check()
+
+
+    def getPausedTime(self):
+        return self.token.getPausedTime() if self.token is not None else 0.0
+
+
+    def _getBuffer(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) != self.bufferSize:
+            buffer = memoryview(bytearray(self.bufferSize))
+            self._local.buffer = buffer
+        return buffer
+
+
+    def _copyBuffered(self, srcFile, destFile, totalSize, progressCallback, offset=0, hasher=None):
+        buffer = self._getBuffer()
+        copiedSize = offset
+        hashTime = 0.0
+
+        while True:
+            self.checkToken()
+            readSize = srcFile.readinto(buffer)
+            if not readSize:
+                break
+            destFile.write(buffer[:readSize])
+            #   hashlib releases the GIL for large blocks, so workers hash in parallel
+            if hasher is not None:
+                hashStart = time.perf_counter()
+                hasher.update(buffer[:readSize])
+                hashTime += time.perf_counter() - hashStart
+            copiedSize += readSize
+            if progressCallback:
+                progressCallback(copiedSize, totalSize)
+
+        if hashTime:
+            with self._statsLock:
+                self.hashTime += hashTime
+
+        return copiedSize
+
+
+    def _hashRange(self, srcFile, hasher, numBytes):
+        buffer = self._getBuffer()
+        remaining = numBytes
+
+        while remaining > 0:
+            self.checkToken()
+            readSize = srcFile.readinto(buffer[:min(remaining, len(buffer))])
+            if not readSize:
+                break
+            hasher.update(buffer[:readSize])
+            remaining -= readSize
+
+
+    def _copyKernel(self, srcFile, destFile, totalSize, progressCallback, offset=0):
+        srcFd = srcFile.fileno()
+        destFd = destFile.fileno()
+        useCopyRange = hasattr(os, "copy_file_range")
+        copiedSize = offset
+
+        while True:
+            self.checkToken()
+            try:
+                if useCopyRange:
+                    sent = os.copy_file_range(srcFd, destFd, KERNEL_CHUNK)
+                else:
+                    sent = os.sendfile(destFd, srcFd, copiedSize, KERNEL_CHUNK)
+
+            except OSError as e:
+                if e.errno not in KERNEL_FALLBACK_ERRNOS:
+                    raise
+                #   copy_file_range failed (e.g. cross-device on old kernels), try sendfile
+                if useCopyRange and copiedSize == offset and hasattr(os, "sendfile"):
+                    useCopyRange = False
+                    continue
+                if copiedSize == offset:
+                    logger.debug(f"Kernel copy not supported, using buffered copy: {e}")
+                    return None
+                raise
+
+            if sent == 0:
+                break
+
+            copiedSize += sent
+            if progressCallback:
+                progressCallback(copiedSize, totalSize)
+
+        return copiedSize
+
+
+    def _copyShutil(self, src, dest, totalSize, progressCallback):
+        #   Uses the platform fast path (CopyFile2 / fcopyfile / sendfile), no mid-file progress
+        shutil.copyfile(src, dest)
+        if progressCallback:
+            progressCallback(totalSize, totalSize)
+
+        return totalSize
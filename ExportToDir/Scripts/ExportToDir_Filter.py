@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+
+#   Include and exclude rules for tree exports (Project, Asset and Shot).
+#   Patterns are globs, or regular expressions with a "re:" prefix, matched
+#   against the path relative to the export root.  The rules are applied by
+#   the scanner, so excluded directories are never walked.
+
+import os
+import re
+import fnmatch
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Export types with filter rules (the NamingTemplate keys of tree exports)
+FILTER_TYPES = ["Project Files:", "Asset Files:", "Shot Files:"]
+
+REGEX_PREFIX = "re:"
+
+#   Separates the patterns in line edits (commas are used in regex repeats)
+PATTERN_SEPARATOR = ";"
+
+#   Leftovers of interrupted exports and OS metadata files
+DEFAULT_EXCLUDE = ["*.partial", "*.exportjournal", "Thumbs.db", "desktop.ini", ".DS_Store"]
+
+#   Paths are matched case insensitive where the filesystem is
+REGEX_FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+
+def getFilterRules(settings):
+    #   Returns sanitized rules for each filter type with defaults for missing types
+    settings = settings or {}
+
+    rules = {}
+    for filterType in FILTER_TYPES:
+        typeRules = settings.get(filterType)
+        if not isinstance(typeRules, dict):
+            typeRules = {"Include": [], "Exclude": DEFAULT_EXCLUDE}
+
+        rules[filterType] = {}
+        for key in ("Include", "Exclude"):
+            patterns = typeRules.get(key)
+            if not isinstance(patterns, list):
+                patterns = []
+            rules[filterType][key] = [pattern.strip() for pattern in patterns
+                                      if isinstance(pattern, str) and pattern.strip()]
+
+    return rules
+
+
+def parsePatterns(text):
+    return [pattern.strip() for pattern in text.split(PATTERN_SEPARATOR) if pattern.strip()]
+
+
+def formatPatterns(patterns):
+    return f"{PATTERN_SEPARATOR} ".join(patterns)
+
+
+#   Returns the problems of a pattern list, used to mark invalid line edits
+def getFilterErrors(patterns):
+    errors = []
+    for pattern in patterns:
+        try:
+            FilterRule(pattern)
+        except ValueError as e:
+            errors.append(str(e))
+
+    return errors
+
+
+#   One pattern.  A glob without "/" matches the item name at any depth, with
+#   "/" it matches the path from the export root.  A trailing "/" only matches
+#   directories.  "re:" patterns are searched in the path.
+class FilterRule(object):
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.dirOnly = False
+
+        if pattern.startswith(REGEX_PREFIX):
+            self.isRegex = True
+            self.matchPath = True
+            expression = pattern[len(REGEX_PREFIX):]
+        else:
+            self.isRegex = False
+            glob = pattern.replace("\\", "/")
+            if glob.endswith("/"):
+                self.dirOnly = True
+                glob = glob.rstrip("/")
+            self.matchPath = "/" in glob
+            expression = fnmatch.translate(glob.lstrip("/"))
+
+        try:
+            self.regex = re.compile(expression, REGEX_FLAGS)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern \"{pattern}\": {e}")
+
+
+    def matches(self, relPath, name, isDir):
+        if self.dirOnly and not isDir:
+            return False
+        if self.isRegex:
+            return self.regex.search(relPath) is not None
+        return self.regex.match(relPath if self.matchPath else name) is not None
+
+
+#   Compiled rules of one export.  Without include rules every file that is
+#   not excluded is exported.  With include rules a file is exported if it,
+#   or a directory above it, matches one of them.
+class ExportFilter(object):
+    def __init__(self, rules=None):
+        rules = rules or {}
+        self.include = [FilterRule(pattern) for pattern in rules.get("Include") or []]
+        self.exclude = [FilterRule(pattern) for pattern in rules.get("Exclude") or []]
+
+
+    @property
+    def isEmpty(self):
+        return not self.include and not self.exclude
+
+
+    def getRules(self):
+        return {"Include": [rule.pattern for rule in self.include],
+                "Exclude": [rule.pattern for rule in self.exclude]}
+
+
+    #   Excluded directories are pruned from the scan
+    def isExcluded(self, relPath, name, isDir=False):
+        relPath = relPath.replace(os.sep, "/")
+        return any(rule.matches(relPath, name, isDir) for rule in self.exclude)
+
+
+    def isIncluded(self, relPath, name, isDir=False):
+        if not self.include:
+            return True
+        relPath = relPath.replace(os.sep, "/")
+        return any(rule.matches(relPath, name, isDir) for rule in self.include)
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Append-only transfer journal written next to the export destination.
+#   Records completed files, completed byte ranges of large files and
+#   finished zip members so an interrupted export can be resumed.
+
+import os
+import json
+import threading
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+JOURNAL_EXT = ".exportjournal"
+
+#   Journal of a directory output, kept inside it
+JOURNAL_NAME = ".ExportToDir" + JOURNAL_EXT
+
+#   Large files record their progress every RANGE_INTERVAL bytes
+RANGE_INTERVAL = 256 * 1024 * 1024
+
+#   Record types
+RECORD_HEADER = "h"
+RECORD_FILE = "f"
+RECORD_RANGE = "r"
+RECORD_ZIP = "z"
+
+
+def getJournalPath(destPath, isDir=False):
+    #   Journal sits beside an output file and inside an output directory, so
+    #   it is never written to the parent of a directory (or a share root's server)
+    if isDir:
+        return os.path.join(destPath, JOURNAL_NAME)
+    return os.path.normpath(destPath) + JOURNAL_EXT
+
+
+def isJournalFile(path):
+    return path.endswith(JOURNAL_EXT)
+
+
+class TransferJournal(object):
+    def __init__(self, journalPath, header):
+        self.journalPath = journalPath
+        self.destRoot = os.path.dirname(journalPath)
+        self.header = dict(header, t=RECORD_HEADER)
+
+        self.completed = {}
+        self.ranges = {}
+        self.zipMembers = []
+
+        self._file = None
+        self._lock = threading.Lock()
+        self._lastRange = {}
+
+
+    #   Checks for an interrupted export of the same source and destination
+    @classmethod
+    def canResume(cls, journalPath, header):
+        journal = cls(journalPath, header)
+        return journal._load()
+
+
+    #   Opens the journal.  Existing records are kept if resume is True and
+    #   the journal belongs to the same export, otherwise it is started over.
+    def open(self, resume=True):
+        resumed = resume and self._load()
+        if not resumed:
+            self.completed = {}
+            self.ranges = {}
+            self.zipMembers = []
+
+        self._file = open(self.journalPath, "a" if resumed else "w", encoding="utf-8")
+        if not resumed:
+            self._write(self.header, sync=True)
+
+        logger.debug(f"Opened transfer journal {self.journalPath} (resumed: {resumed})")
+
+        return resumed
+
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+    #   Removes the journal after a successful export
+    def remove(self):
+        self.close()
+        if os.path.exists(self.journalPath):
+            os.remove(self.journalPath)
+
+
+    def _load(self):
+        if not os.path.isfile(self.journalPath):
+            return False
+
+        try:
+            with open(self.journalPath, "r", encoding="utf-8") as journalFile:
+                lines = journalFile.readlines()
+        except OSError:
+            return False
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                #   Last line may be cut off by the interruption
+                continue
+
+        if not records or records[0] != self.header:
+            return False
+
+        for record in records[1:]:
+            recordType = record.get("t")
+            if recordType == RECORD_FILE:
+                self.completed[record["p"]] = record
+                self.ranges.pop(record["p"], None)
+            elif recordType == RECORD_RANGE:
+                self.ranges[record["p"]] = record
+            elif recordType == RECORD_ZIP:
+                self.zipMembers.append(record)
+
+        return True
+
+
+    #   Drops zip members after the first count, used when the source of a
+    #   later member changed or the partial zip is shorter than journaled
+    def keepZipMembers(self, count):
+        if count == len(self.zipMembers):
+            return
+
+        self.zipMembers = self.zipMembers[:count]
+
+        #   Rewrites the journal through a temp file so it is never left half written
+        tempPath = self.journalPath + ".tmp"
+        with open(tempPath, "w", encoding="utf-8") as tempFile:
+            for record in [self.header] + self.zipMembers:
+                tempFile.write(json.dumps(record, separators=(",", ":")) + "\n")
+            tempFile.flush()
+            os.fsync(tempFile.fileno())
+
+        self.close()
+        os.replace(tempPath, self.journalPath)
+        self._file = open(self.journalPath, "a", encoding="utf-8")
+
+
+    def _write(self, record, sync=False):
+        with self._lock:
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+
+    def _getKey(self, dest):
+        return os.path.relpath(dest, self.destRoot)
+
+
+    #   Returns None if dest is already complete, else the byte offset to continue from
+    def getResumeOffset(self, src, dest):
+        key = self._getKey(dest)
+        record = self.completed.get(key) or self.ranges.get(key)
+        if not record:
+            return 0
+
+        try:
+            srcStat = os.stat(src)
+            destSize = os.path.getsize(dest)
+        except OSError:
+            return 0
+
+        if srcStat.st_size != record["s"] or srcStat.st_mtime != record["m"]:
+            return 0
+
+        if record["t"] == RECORD_FILE:
+            return None if destSize == record["s"] else 0
+
+        return record["o"] if destSize >= record["o"] else 0
+
+
+    #   Records bytes copied so far, only every RANGE_INTERVAL
+    def addRange(self, src, dest, offset):
+        key = self._getKey(dest)
+        if offset - self._lastRange.get(key, 0) < RANGE_INTERVAL:
+            return
+        self._lastRange[key] = offset
+
+        srcStat = os.stat(src)
+        self._write({"t": RECORD_RANGE, "p": key, "o": offset,
+                     "s": srcStat.st_size, "m": srcStat.st_mtime}, sync=True)
+
+
+    def fileDone(self, src, dest):
+        key = self._getKey(dest)
+        self._lastRange.pop(key, None)
+
+        srcStat = os.stat(src)
+        self._write({"t": RECORD_FILE, "p": key, "s": srcStat.st_size, "m": srcStat.st_mtime})
+
+
+    #   Records a finished zip member with the ZipInfo data needed to rebuild
+    #   the central directory, endOffset is where the next member starts
+    def zipMemberDone(self, entry, zinfo, endOffset):
+        self._write({"t": RECORD_ZIP,
+                     "p": entry.relPath,
+                     "s": entry.size,
+                     "m": entry.mtime,
+                     "name": zinfo.filename,
+                     "date": list(zinfo.date_time),
+                     "type": zinfo.compress_type,
+                     "flags": zinfo.flag_bits,
+                     "attr": zinfo.external_attr,
+                     "crc": zinfo.CRC,
+                     "csize": zinfo.compress_size,
+                     "fsize": zinfo.file_size,
+                     "offset": zinfo.header_offset,
+                     "cver": zinfo.create_version,
+                     "xver": zinfo.extract_version,
+                     "sys": zinfo.create_system,
+                     "e": endOffset})
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+
+#   Pre-flight check run before an export is queued.  Uses the scan manifest
+#   to estimate the bytes written (and the .zip size), and compares them with
+#   the free space of the destination and the temp dir.
+
+import os
+import sys
+import zlib
+import shutil
+import tempfile
+import logging
+
+from ExportToDir_Scanner import ManifestEntry, ScanManifest, scanDirectory
+from ExportToDir_Filter import ExportFilter
+from ExportToDir_Sequence import scanFrames
+from ExportToDir_Zip import CompressionPolicy, COMPRESS_STORE
+from ExportToDir_Engine import ZIP_MODE_TEMP, LINK_COPY, LINK_SYMLINK, LINK_REFLINK, formatSize, formatEta
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Files sampled for the zip estimate, spread over the export by size
+ZIP_SAMPLES = 32
+
+#   Local header, central directory record and data descriptor of a member
+ZIP_MEMBER_OVERHEAD = 30 + 46 + 16
+
+#   Space kept free on a volume:  a share of the required bytes, at least MIN_FREE_SPACE
+FREE_SPACE_MARGIN = 0.02
+MIN_FREE_SPACE = 64 * 1024 * 1024
+
+
+class ExportEstimate(object):
+    def __init__(self, case, zipFiles):
+        self.case = case
+        self.zipFiles = zipFiles
+        self.totalFiles = 0
+        self.totalBytes = 0
+        self.zipBytes = None
+
+        #   Files and directories left out by the filter rules, None if not filtered
+        self.filesExcluded = None
+        self.dirsPruned = 0
+
+        #   Source items that could not be read, the export would fail
+        self.unreadable = 0
+
+        #   Link mode if the export is expected to be linked instead of copied
+        self.linkMode = None
+
+        #   Bytes that have to fit on each path's volume
+        self.requirements = []
+
+        #   Source scan, handed to the export so it does not scan again
+        self.manifest = None
+
+
+    #   Bytes written to the output
+    @property
+    def outputBytes(self):
+        if self.linkMode:
+            return 0
+        return self.zipBytes if self.zipFiles else self.totalBytes
+
+
+    #   Dialogue text, throughput in bytes/s is used for the ETA if known
+    def getReport(self, throughput=None):
+        report = f"Estimate:  {self.totalFiles} files,  {formatSize(self.totalBytes)}"
+        if self.zipFiles:
+            report += f"  (zip ~{formatSize(self.zipBytes)})"
+        if self.linkMode:
+            report += f"  ({self.linkMode}, no space needed)"
+        if self.filesExcluded is not None:
+            report += f"  (filtered out {self.filesExcluded} files and {self.dirsPruned} directories)"
+        if self.unreadable:
+            report += f"  ({self.unreadable} unreadable items)"
+
+        if throughput:
+            report += f",  ETA ~{formatEta(self.totalBytes / throughput)}"
+
+        return report
+
+
+#   Returns the export manifest the same way the runner scans it.
+#   Filter rules only apply to tree exports.
+def getExportManifest(case, sourcePath, token=None, filterRules=None):
+    if isinstance(sourcePath, list):
+        return scanFrames(sourcePath, token=token)[0]
+
+    if case == 1:
+        stat = os.stat(sourcePath)
+        manifest = ScanManifest(os.path.dirname(sourcePath), recursive=False)
+        manifest.addEntry(ManifestEntry(sourcePath, os.path.basename(sourcePath), stat.st_size, stat.st_mtime,
+                                        False))
+        return manifest
+
+    exportFilter = ExportFilter(filterRules) if filterRules and case in [2, 4] else None
+
+    return scanDirectory(sourcePath, recursive=(case in [2, 4]), token=token, exportFilter=exportFilter)
+
+
+#   Estimates the zip size.  Members the policy stores keep their size, the
+#   others get the compression ratio of the first block of sampled files.
+def estimateZipSize(entries, policy, token=None):
+    zipBytes = 0
+    compressBytes = 0
+    compressed = []
+
+    for entry in entries:
+        zipBytes += ZIP_MEMBER_OVERHEAD + 2 * len(entry.relPath)
+        if entry.isDir:
+            continue
+
+        if policy.getMethod(entry.path) == COMPRESS_STORE:
+            zipBytes += entry.size
+        else:
+            compressBytes += entry.size
+            compressed.append(entry)
+
+    if not compressed:
+        return zipBytes
+
+    #   Samples spread over the files sorted by size so large files are included
+    compressed.sort(key=lambda entry: entry.size)
+    step = max(len(compressed) // ZIP_SAMPLES, 1)
+    samples = compressed[::step][-ZIP_SAMPLES:]
+
+    #   Each sample's ratio counts by the size of its file
+    sampleBytes = 0
+    sampleCompressed = 0.0
+    for entry in samples:
+        if token is not None:
+            token.check()
+
+        try:
+            with open(entry.path, "rb") as sampleFile:
+                block = sampleFile.read(policy.settings["ProbeSize"])
+        except OSError as e:
+            logger.debug(f"Cannot sample {entry.path}: {e}")
+            continue
+
+        if not block:
+            continue
+
+        #   Incompressible blocks are stored by the zip writer
+        if policy.getMethod(entry.path, block) == COMPRESS_STORE:
+            ratio = 1.0
+        else:
+            ratio = min(len(zlib.compress(block, 6)) / len(block), 1.0)
+        sampleCompressed += ratio * entry.size
+        sampleBytes += entry.size
+
+    ratio = sampleCompressed / sampleBytes if sampleBytes else 1.0
+
+    return zipBytes + int(compressBytes * ratio)
+
+
+#   True if the export can be linked with linkMode.  Hardlinks and reflinks
+#   need the output on the source volume, if linking fails later the files are
+#   copied and the estimate was too low.
+def isLinkedExport(linkMode, sourcePath, outputPath):
+    if not linkMode or linkMode == LINK_COPY:
+        return False
+    if linkMode == LINK_SYMLINK:
+        return True
+    #   Reflinks are only made on Linux
+    if linkMode == LINK_REFLINK and not sys.platform.startswith("linux"):
+        return False
+
+    if isinstance(sourcePath, list):
+        sourcePath = sourcePath[0] if sourcePath else ""
+    try:
+        return os.stat(sourcePath).st_dev == os.stat(getExistingDir(outputPath)).st_dev
+    except OSError:
+        return False
+
+
+#   Scans the source and returns the estimate with the space it needs.
+#   A zip built in the temp dir needs room there and at the destination.
+def estimateExport(case, sourcePath, outputPath, zipFiles=False, zipMode=None, compressionPolicy=None,
+                   token=None, linkMode=None, filterRules=None):
+    estimate = ExportEstimate(case, zipFiles)
+    if not zipFiles and isLinkedExport(linkMode, sourcePath, outputPath):
+        estimate.linkMode = linkMode
+    manifest = getExportManifest(case, sourcePath, token=token, filterRules=filterRules)
+    estimate.manifest = manifest
+    entries = manifest.entries
+    if manifest.exportFilter is not None and not manifest.exportFilter.isEmpty:
+        estimate.filesExcluded = manifest.filesExcluded
+        estimate.dirsPruned = manifest.dirsPruned
+    estimate.unreadable = len(manifest.errors)
+
+    for entry in entries:
+        if not entry.isDir:
+            estimate.totalFiles += 1
+            estimate.totalBytes += entry.size
+
+    if zipFiles:
+        estimate.zipBytes = estimateZipSize(entries, CompressionPolicy(compressionPolicy), token=token)
+        if zipMode == ZIP_MODE_TEMP:
+            estimate.requirements.append((tempfile.gettempdir(), estimate.zipBytes))
+
+    estimate.requirements.append((outputPath, estimate.outputBytes))
+
+    logger.debug(f"Pre-flight: {estimate.getReport()}")
+
+    return estimate
+
+
+#   One estimate for several exports, used for batches
+def combineEstimates(estimates):
+    combined = ExportEstimate(None, any(estimate.zipFiles for estimate in estimates))
+    for estimate in estimates:
+        combined.totalFiles += estimate.totalFiles
+        combined.totalBytes += estimate.totalBytes
+        combined.requirements.extend(estimate.requirements)
+        combined.unreadable += estimate.unreadable
+        if estimate.filesExcluded is not None:
+            combined.filesExcluded = (combined.filesExcluded or 0) + estimate.filesExcluded
+            combined.dirsPruned += estimate.dirsPruned
+
+    if combined.zipFiles:
+        combined.zipBytes = sum(estimate.outputBytes for estimate in estimates)
+
+    return combined
+
+
+#   Nearest existing directory of a path that may not exist yet
+def getExistingDir(path):
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+
+    return path
+
+
+#   Adds up the requirements of the estimates per volume and returns
+#   (path, required, free) for each volume without enough free space
+def checkFreeSpace(estimates):
+    volumes = {}
+    for estimate in estimates:
+        for path, numBytes in estimate.requirements:
+            existingDir = getExistingDir(path)
+            try:
+                volumeId = os.stat(existingDir).st_dev
+            except OSError:
+                volumeId = existingDir
+
+            volume = volumes.setdefault(volumeId, [existingDir, 0])
+            volume[1] += numBytes
+
+    problems = []
+    for existingDir, required in volumes.values():
+        try:
+            free = shutil.disk_usage(existingDir).free
+        except OSError as e:
+            logger.warning(f"ERROR: Cannot read free space of {existingDir}: {e}")
+            continue
+
+        if required + max(required * FREE_SPACE_MARGIN, MIN_FREE_SPACE) > free:
+            problems.append((existingDir, required, free))
+
+    return problems
+
+
+def getSpaceReport(problems):
+    return "\n".join(f"{path}:  needs {formatSize(required)},  {formatSize(free)} free"
+                     for path, required, free in problems)
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+
+#   Export job queue.  Jobs are persisted to a JSON file per user and machine
+#   and started by a scheduler that limits how many jobs write to the same
+#   destination volume at once.  Higher priority jobs are started first.
+
+import os
+import re
+import json
+import atexit
+import ntpath
+import uuid
+import socket
+import getpass
+import time
+import threading
+import logging
+
+from ExportToDir_Engine import ControlToken
+
+
+logger = logging.getLogger(__name__)
+
+
+QUEUE_FILENAME = "ExportToDir_Queue_{owner}.json"
+
+JOB_PENDING = "Pending"
+JOB_RUNNING = "Running"
+JOB_COMPLETE = "Complete"
+JOB_FAILED = "Failed"
+JOB_CANCELLED = "Cancelled"
+JOB_PAUSED = "Paused"
+#   Running when Prism closed, started again only when the user confirms
+JOB_INTERRUPTED = "Interrupted"
+FINISHED_STATES = [JOB_COMPLETE, JOB_FAILED, JOB_CANCELLED]
+
+PRIORITIES = ["Low", "Normal", "High"]
+DEFAULT_PRIORITY = "Normal"
+
+#   Number of finished jobs kept in the queue file
+MAX_FINISHED_JOBS = 50
+
+#   Seconds Prism waits at exit for interrupted jobs to close their files
+SHUTDOWN_TIMEOUT = 5.0
+
+
+#   "user@host" of this session, jobs are only run by their owner
+def getJobOwner():
+    try:
+        user = getpass.getuser()
+    except (OSError, KeyError, ImportError):
+        user = "unknown"
+
+    return f"{user}@{socket.gethostname()}"
+
+
+def getQueueFilename(owner=None):
+    owner = re.sub(r"[^\w.@-]", "_", owner or getJobOwner())
+    return QUEUE_FILENAME.format(owner=owner)
+
+
+def getDestinationKey(path):
+    #   Jobs writing to the same drive, share or mount share a concurrency limit
+    drive = ntpath.splitdrive(path)[0]
+    if drive:
+        return drive.lower()
+
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+
+    return path
+
+
+class ExportJob(object):
+    def __init__(self, name, params, priority=DEFAULT_PRIORITY, jobId=None, owner=None):
+        self.jobId = jobId or uuid.uuid4().hex
+        self.name = name
+        self.owner = owner or getJobOwner()
+        #   Arguments for the export worker (case, sourcePath, outputPath, options)
+        self.params = params
+        self.priority = priority if priority in PRIORITIES else DEFAULT_PRIORITY
+        self.state = JOB_PENDING
+        self.status = "Queued..."
+        self.progress = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.resumed = False
+
+        #   Cancel and pause of the running export, not saved
+        self.token = ControlToken()
+
+        #   Pre-flight scan of the source, not saved
+        self.manifest = None
+
+
+    #   Progress callbacks from the export worker
+    def setProgress(self, progress):
+        self.progress = progress
+
+
+    def setStatus(self, status):
+        self.status = status
+
+
+    #   State shown in the queue panel
+    @property
+    def displayState(self):
+        if self.state == JOB_RUNNING and self.token.isPaused():
+            return JOB_PAUSED
+        return self.state
+
+
+    @property
+    def destination(self):
+        return self.params["outputPath"]
+
+
+    def getSortKey(self):
+        #   Highest priority first, then oldest first
+        return (-PRIORITIES.index(self.priority), self.created)
+
+
+    def toDict(self):
+        return {"jobId": self.jobId,
+                "name": self.name,
+                "owner": self.owner,
+                "params": self.params,
+                "priority": self.priority,
+                "state": self.state,
+                "status": self.status,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished}
+
+
+    @classmethod
+    def fromDict(cls, data):
+        job = cls(data["name"], data["params"], data.get("priority", DEFAULT_PRIORITY), data["jobId"])
+        #   Jobs saved without an owner are never started
+        job.owner = data.get("owner")
+        job.state = data.get("state", JOB_PENDING)
+        job.status = data.get("status", "")
+        job.created = data.get("created", job.created)
+        job.started = data.get("started")
+        job.finished = data.get("finished")
+
+        #   Jobs that were running when Prism closed wait for resumeInterrupted
+        if job.state == JOB_RUNNING:
+            job.state = JOB_INTERRUPTED
+            job.status = "Interrupted when Prism closed"
+
+        return job
+
+
+class JobQueue(object):
+    #   runJob(job) is called in a worker thread and returns True on success.
+    #   Only jobs of owner ("user@host", this session by default) are started.
+    def __init__(self, queuePath, runJob, destinationLimit=1, owner=None):
+        self.queuePath = queuePath
+        self.runJob = runJob
+        self.destinationLimit = destinationLimit
+        self.owner = owner or getJobOwner()
+
+        self.jobs = []
+        self.threads = {}
+        self._lock = threading.RLock()
+
+        #   Ids of all jobs this session loaded or added, other jobs in the
+        #   file were added by another session and are kept when saving
+        self._knownIds = set()
+
+        #   Set by shutdown, no jobs are started after it
+        self._closing = False
+
+        #   Interrupts running jobs if the queue is not shut down before exit
+        atexit.register(self.shutdown)
+
+
+    def _readJobData(self):
+        if not os.path.isfile(self.queuePath):
+            return []
+
+        with open(self.queuePath, "r") as queueFile:
+            return json.load(queueFile)
+
+
+    def load(self):
+        try:
+            jobs = [ExportJob.fromDict(data) for data in self._readJobData()]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"ERROR: Unable to load export queue: {e}")
+            jobs = []
+
+        with self._lock:
+            self.jobs = jobs
+            self._knownIds = {job.jobId for job in jobs}
+
+        logger.debug(f"Loaded {len(self.jobs)} jobs from the export queue")
+
+
+    #   Writes the queue through a temp file so a crash never leaves it half
+    #   written.  Jobs another session added to the file since are kept.
+    def save(self):
+        with self._lock:
+            jobData = [job.toDict() for job in self.jobs]
+            knownIds = set(self._knownIds)
+
+        try:
+            jobData.extend(data for data in self._readJobData() if data.get("jobId") not in knownIds)
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"ERROR: Unable to merge export queue: {e}")
+
+        tempPath = f"{self.queuePath}.{os.getpid()}.tmp"
+        try:
+            with open(tempPath, "w") as queueFile:
+                json.dump(jobData, queueFile, indent=4)
+            os.replace(tempPath, self.queuePath)
+        except OSError as e:
+            logger.warning(f"ERROR: Unable to save export queue: {e}")
+
+
+    def getJobs(self):
+        with self._lock:
+            return list(self.jobs)
+
+
+    def getJob(self, jobId):
+        with self._lock:
+            for job in self.jobs:
+                if job.jobId == jobId:
+                    return job
+
+        return None
+
+
+    def addJob(self, job):
+        self.addJobs([job])
+
+
+    #   Adds several jobs with a single save, used by batch exports
+    def addJobs(self, jobs):
+        with self._lock:
+            self.jobs.extend(jobs)
+            self._knownIds.update(job.jobId for job in jobs)
+
+        for job in jobs:
+            logger.debug(f"Queued export job {job.name} ({job.priority})")
+        self.save()
+        self.schedule()
+
+
+    #   Running jobs cannot be removed
+    def removeJob(self, jobId):
+        with self._lock:
+            job = self.getJob(jobId)
+            if job is None or job.state == JOB_RUNNING:
+                return False
+            self.jobs.remove(job)
+
+        self.save()
+        return True
+
+
+    #   Pending jobs are cancelled at once, running jobs stop at the next check
+    def cancelJob(self, jobId):
+        with self._lock:
+            job = self.getJob(jobId)
+            if job is None or job.state in FINISHED_STATES:
+                return
+
+            job.token.cancel()
+            if job.state in [JOB_PENDING, JOB_INTERRUPTED]:
+                job.state = JOB_CANCELLED
+                job.status = "Cancelled."
+                job.finished = time.time()
+            else:
+                job.status = "Cancelling..."
+
+        self.save()
+
+
+    def pauseJob(self, jobId):
+        job = self.getJob(jobId)
+        if job is not None and job.state == JOB_RUNNING:
+            job.token.pause()
+
+
+    def resumeJob(self, jobId):
+        job = self.getJob(jobId)
+        if job is not None:
+            job.token.resume()
+
+
+    #   Own jobs interrupted when Prism closed
+    def getInterruptedJobs(self):
+        with self._lock:
+            return [job for job in self.jobs if job.state == JOB_INTERRUPTED and job.owner == self.owner]
+
+
+    #   Starts interrupted jobs again, continuing their journaled exports
+    def resumeInterrupted(self, jobIds):
+        with self._lock:
+            for job in self.getInterruptedJobs():
+                if job.jobId in jobIds:
+                    job.state = JOB_PENDING
+                    job.status = "Queued (interrupted)..."
+                    job.resumed = True
+
+        self.save()
+        self.schedule()
+
+
+    def clearFinished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.state not in FINISHED_STATES]
+
+        self.save()
+
+
+    def setPriority(self, jobId, priority):
+        job = self.getJob(jobId)
+        if job is None or priority not in PRIORITIES:
+            return
+
+        job.priority = priority
+        self.save()
+        self.schedule()
+
+
+    def setDestinationLimit(self, limit):
+        self.destinationLimit = max(int(limit), 1)
+        self.schedule()
+
+
+    #   Stops running jobs when Prism closes.  They are interrupted, not
+    #   cancelled, so they stay Running in the queue file and are offered
+    #   for resume the next time.
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+
+            threads = list(self.threads.values())
+            for job in self.jobs:
+                if job.state == JOB_RUNNING:
+                    job.token.interrupt()
+
+        if threads:
+            logger.info(f"Interrupting {len(threads)} running export jobs")
+
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+        self.save()
+
+
+    #   Starts pending jobs while their destination has a free slot
+    def schedule(self):
+        started = False
+
+        with self._lock:
+            if self._closing:
+                return
+            running = {}
+            for job in self.jobs:
+                if job.state == JOB_RUNNING:
+                    key = getDestinationKey(job.destination)
+                    running[key] = running.get(key, 0) + 1
+
+            pending = sorted((job for job in self.jobs if job.state == JOB_PENDING and job.owner == self.owner),
+                             key=lambda job: job.getSortKey())
+
+            for job in pending:
+                key = getDestinationKey(job.destination)
+                if running.get(key, 0) >= self.destinationLimit:
+                    continue
+
+                running[key] = running.get(key, 0) + 1
+                job.state = JOB_RUNNING
+                job.status = "Starting..."
+                job.started = time.time()
+
+                #   Daemon threads never keep Prism running after it closed
+                thread = threading.Thread(target=self._runJob, args=(job,), daemon=True)
+                self.threads[job.jobId] = thread
+                thread.start()
+                started = True
+
+        if started:
+            self.save()
+
+
+    def _runJob(self, job):
+        logger.info(f"Starting export job {job.name}")
+
+        try:
+            success = self.runJob(job)
+        except Exception as e:
+            logger.warning(f"ERROR: Export job {job.name} failed: {e}")
+            job.status = f"ERROR: {e}"
+            success = False
+
+        with self._lock:
+            #   Left Running, loaded as Interrupted by the next session
+            if job.token.isInterrupted():
+                self.threads.pop(job.jobId, None)
+                return
+
+            if job.token.isCancelled():
+                job.state = JOB_CANCELLED
+            else:
+                job.state = JOB_COMPLETE if success else JOB_FAILED
+            job.finished = time.time()
+            self.threads.pop(job.jobId, None)
+            self._trimFinished()
+
+        self.save()
+        self.schedule()
+
+
+    def _trimFinished(self):
+        finished = [job for job in self.jobs if job.state in FINISHED_STATES]
+        for job in sorted(finished, key=lambda job: job.finished or 0)[:-MAX_FINISHED_JOBS]:
+            self.jobs.remove(job)
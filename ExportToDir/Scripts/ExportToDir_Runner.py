@@ -0,0 +1,798 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Export runner shared by the plugin and the command line
+
+import os
+import shutil
+import zipfile
+import tempfile
+import time
+import logging
+
+from ExportToDir_Scanner import ManifestEntry, scanDirectory
+from ExportToDir_Sync import buildSyncPlan, deleteOrphans
+from ExportToDir_Filter import ExportFilter
+from ExportToDir_Sequence import scanFrames, getFrameNames, getFrameNumbers, formatFrameRanges, getSequenceLabel
+from ExportToDir_Journal import TransferJournal, getJournalPath
+from ExportToDir_Telemetry import (ExportTelemetry, writeRecord, PHASE_SCAN, PHASE_COMPARE, PHASE_COPY,
+                                   PHASE_ZIP, PHASE_VERIFY, PHASE_CLEANUP)
+from ExportToDir_Verify import (getVerifySettings, getHashFactory, getManifestPath, verifyFiles, verifyZip,
+                                writeManifest)
+from ExportToDir_Zip import ParallelZipWriter, CompressionPolicy, restoreMembers
+from ExportToDir_Engine import (CopyEngine, TransferProgress, ControlToken, ZIP_MODE_STREAM, LINK_COPY,
+                                getEngineSettings, getPartialPath, formatThroughput, formatSize)
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Seconds a pre-flight scan is reused by the export, a job that waited
+#   longer in the queue scans again
+PREFLIGHT_MAX_AGE = 60.0
+
+#   End states passed to onState
+STATE_COMPLETE = "Complete"
+STATE_ERROR = "Error"
+STATE_CANCELLED = "Cancelled"
+
+
+#   Runs one export (cases 1-5).  Qt-free, so it is shared by the plugin's
+#   CopyThread and the command line runner.  Progress, status, end state and
+#   errors are reported through the on* callbacks.
+class ExportRunner(object):
+    def __init__(self, case, sourcePath, outputPath, zipFiles=False, engineSettings=None, workers=1,
+                 compressionPolicy=None, syncOptions=None, resume=False, token=None, telemetryPath=None,
+                 verifySettings=None, frameNaming=None, filterRules=None, manifest=None):
+        self.case = case
+        self.sourcePath = sourcePath
+        self.outputPath = outputPath
+
+        #   Cases 3 and 5 can be given the frame list of an image sequence
+        #   instead of its directory, then only the listed frames are exported
+        self.frameList = sourcePath if isinstance(sourcePath, list) else None
+        self.sourceLabel = getSequenceLabel(self.frameList) if self.frameList else str(sourcePath)
+
+        #   Optional {"Name": "client_sh010.####.exr", "Offset": 0} renaming the
+        #   frames of the frame list, used for copies and zip members
+        self.frameNaming = frameNaming
+
+        #   Optional {"Include": [...], "Exclude": [...]} patterns of tree exports (cases 2 and 4)
+        self.exportFilter = None
+        if filterRules and case in [2, 4]:
+            self.exportFilter = ExportFilter(filterRules)
+        self.zipFiles = zipFiles
+        self.copyEngine = CopyEngine.fromSettings(engineSettings)
+        self.zipMode = getEngineSettings(engineSettings)["ZipMode"]
+        self.zipWorkers = getEngineSettings(engineSettings)["ZipWorkers"]
+        self.workers = workers
+        self.compressionPolicy = CompressionPolicy(compressionPolicy)
+        self.syncOptions = syncOptions
+        self.resume = resume
+        self.journal = None
+        self.failed = False
+        self.manifest = None
+        #   Optional ScanManifest of the pre-flight check, used instead of the first scan
+        self.preflightManifest = manifest
+        self.exportReports = []
+        self.tempDir = None
+        self.zipWritePath = None
+
+        #   Output directories made by this export, removed if it is cancelled
+        self.createdDirs = []
+        self.progressLabel = "Copying..."
+
+        #   Cancel and pause, checked by the copy engine, scanner and zip writer
+        self.token = token or ControlToken()
+        self.copyEngine.token = self.token
+
+        #   Sync keeps source mtimes so unchanged files are detected next time
+        if self.syncOptions:
+            self.copyEngine.preserveTimes = True
+
+        #   Zips are always written, a staged zip must not be linked into its temp dir
+        if self.zipFiles:
+            self.copyEngine.linkMode = LINK_COPY
+
+        #   Verify hashes the source during the copy and reads back the output
+        self.verifySettings = getVerifySettings(verifySettings)
+        self.hashFactory = getHashFactory(self.verifySettings["Algorithm"])
+        self.copyEngine.hashFactory = self.hashFactory
+
+        #   Phase timings and counters, written to telemetryPath when done
+        self.telemetryPath = telemetryPath
+        self.telemetry = ExportTelemetry({"Case": case,
+                                          "Source": self.sourceLabel,
+                                          "Dest": outputPath,
+                                          "Zip": zipFiles,
+                                          "Sync": bool(syncOptions),
+                                          "Engine": self.copyEngine.resolveEngine(),
+                                          "LinkMode": self.copyEngine.linkMode,
+                                          "Workers": workers,
+                                          "ZipWorkers": self.zipWorkers,
+                                          "Verify": self.verifySettings["Algorithm"]})
+        self.lastError = None
+
+        #   Reporting callbacks, replaced by the caller
+        self.onProgress = lambda percent: None
+        self.onStatus = lambda text: None
+        self.onState = lambda state: None
+        self.onError = lambda message: None
+   
+    
+    def run(self):
+        logger.info("Executing Export")
+        try:
+            originalPath = self.sourcePath
+            if self.frameList:
+                originalPath = os.path.dirname(self.frameList[0])
+            self.copyEngine.resetStats()
+            self.startTime = time.perf_counter()
+            self.openJournal()
+
+            #   Single File
+            if self.case == 1:
+                if self.zipFiles:
+                    #   Changes extension to .zip if needed
+                    filename = os.path.basename(originalPath)
+                    zipFilename = os.path.splitext(filename)[0] + ".zip"
+
+                    #   Zips file to output or to tempDir made in the method
+                    zipPath = self.executeZip(originalPath, zipFilename)
+                    #   Copies to the file with progress if staged
+                    self.deliverZip(zipPath)
+
+                else:
+                    outputPathWithExt = self.outputPath
+                    #   Copies to the file with progress, copyFile reports the end state
+                    self.onStatus("Copying...")
+                    self.copyFile(originalPath, outputPathWithExt)
+
+            #   Complete Directory Tree
+            elif self.case == 2:
+                self.copyEntireDirectory(originalPath, self.outputPath)
+
+            #   Single Directory without Zip
+            elif self.case == 3:    
+                self.copyDirectory(originalPath, self.outputPath)
+
+            #   Complete Directory Tree with Zip
+            elif self.case == 4:
+                #   Changes extension to .zip
+                zipFilename = f"{os.path.basename(self.outputPath)}.zip"
+                #   Zips file to output or to tempDir made in the method
+                zipPath = self.executeZip(originalPath, zipFilename)
+                #   Copies to the file with progress if staged
+                self.deliverZip(zipPath)
+
+            #   Single Directory with Zip
+            elif self.case == 5:
+                #   Changes extension to .zip
+                zipFilename = f"{os.path.basename(self.outputPath)}.zip"
+                #   Zips file to output or to tempDir made in the method
+                zipPath = self.executeZip(originalPath, zipFilename)
+                #   Copies to the file with progress if staged
+                self.deliverZip(zipPath)
+
+            else:
+                return
+
+        except Exception as e:
+            self.reportError(e, "Export Failed")
+
+        finally:
+            with self.telemetry.phase(PHASE_CLEANUP):
+                self.cleanup()
+            self.writeTelemetry()
+
+
+    #   Marks the export as failed.  A cancelled export is not reported as an error.
+    def reportError(self, e, message):
+        self.failed = True
+        if self.token.isCancelled():
+            return
+
+        self.lastError = str(e)
+        self.onStatus("ERROR")
+        self.onProgress(100)
+        self.onState(STATE_ERROR)
+        self.onError(str(e))
+        logger.warning(f"ERROR: {message}:  {e}")
+
+
+    #   Removes tempDir.  A cancelled export also removes its partial zip,
+    #   journal and the files and directories it created.  Files that were
+    #   already there or skipped by sync are kept.
+    def cleanup(self):
+        if self.token.isInterrupted():
+            #   Keeps the journal, see closeJournal
+            self.failed = True
+            self.onStatus("Interrupted.")
+            self.onState(STATE_CANCELLED)
+            logger.info(f"Export interrupted, it can be resumed: {self.outputPath}")
+
+        elif self.token.isCancelled():
+            if self.zipWritePath and os.path.exists(self.zipWritePath):
+                os.remove(self.zipWritePath)
+
+            #   A journal inside the output directory is removed before the directory
+            if self.journal:
+                self.journal.remove()
+                self.journal = None
+
+            self.removeCreatedOutput()
+
+            self.onStatus("Cancelled.")
+            self.onState(STATE_CANCELLED)
+            logger.info(f"Export cancelled: {self.outputPath}")
+
+        if self.tempDir:
+            shutil.rmtree(self.tempDir, ignore_errors=True)
+            self.tempDir = None
+
+        self.closeJournal()
+
+
+    def removeCreatedOutput(self):
+        for path in self.copyEngine.createdFiles:
+            try:
+                if os.path.lexists(path):
+                    os.remove(path)
+            except OSError as e:
+                logger.warning(f"ERROR: Cannot remove {path}: {e}")
+
+        #   Deepest first, directories holding other files are kept
+        for dirPath in reversed(self.createdDirs):
+            try:
+                os.rmdir(dirPath)
+            except OSError:
+                pass
+
+        logger.debug(f"Removed {len(self.copyEngine.createdFiles)} files and "
+                     f"{len(self.createdDirs)} directories of the cancelled export")
+        self.createdDirs = []
+
+
+    #   Appends the telemetry record of this export.  Telemetry never fails an export.
+    def writeTelemetry(self):
+        if not self.telemetryPath:
+            return
+
+        if self.token.isCancelled():
+            state = STATE_CANCELLED
+        elif self.failed:
+            state = STATE_ERROR
+        else:
+            state = STATE_COMPLETE
+
+        if self.manifest is not None:
+            files, numBytes = self.manifest.totalFiles, self.manifest.totalBytes
+        else:
+            try:
+                files, numBytes = 1, os.path.getsize(self.sourcePath)
+            except (OSError, TypeError):
+                files, numBytes = 0, 0
+
+        self.telemetry.addCount("BytesWritten", self.copyEngine.bytesCopied)
+        if self.copyEngine.filesLinked:
+            self.telemetry.addCount("FilesLinked", self.copyEngine.filesLinked)
+            self.telemetry.addCount("BytesLinked", self.copyEngine.bytesLinked)
+        if self.hashFactory:
+            self.telemetry.addCount("HashSeconds", round(self.copyEngine.hashTime, 3))
+        record = self.telemetry.finish(state, files, numBytes, error=self.lastError)
+        writeRecord(self.telemetryPath, record)
+
+
+    #   Journals the export so an interrupted run can be resumed.  Zips are
+    #   only journaled when streamed, a Temp Dir zip is always started over.
+    def openJournal(self):
+        if self.zipFiles and self.zipMode != ZIP_MODE_STREAM:
+            return
+
+        header = {"source": self.sourceLabel,
+                  "dest": self.outputPath,
+                  "case": self.case,
+                  "zip": self.zipFiles}
+        if self.frameNaming:
+            header["naming"] = self.frameNaming
+        if self.exportFilter and not self.exportFilter.isEmpty:
+            header["filter"] = self.exportFilter.getRules()
+
+        #   The journal only makes the export resumable, it never fails the export
+        isDirOutput = self.case in [2, 3]
+        journal = TransferJournal(getJournalPath(self.outputPath, isDirOutput), header)
+        try:
+            if isDirOutput:
+                self.makeDir(self.outputPath)
+            resumed = journal.open(resume=self.resume)
+        except OSError as e:
+            journal.close()
+            logger.warning(f"ERROR: Unable to open transfer journal, the export cannot be resumed: {e}")
+            return
+
+        self.journal = journal
+        if resumed:
+            self.telemetry.addCount("Resumed")
+            logger.info(f"Resuming interrupted export to {self.outputPath}")
+
+
+    #   Keeps the journal of a failed export, removes it when complete
+    def closeJournal(self):
+        if not self.journal:
+            return
+
+        if self.failed:
+            self.journal.close()
+        else:
+            self.journal.remove()
+
+        self.journal = None
+
+
+    #   Copies a zip staged in tempDir to the output, streamed zips are already in place
+    def deliverZip(self, zipPath):
+        #   Failure was already reported by executeZip
+        if zipPath is None:
+            return
+
+        if zipPath == self.outputPath:
+            self.verifyZipOutput(zipPath)
+            self.onProgress(100)
+            self.onStatus(self.getCompleteStatus(os.path.getsize(zipPath)))
+            self.onState(STATE_COMPLETE)
+
+        else:
+            self.onStatus("Copying...")
+            self.copyFile(zipPath, self.outputPath)
+
+
+    def copyFile(self, src, dest, showProg=True):
+        logger.debug(f"Copying: {src}")
+
+        try:
+            if showProg:
+                self.onProgress(0)
+                self.onStatus("Copying...")
+
+            if os.path.isdir(src):
+                # If it's a directory, use copy2 to preserve metadata
+                shutil.copy2(src, dest)
+            elif os.path.isfile(src):
+                # If it's a file, copy with the selected copy engine
+                # (journaled copies can continue a partially copied file)
+                if showProg or self.journal:
+                    self.copyFileList([(src, dest, os.path.getsize(src))])
+                else:
+                    self.copyEngine.copyFile(src, dest)
+            else:
+                logger.warning(f"Skipping unsupported item: {src}")
+
+            if showProg:
+                self.verifyOutput([(src, dest, os.path.getsize(src))])
+                self.onProgress(100)
+                self.onStatus(self.getCompleteStatus())
+                self.onState(STATE_COMPLETE)
+
+            logger.debug(f"SUCCESS: Copied {src}")
+
+        except Exception as e:
+            self.reportError(e, "Failed to copy")
+
+
+    #   Copies (src, dest, size) items with the worker pool and reports
+    #   aggregated progress in files and bytes
+    def copyFileList(self, fileList):
+        totalBytes = sum(size for _, _, size in fileList)
+        progress = TransferProgress(len(fileList), totalBytes, callback=self.emitTransferProgress, token=self.token)
+        self.progressLabel = "Copying..."
+
+        logger.debug(f"Copying {len(fileList)} files using {self.workers} workers")
+        with self.telemetry.phase(PHASE_COPY):
+            self.copyEngine.copyFileList(fileList, workers=self.workers, progress=progress, journal=self.journal)
+
+
+    #   Reads back the written (src, dest, size) files, compares them with the
+    #   source hashes taken during the copy and writes the checksum sidecar.
+    #   Raises if a file does not match.
+    def verifyOutput(self, fileList):
+        if not self.hashFactory:
+            return
+
+        self.onStatus("Verifying...")
+        with self.telemetry.phase(PHASE_VERIFY):
+            result = verifyFiles(fileList, self.hashFactory, self.verifySettings["Algorithm"],
+                                 sourceHashes=self.copyEngine.sourceHashes, workers=self.workers, token=self.token)
+        self.finishVerify(result)
+
+
+    #   Streamed zips are checked by the CRC of each member
+    def verifyZipOutput(self, zipPath):
+        if not self.hashFactory:
+            return
+
+        self.onStatus("Verifying...")
+        with self.telemetry.phase(PHASE_VERIFY):
+            result = verifyZip(zipPath, self.hashFactory, self.verifySettings["Algorithm"], token=self.token)
+        self.finishVerify(result)
+
+
+    def finishVerify(self, result):
+        report = result.getReport()
+        self.exportReports.append(report)
+        self.telemetry.addCount("BytesVerified", result.bytes)
+        logger.info(report)
+
+        if not result.passed:
+            for path in result.badOutputs:
+                os.remove(path)
+            raise IOError(f"{report}:\n" + "\n".join(result.mismatches[:10]))
+
+        writeManifest(getManifestPath(self.outputPath, self.verifySettings), result.hashes, self.verifySettings)
+
+
+    #   Returns the files to copy.  In sync mode only new or changed files
+    #   are returned and orphans are deleted if selected.
+    def getSyncEntries(self, manifest, dest):
+        if not self.syncOptions:
+            return manifest.files
+
+        self.onStatus("Comparing...")
+        with self.telemetry.phase(PHASE_COMPARE):
+            plan = buildSyncPlan(manifest, dest, useHash=self.syncOptions["Hash"], token=self.token)
+
+            if self.syncOptions["DeleteOrphans"]:
+                deleteOrphans(plan)
+
+        self.telemetry.addCount("FilesSkipped", plan.filesSkipped)
+        self.telemetry.addCount("BytesSkipped", plan.bytesSkipped)
+        self.telemetry.addCount("OrphansDeleted", plan.filesDeleted)
+
+        syncReport = plan.getReport()
+        self.exportReports.append(syncReport)
+        logger.info(syncReport)
+
+        return plan.toCopy
+
+
+    #   Progress callback used by TransferProgress (called from worker threads).
+    #   TransferProgress already limits the rate, so every call is emitted.
+    def emitTransferProgress(self, progress):
+        self.onProgress(progress.getPercent())
+        self.onStatus(f"{self.progressLabel}    {progress.getStatus()}")
+
+
+    #   Status text with achieved throughput.  If numBytes is given the
+    #   throughput is measured over the whole export instead of the copies.
+    def getCompleteStatus(self, numBytes=None):
+        if numBytes is None:
+            numBytes = self.copyEngine.bytesCopied
+            throughput = self.copyEngine.getThroughput()
+        else:
+            throughput = formatThroughput(numBytes, time.perf_counter() - self.startTime)
+
+        logger.info(f"Export wrote {numBytes} bytes at {throughput}")
+
+        if self.copyEngine.filesLinked:
+            linkReport = (f"Linked {self.copyEngine.filesLinked} files "
+                          f"({formatSize(self.copyEngine.bytesLinked)}) with {self.copyEngine.linkMode}")
+            if linkReport not in self.exportReports:
+                self.exportReports.append(linkReport)
+
+        if self.exportReports:
+            return f"Complete.    ({throughput})    {'    '.join(self.exportReports)}"
+
+        return f"Complete.    ({throughput})"
+
+
+    def dirFileAmount(self, dirPath, mode="shallow"):
+        #   Gets number of files in directory from the scan manifest
+        #   "shallow" only counts this dir, "deep" includes child dirs
+        manifest = self.getManifest(dirPath, recursive=(mode == "deep"))
+        return manifest.totalFiles
+
+
+    #   Returns the scan manifest for dirPath, scanning only if not already scanned.
+    #   Errors (and cancel) are handled by the calling copy or zip method.
+    def getManifest(self, dirPath, recursive=True):
+        if self.manifest is None or not self.manifest.matches(dirPath, recursive):
+            self.onStatus("Scanning...")
+            with self.telemetry.phase(PHASE_SCAN):
+                if self.frameList:
+                    self.manifest = self.getFrameManifest()
+                else:
+                    if self.isPreflightValid(dirPath, recursive):
+                        logger.debug("Using the pre-flight scan")
+                        self.manifest = self.preflightManifest
+                    else:
+                        self.manifest = scanDirectory(dirPath, recursive=recursive, token=self.token,
+                                                      exportFilter=self.exportFilter)
+                    if self.exportFilter and not self.exportFilter.isEmpty:
+                        self.reportFilter(self.manifest)
+                    self.reportScan(self.manifest)
+                self.preflightManifest = None
+
+        return self.manifest
+
+
+    def isPreflightValid(self, dirPath, recursive):
+        manifest = self.preflightManifest
+        return (manifest is not None and manifest.matches(dirPath, recursive)
+                and time.monotonic() - manifest.scanTime < PREFLIGHT_MAX_AGE)
+
+
+    def reportFilter(self, manifest):
+        self.telemetry.addCount("FilesExcluded", manifest.filesExcluded)
+        self.telemetry.addCount("DirsPruned", manifest.dirsPruned)
+
+        filterReport = manifest.getFilterReport()
+        self.exportReports.append(filterReport)
+        logger.info(filterReport)
+
+
+    def reportScan(self, manifest):
+        if manifest.linksSkipped:
+            self.telemetry.addCount("LinksSkipped", manifest.linksSkipped)
+            self.exportReports.append(f"Skipped {manifest.linksSkipped} symlinked directories or broken links")
+
+        if manifest.errors:
+            self.telemetry.addCount("UnreadableItems", len(manifest.errors))
+
+
+    #   Fails an export whose source could not be read completely.  Copies
+    #   call it after copying the readable files, so a rerun only adds the rest.
+    def checkScanErrors(self, manifest):
+        if manifest.errors:
+            raise IOError(f"Export incomplete, {manifest.getErrorReport()}")
+
+
+    #   Manifest of the frame list, frames missing on disk are skipped and reported.
+    #   Renamed frames get their export name as relPath.
+    def getFrameManifest(self):
+        names = None
+        if self.frameNaming:
+            names = getFrameNames(self.frameList, self.frameNaming["Name"], self.frameNaming.get("Offset", 0))
+
+        manifest, missing = scanFrames(self.frameList, token=self.token, names=names)
+
+        if missing:
+            self.telemetry.addCount("MissingFrames", len(missing))
+            missingFrames = getFrameNumbers(missing)
+            if missingFrames:
+                self.exportReports.append(f"Missing frames: {formatFrameRanges(missingFrames)}")
+            else:
+                self.exportReports.append(f"Missing {len(missing)} files")
+
+        return manifest
+        
+
+    def copyDirectory(self, src, dest):
+        logger.debug("Copying Directory")
+        try:
+            #   Gets all files in dir (not in sub dirs)
+            manifest = self.getManifest(src, recursive=False)
+            self.onStatus("Copying...")
+            self.makeDir(dest)
+
+            fileEntries = self.getSyncEntries(manifest, dest)
+            fileList = [(entry.path, os.path.join(dest, entry.relPath), entry.size)
+                        for entry in fileEntries]
+
+            #   Copies all files in dir with progress
+            self.copyFileList(fileList)
+            self.verifyOutput([(entry.path, os.path.join(dest, entry.relPath), entry.size)
+                               for entry in manifest.files])
+            self.checkScanErrors(manifest)
+
+            self.onStatus(self.getCompleteStatus())
+            self.onProgress(100)
+            self.onState(STATE_COMPLETE)
+            logger.debug(f"SUCCESS: Copied {src}")
+
+        except Exception as e:
+            self.reportError(e, f"Copying failed for {src}")
+
+
+    def copyEntireDirectory(self, src, dest):
+        logger.debug("Copying Directory")
+        try:
+            #   Gets all items in the source directory
+            manifest = self.getManifest(src, recursive=True)
+            self.onStatus("Copying...")
+            fileList = []
+
+            # Copy directories
+            self.makeDir(dest)
+            for entry in manifest.dirs:
+                self.makeDir(os.path.join(dest, entry.relPath))
+
+            # Collect files
+            for entry in self.getSyncEntries(manifest, dest):
+                fileList.append((entry.path, os.path.join(dest, entry.relPath), entry.size))
+
+            # Copy files
+            self.copyFileList(fileList)
+            self.verifyOutput([(entry.path, os.path.join(dest, entry.relPath), entry.size)
+                               for entry in manifest.files])
+            self.checkScanErrors(manifest)
+
+            self.onStatus(self.getCompleteStatus())
+            self.onProgress(100)
+            self.onState(STATE_COMPLETE)
+            logger.debug(f"SUCCESS: Copied {src}")
+
+        except Exception as e:
+            self.reportError(e, f"Copying failed for {src}")
+
+
+    #   Makes an output directory and remembers it if it is new
+    def makeDir(self, dirPath):
+        if not os.path.isdir(dirPath):
+            os.makedirs(dirPath, exist_ok=True)
+            self.createdDirs.append(dirPath)
+
+
+    def executeZip(self, originalPath, zipFilename):
+        #   Streams the zip straight to the output through a partial file
+        if self.zipMode == ZIP_MODE_STREAM:
+            zipPath = self.outputPath
+            writePath = getPartialPath(zipPath)
+        #   Makes tempDir
+        else:
+            self.tempDir = tempfile.mkdtemp(prefix="PrismTemp_")
+            zipPath = os.path.join(self.tempDir, zipFilename)
+            writePath = zipPath
+
+        self.zipWritePath = writePath
+        zipStart = None
+
+        self.onStatus("Zipping...")
+        logger.debug(f"Zipping {zipFilename}")
+
+        try:
+            if os.path.isdir(originalPath):
+                #   Case 4 zips dir and sub dirs, case 5 only files in the dir
+                #   Directories are added explicitly so empty ones are kept
+                manifest = self.getManifest(originalPath, recursive=(self.case == 4))
+                #   A zip is one delivery, it is not written without all its files
+                self.checkScanErrors(manifest)
+                entries = manifest.entries
+                totalFiles = manifest.totalFiles
+                totalBytes = manifest.totalBytes
+            else:
+                stat = os.stat(originalPath)
+                arcname = os.path.basename(originalPath)
+                entries = [ManifestEntry(originalPath, arcname, stat.st_size, stat.st_mtime, False)]
+                totalFiles = 1
+                totalBytes = stat.st_size
+
+            zipOutput, resumedMembers = self.openZipOutput(writePath, entries)
+            zipStart = time.perf_counter()
+
+            with zipOutput, zipfile.ZipFile(zipOutput, 'w', zipfile.ZIP_DEFLATED) as zipFile:
+                self.onStatus("Zipping...")
+                self.progressLabel = "Zipping..."
+                progress = TransferProgress(totalFiles, totalBytes, callback=self.emitTransferProgress,
+                                            token=self.token)
+
+                #   Keeps the members written before the interruption
+                if resumedMembers:
+                    restoreMembers(zipFile, resumedMembers)
+                    resumedPaths = {member["p"] for member in resumedMembers}
+                    entries = [entry for entry in entries if entry.relPath not in resumedPaths]
+                    progress.skip(sum(member["s"] for member in resumedMembers),
+                                  sum(1 for member in resumedMembers if not member["name"].endswith("/")))
+
+                def memberDone(entry, zinfo, endOffset):
+                    if not entry.isDir:
+                        progress.fileDone()
+                    if self.journal:
+                        self.journal.zipMemberDone(entry, zinfo, endOffset)
+
+                #   Deflates members in parallel and writes them in order
+                zipWriter = ParallelZipWriter(zipFile, workers=self.zipWorkers, policy=self.compressionPolicy,
+                                              token=self.token)
+                zipWriter.writeEntries(entries, progressCallback=progress.addBytes, memberCallback=memberDone)
+
+                #   Reports the whole archive, members kept from an interrupted run included
+                zipWriter.stats.addResumed(resumedMembers)
+                zipWriter.stats.members = len(zipFile.infolist())
+
+                #   Reports what the compression policy saved
+                zipReport = zipWriter.stats.getReport()
+                self.exportReports.append(zipReport)
+                logger.info(zipReport)
+                logger.debug(f"SUCCESS: Zipped {zipFilename} with {zipWriter.workers} workers")
+
+            self.telemetry.addTime(PHASE_ZIP, time.perf_counter() - zipStart)
+            zipStart = None
+            self.telemetry.addCount("DeflateSeconds", round(zipWriter.stats.deflateTime, 3))
+            self.telemetry.addCount("ZipBytes", zipWriter.stats.archiveBytes)
+            self.telemetry.addCount("ZipMembers", zipWriter.stats.members)
+            if zipWriter.stats.resumedMembers:
+                self.telemetry.addCount("ResumedMembers", zipWriter.stats.resumedMembers)
+
+            #   Replaces the output with the finished archive in one step
+            if writePath != zipPath:
+                os.replace(writePath, zipPath)
+            self.zipWritePath = None
+
+            return zipPath
+    
+        except Exception as e:
+            #   Time spent before a failure or cancel still counts
+            if zipStart is not None:
+                self.telemetry.addTime(PHASE_ZIP, time.perf_counter() - zipStart)
+
+            #   A journaled partial zip is kept so it can be resumed
+            if writePath != zipPath and os.path.exists(writePath) and not self.journal:
+                os.remove(writePath)
+
+            self.reportError(e, f"Failed to Zip {zipFilename}")
+
+
+    #   Opens the zip output.  When resuming, the partial zip is cut back to the
+    #   last journaled member that still matches the source and the members
+    #   before it are returned so they are not zipped again.
+    def openZipOutput(self, writePath, entries):
+        if not self.journal or not self.journal.zipMembers or not os.path.isfile(writePath):
+            return open(writePath, "wb"), []
+
+        entryLookup = {entry.relPath: entry for entry in entries}
+        partialSize = os.path.getsize(writePath)
+        resumedMembers = []
+        for member in self.journal.zipMembers:
+            entry = entryLookup.get(member["p"])
+            if (entry is None or entry.size != member["s"] or entry.mtime != member["m"]
+                    or member["e"] > partialSize):
+                break
+            resumedMembers.append(member)
+
+        self.journal.keepZipMembers(len(resumedMembers))
+        if not resumedMembers:
+            return open(writePath, "wb"), []
+
+        zipOutput = open(writePath, "r+b")
+        zipOutput.truncate(resumedMembers[-1]["e"])
+        zipOutput.seek(resumedMembers[-1]["e"])
+        logger.debug(f"Resuming zip after {len(resumedMembers)} members")
+
+        return zipOutput, resumedMembers
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Single-pass directory scanner.  The resulting manifest is shared by
+#   file counting, progress, copying and zipping so a tree is only walked once.
+
+import os
+import time
+import logging
+from collections import namedtuple
+
+
+logger = logging.getLogger(__name__)
+
+
+#   One scanned item.  relPath is relative to the scanned root.
+ManifestEntry = namedtuple("ManifestEntry", ["path", "relPath", "size", "mtime", "isDir"])
+
+
+class ScanManifest(object):
+    def __init__(self, root, recursive=True, exportFilter=None):
+        self.root = root
+        self.recursive = recursive
+        self.exportFilter = exportFilter
+        self.entries = []
+
+        #   time.monotonic() of the scan, a manifest handed on is only reused while recent
+        self.scanTime = time.monotonic()
+
+        self.totalFiles = 0
+        self.totalBytes = 0
+
+        #   Items left out by the filter, files in pruned directories are not counted
+        self.filesExcluded = 0
+        self.dirsPruned = 0
+
+        #   Symlinked directories and broken links, they are not followed
+        self.linksSkipped = 0
+
+        #   Items that could not be read, the export of this manifest is incomplete
+        self.errors = []
+
+
+    def addEntry(self, entry):
+        self.entries.append(entry)
+        if not entry.isDir:
+            self.totalFiles += 1
+            self.totalBytes += entry.size
+
+
+    @property
+    def files(self):
+        return [entry for entry in self.entries if not entry.isDir]
+
+
+    @property
+    def dirs(self):
+        return [entry for entry in self.entries if entry.isDir]
+
+
+    def getFilterReport(self):
+        return f"Filtered out {self.filesExcluded} files and {self.dirsPruned} directories"
+
+
+    def getErrorReport(self):
+        return f"Could not read {len(self.errors)} items:\n" + "\n".join(self.errors[:10])
+
+
+    def addError(self, path, e):
+        self.errors.append(f"{path}: {e}")
+        logger.warning(f"ERROR: Cannot read {path}: {e}")
+
+
+    #   Drops directory entries without exported files below them, except
+    #   keepDirs.  Used with include rules so skipped branches are not created.
+    def removeEmptyDirs(self, keepDirs=()):
+        usedDirs = set()
+        parents = list(keepDirs) + [os.path.dirname(entry.relPath) for entry in self.entries if not entry.isDir]
+        for parent in parents:
+            while parent and parent not in usedDirs:
+                usedDirs.add(parent)
+                parent = os.path.dirname(parent)
+
+        self.entries = [entry for entry in self.entries if not entry.isDir or entry.relPath in usedDirs]
+
+
+    #   Checks if this manifest can be reused for a scan request
+    def matches(self, root, recursive):
+        return (os.path.normcase(os.path.normpath(self.root)) == os.path.normcase(os.path.normpath(root))
+                and self.recursive == recursive)
+
+
+def scanDirectory(root, recursive=True, token=None, exportFilter=None):
+    #   Walks root once with os.scandir and records path, size, mtime and type
+    #   An optional ControlToken is checked before each directory
+    #   An optional ExportFilter skips items, excluded directories are not entered
+    #   Symlinked files are read through, symlinked directories are skipped
+    #   Unreadable items are collected in manifest.errors
+    manifest = ScanManifest(root, recursive, exportFilter)
+    if exportFilter is not None and exportFilter.isEmpty:
+        exportFilter = None
+
+    if not os.path.isdir(root):
+        return manifest
+
+    #   Directories matched by an include rule or below one, all their files are included
+    includedDirs = []
+
+    pending = [(root, "", False)]
+    while pending:
+        dirPath, relDir, included = pending.pop()
+        if token is not None:
+            token.check()
+
+        try:
+            with os.scandir(dirPath) as dirEntries:
+                for dirEntry in dirEntries:
+                    relPath = os.path.join(relDir, dirEntry.name) if relDir else dirEntry.name
+
+                    try:
+                        #   Directory links are not followed, they can loop back into the tree
+                        if dirEntry.is_symlink() and not dirEntry.is_file():
+                            manifest.linksSkipped += 1
+                            logger.debug(f"Skipping symlinked directory or broken link: {dirEntry.path}")
+                            continue
+
+                        if dirEntry.is_dir(follow_symlinks=False):
+                            if not recursive:
+                                continue
+
+                            dirIncluded = included
+                            if exportFilter is not None:
+                                if exportFilter.isExcluded(relPath, dirEntry.name, True):
+                                    manifest.dirsPruned += 1
+                                    continue
+                                if exportFilter.include:
+                                    dirIncluded = included or exportFilter.isIncluded(relPath, dirEntry.name, True)
+                                    if dirIncluded:
+                                        includedDirs.append(relPath)
+
+                            stat = dirEntry.stat()
+                            manifest.addEntry(ManifestEntry(dirEntry.path, relPath, 0, stat.st_mtime, True))
+                            pending.append((dirEntry.path, relPath, dirIncluded))
+
+                        elif dirEntry.is_file():
+                            if exportFilter is not None and (
+                                    exportFilter.isExcluded(relPath, dirEntry.name)
+                                    or not (included or exportFilter.isIncluded(relPath, dirEntry.name))):
+                                manifest.filesExcluded += 1
+                                continue
+
+                            stat = dirEntry.stat()
+                            manifest.addEntry(ManifestEntry(dirEntry.path, relPath, stat.st_size,
+                                                            stat.st_mtime, False))
+
+                        else:
+                            logger.debug(f"Skipping unsupported item: {dirEntry.path}")
+
+                    except OSError as e:
+                        manifest.addError(dirEntry.path, e)
+
+        except OSError as e:
+            manifest.addError(dirPath, e)
+
+    if exportFilter is not None and exportFilter.include:
+        manifest.removeEmptyDirs(includedDirs)
+
+    logger.debug(f"Scanned {manifest.totalFiles} files ({manifest.totalBytes} bytes) in {root}")
+
+    return manifest
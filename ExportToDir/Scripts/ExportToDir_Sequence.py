@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+
+#   Image sequence handling.  Works from the sequence's frame list instead of
+#   its directory:  frame numbers, frame range selection (1001-1100x2), gap
+#   reports and the scan manifest of the selected frames.
+
+import os
+import re
+import logging
+
+from ExportToDir_Scanner import ManifestEntry, ScanManifest
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Frame number is the last digit group of the filename, e.g. shot_v001.1001.exr
+FRAME_PATTERN = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+#   One range item:  "1001", "1001-1100" or "1001-1100x2"
+RANGE_PATTERN = re.compile(r"^(\d+)(?:-(\d+)(?:x(\d+))?)?$")
+
+#   Frame number placeholder of an export name, e.g. client_sh010.####.exr
+PADDING_PATTERN = re.compile(r"^(.*?)(#+)([^#]*)$")
+
+#   Gaps listed in a report before they are summarized
+MAX_REPORTED_GAPS = 20
+
+
+#   Returns (prefix, frame, suffix) of a frame filename, frame is None if it has no number
+def splitFrame(filename):
+    match = FRAME_PATTERN.match(filename)
+    if not match:
+        return filename, None, ""
+
+    return match.group(1), match.group(2), match.group(3)
+
+
+#   Frame number of each path, paths without a number are left out
+def getFrameNumbers(paths):
+    frames = {}
+    for path in paths:
+        frame = splitFrame(os.path.basename(path))[1]
+        if frame is not None:
+            frames[int(frame)] = path
+
+    return frames
+
+
+#   Parses "1001-1100x2, 1200, 1300-1310" into a sorted list of frame numbers.
+#   Raises ValueError for invalid items.
+def parseFrameRange(text):
+    frames = set()
+    for item in re.split(r"[,\s]+", text.strip()):
+        if not item:
+            continue
+
+        match = RANGE_PATTERN.match(item)
+        if not match:
+            raise ValueError(f"Invalid frame range: {item}")
+
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        step = int(match.group(3)) if match.group(3) else 1
+        if end < start or step < 1:
+            raise ValueError(f"Invalid frame range: {item}")
+
+        frames.update(range(start, end + 1, step))
+
+    return sorted(frames)
+
+
+#   Compact text of frame numbers, e.g. "1001-1004, 1010"
+def formatFrameRanges(frames):
+    ranges = []
+    for frame in sorted(frames):
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+
+    text = [str(start) if start == end else f"{start}-{end}" for start, end in ranges[:MAX_REPORTED_GAPS]]
+    if len(ranges) > MAX_REPORTED_GAPS:
+        text.append(f"... ({len(ranges) - MAX_REPORTED_GAPS} more)")
+
+    return ", ".join(text)
+
+
+#   Returns (selected paths, missing frames).  Without a frame range all frames
+#   are selected, and missing are the gaps between the first and last frame.
+def selectFrames(paths, frameRange=None):
+    frames = getFrameNumbers(paths)
+    if not frames:
+        return list(paths), []
+
+    if frameRange:
+        requested = parseFrameRange(frameRange)
+    else:
+        requested = range(min(frames), max(frames) + 1)
+
+    selected = [frames[frame] for frame in requested if frame in frames]
+    missing = [frame for frame in requested if frame not in frames]
+
+    #   Files without a frame number are only kept when exporting all frames
+    if not frameRange:
+        selected += [path for path in paths if splitFrame(os.path.basename(path))[1] is None]
+
+    return selected, missing
+
+
+#   Returns the export filename of each frame in one pass over the frame list.
+#   The last run of "#" in name is replaced by the frame number plus offset,
+#   padded to the number of "#".  Without "#" the frame number is added
+#   before the extension with the source padding.  Files without a frame
+#   number keep their name.  Raises ValueError for negative frames or
+#   names used twice.
+def getFrameNames(paths, name, offset=0):
+    basenames = [os.path.basename(path) for path in paths]
+    splitNames = [splitFrame(basename) for basename in basenames]
+
+    match = PADDING_PATTERN.match(name)
+    if match:
+        prefix, padding, suffix = match.group(1), len(match.group(2)), match.group(3)
+    else:
+        nameNoExt, ext = os.path.splitext(name)
+        sourcePadding = [len(frame) for _, frame, _ in splitNames if frame is not None]
+        prefix, padding, suffix = f"{nameNoExt}.", sourcePadding[0] if sourcePadding else 4, ext
+
+    #   One format string for every frame
+    pattern = prefix.replace("%", "%%") + f"%0{padding}d" + suffix.replace("%", "%%")
+
+    names = [pattern % (int(frame) + offset) if frame is not None else basename
+             for basename, (_, frame, _) in zip(basenames, splitNames)]
+
+    if any(frame is not None and int(frame) + offset < 0 for _, frame, _ in splitNames):
+        raise ValueError(f"Frame offset {offset} gives negative frame numbers")
+
+    if len(set(map(os.path.normcase, names))) != len(names):
+        raise ValueError(f"The name \"{name}\" gives several frames the same filename")
+
+    return names
+
+
+#   Lists the frames of the sequence that path belongs to (same prefix, suffix
+#   and padding) with one directory listing
+def findSequence(path):
+    sourceDir = os.path.dirname(path)
+    prefix, frame, suffix = splitFrame(os.path.basename(path))
+    if frame is None:
+        return [path]
+
+    paths = []
+    with os.scandir(sourceDir) as dirEntries:
+        for dirEntry in dirEntries:
+            entryPrefix, entryFrame, entrySuffix = splitFrame(dirEntry.name)
+            if (entryFrame is not None and entryPrefix == prefix and entrySuffix == suffix
+                    and len(entryFrame) == len(frame) and dirEntry.is_file()):
+                paths.append(dirEntry.path)
+
+    return sorted(paths)
+
+
+#   Scan manifest of the frame list, only the listed frames are read.  Frames
+#   that no longer exist are returned as missing.  names (from getFrameNames)
+#   sets the output filename of each frame.
+def scanFrames(paths, token=None, names=None):
+    manifest = ScanManifest(os.path.dirname(paths[0]) if paths else "", recursive=False)
+    missing = []
+    names = names or [os.path.basename(path) for path in paths]
+
+    for path, name in zip(paths, names):
+        if token is not None:
+            token.check()
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            missing.append(path)
+            continue
+
+        manifest.addEntry(ManifestEntry(path, name, stat.st_size, stat.st_mtime, False))
+
+    if missing:
+        logger.warning(f"ERROR: {len(missing)} frames of {manifest.root} were not found")
+
+    return manifest, missing
+
+
+#   Short description of a frame list for logs, telemetry and the journal
+def getSequenceLabel(paths):
+    if not paths:
+        return ""
+
+    frames = getFrameNumbers(paths)
+    if frames:
+        return f"{os.path.dirname(paths[0])} [{len(paths)} frames {formatFrameRanges(frames)}]"
+
+    return f"{os.path.dirname(paths[0])} [{len(paths)} files]"
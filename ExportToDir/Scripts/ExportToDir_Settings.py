@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Cached settings store for ExportToDir_Config.json.  The config lives in
+#   the plugin directory, which may be on a shared network path, so reads are
+#   served from memory and only re-read when the file changed on disk.
+#   Writes are debounced, made under a lock file, merged with changes other
+#   users made since the last read, and replaced atomically.
+
+import os
+import copy
+import json
+import time
+import atexit
+import threading
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Seconds changes are held before they are written
+SAVE_DELAY = 1.0
+
+#   Lock file wait, and age after which a lock left by a crashed session is removed
+LOCK_TIMEOUT = 5.0
+STALE_LOCK_AGE = 30.0
+
+#   os.replace can fail on Windows while another process is reading the file
+REPLACE_ATTEMPTS = 5
+
+
+class SettingsStore(object):
+    def __init__(self, settingsPath, saveDelay=SAVE_DELAY):
+        self.settingsPath = settingsPath
+        self.lockPath = settingsPath + ".lock"
+        self.saveDelay = saveDelay
+
+        self.data = None
+        self._stamp = None
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.RLock()
+
+        #   Writes changes still waiting when Prism closes
+        atexit.register(self.flush)
+
+
+    def _getStamp(self):
+        stat = os.stat(self.settingsPath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+    def _read(self):
+        with open(self.settingsPath, "r") as settingsFile:
+            return json.load(settingsFile)
+
+
+    #   Returns a copy of the settings.  The file is only read again if it
+    #   changed on disk, changes not yet written are kept on top of it.
+    #   Raises FileNotFoundError or ValueError like reading the file would.
+    def load(self):
+        with self._lock:
+            try:
+                stamp = self._getStamp()
+            except FileNotFoundError:
+                if self.data is not None and self._pending:
+                    return copy.deepcopy(self.data)
+                raise
+
+            if self.data is None or stamp != self._stamp:
+                logger.debug(f"Reading settings file {self.settingsPath}")
+                diskData = self._read()
+                if self.data is not None:
+                    diskData.update({key: self.data[key] for key in self._pending})
+
+                self.data = diskData
+                self._stamp = stamp
+
+            return copy.deepcopy(self.data)
+
+
+    #   Stores new settings in memory.  Only top-level keys that changed are
+    #   written, so other users' changes to other keys are kept.  force writes
+    #   every key, used to recreate a missing or corrupt file.
+    def update(self, data, immediate=False, force=False):
+        with self._lock:
+            current = self.data or {}
+            for key, value in data.items():
+                if force or current.get(key) != value:
+                    self._pending.add(key)
+
+            self.data = copy.deepcopy(data)
+
+            if immediate:
+                self.flush()
+            elif self._pending:
+                self._scheduleSave()
+
+
+    def _scheduleSave(self):
+        if self._timer:
+            self._timer.cancel()
+
+        self._timer = threading.Timer(self.saveDelay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+    #   Writes pending changes now
+    def flush(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._pending:
+                return
+
+            try:
+                with SettingsFileLock(self.lockPath):
+                    self._write()
+            except OSError as e:
+                #   Pending changes are kept and written with the next save
+                logger.warning(f"ERROR: Unable to save settings: {e}")
+
+
+    def _write(self):
+        #   Merges changes other users saved since the last read
+        try:
+            if self._getStamp() != self._stamp:
+                diskData = self._read()
+                diskData.update({key: self.data[key] for key in self._pending})
+                self.data = diskData
+        except (OSError, ValueError):
+            pass
+
+        tempPath = f"{self.settingsPath}.{os.getpid()}.tmp"
+        with open(tempPath, "w") as tempFile:
+            json.dump(self.data, tempFile, indent=4)
+
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(tempPath, self.settingsPath)
+                break
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    os.remove(tempPath)
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+
+        self._stamp = self._getStamp()
+        self._pending.clear()
+        logger.debug("Settings written")
+
+
+#   Lock file shared by all sessions writing the settings file.  Works on
+#   network shares where OS file locks are unreliable.
+class SettingsFileLock(object):
+    def __init__(self, lockPath, timeout=LOCK_TIMEOUT):
+        self.lockPath = lockPath
+        self.timeout = timeout
+        self.acquired = False
+
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                lockFile = os.open(self.lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(lockFile, str(os.getpid()).encode())
+                os.close(lockFile)
+                self.acquired = True
+                return self
+            except FileExistsError:
+                self._removeStale()
+
+            if time.monotonic() > deadline:
+                #   The atomic replace still keeps the file intact without the lock
+                logger.warning(f"Settings lock timed out, saving without lock: {self.lockPath}")
+                return self
+
+            time.sleep(0.05)
+
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.acquired:
+            try:
+                os.remove(self.lockPath)
+            except OSError:
+                pass
+            self.acquired = False
+
+
+    def _removeStale(self):
+        try:
+            if time.time() - os.path.getmtime(self.lockPath) > STALE_LOCK_AGE:
+                os.remove(self.lockPath)
+        except OSError:
+            pass
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Incremental (sync) export.  Compares a source scan manifest against the
+#   destination and only transfers files that are new or changed.
+
+import os
+import shutil
+import hashlib
+import logging
+
+from ExportToDir_Scanner import scanDirectory
+from ExportToDir_Journal import isJournalFile
+from ExportToDir_Engine import formatSize
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Allowed mtime difference in seconds (FAT and some SMB shares store 2s resolution)
+MTIME_TOLERANCE = 2.0
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hashFile(path):
+    #   Content hash used for the optional hash compare
+    hasher = hashlib.blake2b()
+    with open(path, "rb") as hashedFile:
+        for block in iter(lambda: hashedFile.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+class SyncPlan(object):
+    def __init__(self):
+        self.toCopy = []
+        self.orphanFiles = []
+        self.orphanDirs = []
+
+        self.filesSkipped = 0
+        self.bytesSkipped = 0
+        self.bytesToCopy = 0
+        self.filesDeleted = 0
+
+
+    def getReport(self):
+        report = (f"Transferred {len(self.toCopy)} files ({formatSize(self.bytesToCopy)}), "
+                  f"skipped {self.filesSkipped} unchanged ({formatSize(self.bytesSkipped)})")
+        if self.filesDeleted:
+            report += f", deleted {self.filesDeleted} orphans"
+
+        return report
+
+
+def isUnchanged(srcEntry, destEntry, useHash=False):
+    #   Same size and mtime is treated as unchanged, hash compare is optional
+    if destEntry is None or destEntry.isDir or srcEntry.size != destEntry.size:
+        return False
+
+    sameTime = abs(srcEntry.mtime - destEntry.mtime) <= MTIME_TOLERANCE
+    if not useHash:
+        return sameTime
+
+    return hashFile(srcEntry.path) == hashFile(destEntry.path)
+
+
+def buildSyncPlan(srcManifest, destRoot, useHash=False, token=None):
+    #   Scans the destination the same way as the source and compares by relPath.
+    #   Filtered out files in the destination are not orphans.
+    plan = SyncPlan()
+    destManifest = scanDirectory(destRoot, recursive=srcManifest.recursive, token=token,
+                                 exportFilter=srcManifest.exportFilter)
+    destEntries = {os.path.normcase(entry.relPath): entry for entry in destManifest.entries}
+    srcPaths = set()
+
+    for entry in srcManifest.entries:
+        key = os.path.normcase(entry.relPath)
+        srcPaths.add(key)
+        if entry.isDir:
+            continue
+
+        if token is not None:
+            token.check()
+
+        if isUnchanged(entry, destEntries.get(key), useHash):
+            plan.filesSkipped += 1
+            plan.bytesSkipped += entry.size
+        else:
+            plan.toCopy.append(entry)
+            plan.bytesToCopy += entry.size
+
+    #   Items only in the destination, the journal of the running export is kept
+    for key, entry in destEntries.items():
+        if key in srcPaths or isJournalFile(entry.relPath):
+            continue
+        if entry.isDir:
+            plan.orphanDirs.append(entry)
+        else:
+            plan.orphanFiles.append(entry)
+
+    logger.debug(f"Sync plan: {plan.getReport()}, {len(plan.orphanFiles)} orphan files")
+
+    return plan
+
+
+def deleteOrphans(plan):
+    #   Removes destination files (and dirs) that are not in the source
+    for entry in plan.orphanFiles:
+        try:
+            os.remove(entry.path)
+            plan.filesDeleted += 1
+        except OSError as e:
+            logger.warning(f"ERROR: Cannot delete orphan {entry.path}: {e}")
+
+    #   Deepest dirs first so parents are empty when reached
+    for entry in sorted(plan.orphanDirs, key=lambda dirEntry: len(dirEntry.path), reverse=True):
+        shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Per-export telemetry.  Each export records how long its phases took
+#   (scan, compare, copy, zip, cleanup), the files and bytes moved and the
+#   throughput, and appends one JSON line to the telemetry log in the plugin
+#   directory.  The summary shows where export time is spent.
+
+import os
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from ExportToDir_Engine import formatSize
+
+
+logger = logging.getLogger(__name__)
+
+
+TELEMETRY_FILENAME = "ExportToDir_Telemetry.jsonl"
+
+#   Log is rotated to a single ".1" file when it grows past this size
+MAX_TELEMETRY_SIZE = 5 * 1024 * 1024
+
+#   Number of recent exports used for the summary
+SUMMARY_RECORDS = 200
+
+#   Exports smaller than this are left out of the average throughput,
+#   their time is mostly scanning and setup
+MIN_THROUGHPUT_BYTES = 64 * 1024 * 1024
+
+PHASE_SCAN = "Scan"
+PHASE_COMPARE = "Compare"
+PHASE_COPY = "Copy"
+PHASE_ZIP = "Zip"
+PHASE_VERIFY = "Verify"
+PHASE_CLEANUP = "Cleanup"
+PHASES = [PHASE_SCAN, PHASE_COMPARE, PHASE_COPY, PHASE_ZIP, PHASE_VERIFY, PHASE_CLEANUP]
+
+#   What a slow export is usually limited by when a phase dominates
+PHASE_HINTS = {PHASE_SCAN: "scan-bound (many small files or slow directory listing)",
+               PHASE_COMPARE: "scan-bound (sync compare of the destination)",
+               PHASE_COPY: "I/O-bound (disk or network)",
+               PHASE_ZIP: "CPU-bound (compression)",
+               PHASE_VERIFY: "verify-bound (reading back and hashing the output)",
+               PHASE_CLEANUP: "cleanup-bound (temp files)"}
+
+
+class ExportTelemetry(object):
+    def __init__(self, info=None):
+        self.info = dict(info or {})
+        self.phases = {}
+        self.counters = {}
+        self.startTime = time.perf_counter()
+        self.startCpu = time.process_time()
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+
+    #   Times a phase, repeated phases are added together
+    @contextmanager
+    def phase(self, name):
+        phaseStart = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addTime(name, time.perf_counter() - phaseStart)
+
+
+    def addTime(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+    def addCount(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+
+    #   Returns the finished record.  CpuSeconds is process wide, so it
+    #   includes other exports running at the same time.
+    def finish(self, state, files=0, numBytes=0, error=None):
+        seconds = time.perf_counter() - self.startTime
+
+        with self._lock:
+            record = dict(self.info)
+            record.update({"Time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                           "State": state,
+                           "Seconds": round(seconds, 3),
+                           "CpuSeconds": round(time.process_time() - self.startCpu, 3),
+                           "Files": files,
+                           "Bytes": numBytes,
+                           "MBps": round(numBytes / (1024 * 1024) / seconds, 2) if seconds > 0 else 0.0,
+                           "Phases": {name: round(value, 3) for name, value in self.phases.items()},
+                           "Counters": dict(self.counters)})
+
+        if error:
+            record["Error"] = error
+
+        return record
+
+
+def writeRecord(telemetryPath, record):
+    try:
+        if os.path.isfile(telemetryPath) and os.path.getsize(telemetryPath) > MAX_TELEMETRY_SIZE:
+            os.replace(telemetryPath, telemetryPath + ".1")
+
+        with open(telemetryPath, "a", encoding="utf-8") as telemetryFile:
+            telemetryFile.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    except OSError as e:
+        logger.warning(f"ERROR: Unable to write export telemetry: {e}")
+
+
+#   Returns the last limit records, oldest first
+def readRecords(telemetryPath, limit=SUMMARY_RECORDS):
+    if not os.path.isfile(telemetryPath):
+        return []
+
+    records = []
+    try:
+        with open(telemetryPath, "r", encoding="utf-8") as telemetryFile:
+            for line in telemetryFile:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError as e:
+        logger.warning(f"ERROR: Unable to read export telemetry: {e}")
+
+    return records[-limit:] if limit else records
+
+
+#   Average bytes/s of completed exports of the same kind (zip or copy),
+#   None if there is no history yet
+def getAverageThroughput(records, zipFiles=False):
+    totalBytes = 0
+    totalSeconds = 0.0
+    for record in records:
+        if (record.get("State") != "Complete" or bool(record.get("Zip")) != bool(zipFiles)
+                or record.get("Bytes", 0) < MIN_THROUGHPUT_BYTES):
+            continue
+        totalBytes += record["Bytes"]
+        totalSeconds += record.get("Seconds", 0.0)
+
+    if not totalBytes or totalSeconds <= 0:
+        return None
+
+    return totalBytes / totalSeconds
+
+
+def getSummaryText(records):
+    if not records:
+        return "No exports recorded yet."
+
+    states = {}
+    phaseTotals = {}
+    totalBytes = 0
+    totalSeconds = 0.0
+    for record in records:
+        states[record.get("State")] = states.get(record.get("State"), 0) + 1
+        totalBytes += record.get("Bytes", 0)
+        totalSeconds += record.get("Seconds", 0.0)
+        for name, seconds in record.get("Phases", {}).items():
+            phaseTotals[name] = phaseTotals.get(name, 0.0) + seconds
+
+    stateText = ", ".join(f"{count} {state.lower()}" for state, count in sorted(states.items()) if state)
+    throughput = totalBytes / (1024 * 1024) / totalSeconds if totalSeconds > 0 else 0.0
+    lines = [f"Last {len(records)} exports:  {stateText}",
+             f"Moved {formatSize(totalBytes)} in {totalSeconds:.1f} s  (average {throughput:.1f} MB/s)"]
+
+    phaseSeconds = sum(phaseTotals.values())
+    if phaseSeconds > 0:
+        shares = [(name, phaseTotals[name] / phaseSeconds * 100) for name in PHASES if name in phaseTotals]
+        lines.append("Time spent:  " + ",  ".join(f"{name} {share:.0f}%" for name, share in shares))
+        slowest = max(shares, key=lambda share: share[1])[0]
+        lines.append(f"Exports are mostly {PHASE_HINTS[slowest]}.")
+
+    return "\n".join(lines)
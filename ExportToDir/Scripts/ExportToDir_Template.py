@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Naming template engine shared by the export dialogue and the command line.
+#   Templates contain @TOKEN@ items that are replaced with export data, or
+#   @TOKEN:spec@ items that are also formatted, e.g. @VERSION:03d@.
+#   Each template is parsed once into literal and token parts, rendering is
+#   a single join over the parts.
+
+import os
+import re
+import logging
+from functools import lru_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Tokens available in naming templates
+TEMPLATE_TOKENS = ["PROJECT", "USER", "DATE", "TYPE", "SEQUENCE", "SHOT", "ASSET", "DEPARTMENT", "TASK",
+                   "PRODUCT", "IDENTIFIER", "VERSION", "AOV", "CHANNEL", "FILENAME", "FRAME", "FILETYPE",
+                   "EXTENSION"]
+
+DATE_FORMAT = "%d%m%y"
+
+#   Names Windows does not allow for files
+RESERVED_NAMES = frozenset(["CON", "PRN", "AUX", "NUL"]
+                           + [f"COM{i}" for i in range(1, 10)]
+                           + [f"LPT{i}" for i in range(1, 10)])
+
+INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_\- ()#.]")
+
+#   @TOKEN@ or @TOKEN:spec@
+TOKEN_PATTERN = re.compile(r"@([A-Za-z]+)(?::([^@]*))?@")
+
+#   Leading text and digits of a value such as "v0012"
+NUMBER_PATTERN = re.compile(r"^(\D*)(\d+)$")
+
+#   Number of compiled templates kept
+TEMPLATE_CACHE_SIZE = 256
+
+
+class CompiledTemplate(object):
+    def __init__(self, template):
+        self.template = template
+        self.errors = []
+
+        #   Literal strings and (token, spec) tuples, in order
+        self.parts = []
+        self.tokens = []
+
+        position = 0
+        unmatched = False
+        for match in TOKEN_PATTERN.finditer(template):
+            unmatched = unmatched or "@" in template[position:match.start()]
+            self._addLiteral(template[position:match.start()])
+            token, spec = match.group(1), match.group(2)
+
+            if token not in TEMPLATE_TOKENS:
+                #   Unknown tokens are kept as text
+                self.errors.append(f"Unknown item: @{token}@")
+                self._addLiteral(match.group(0))
+            elif spec is not None and not self._isValidSpec(spec):
+                self.errors.append(f"Invalid format \"{spec}\" for @{token}@")
+                self.parts.append((token, None))
+                self.tokens.append(token)
+            else:
+                self.parts.append((token, spec or None))
+                self.tokens.append(token)
+
+            position = match.end()
+
+        self._addLiteral(template[position:])
+
+        if unmatched or "@" in template[position:]:
+            self.errors.append("Unmatched @")
+
+
+    def _addLiteral(self, text):
+        if not text:
+            return
+        #   Joins neighbouring literals so rendering has fewer parts
+        if self.parts and isinstance(self.parts[-1], str):
+            self.parts[-1] += text
+        else:
+            self.parts.append(text)
+
+
+    @staticmethod
+    def _isValidSpec(spec):
+        for sample in (0, ""):
+            try:
+                format(sample, spec)
+                return True
+            except (ValueError, TypeError):
+                continue
+        return False
+
+
+    @property
+    def isValid(self):
+        return not self.errors
+
+
+    #   Returns the name for values keyed by token, missing values are left empty
+    def render(self, values):
+        return "".join(part if isinstance(part, str) else formatValue(values.get(part[0], ""), part[1])
+                       for part in self.parts)
+
+
+def formatValue(value, spec=None):
+    if not spec:
+        return str(value)
+
+    #   Number specs format the digits and keep a text prefix ("v0012" -> "v012" for 03d)
+    if spec[-1:] in "dxXob" and not isinstance(value, int):
+        match = NUMBER_PATTERN.match(str(value))
+        if not match:
+            return str(value)
+        return match.group(1) + format(int(match.group(2)), spec)
+
+    try:
+        return format(value, spec)
+    except (ValueError, TypeError):
+        return str(value)
+
+
+#   Parsed templates are cached by text, so changed templates are parsed again
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compileTemplate(template):
+    return CompiledTemplate(template)
+
+
+def resolveTemplate(template, values):
+    #   Replaces each @TOKEN@ with values[TOKEN], missing values are left empty
+    return compileTemplate(template).render(values)
+
+
+def getTemplateErrors(template):
+    return list(compileTemplate(template).errors)
+
+
+def sanitizeName(name):
+    #   Replaces invalid characters with underscores
+    return INVALID_CHARS.sub("_", name)
+
+
+def isReservedName(name):
+    return name.upper() in RESERVED_NAMES
+
+
+def getOutputFilename(name, sourceExt, zipFiles=False, singleFile=True):
+    #   Final output filename.  Zips get a sanitized name with .zip, sequence
+    #   zips also lose trailing frame padding characters.
+    fileNameNoExt = os.path.splitext(name)[0]
+
+    if zipFiles:
+        formattedName = sanitizeName(fileNameNoExt)
+        if not singleFile:
+            formattedName = formattedName.rstrip("#_.")
+        return formattedName + ".zip"
+
+    return fileNameNoExt + sourceExt
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+
+#   Delivery verification.  Source files are hashed while they stream through
+#   the copy engine, the written files are read back and hashed in parallel,
+#   and a checksum sidecar (md5sum style or MHL style XML) is written beside
+#   the output.
+
+import os
+import time
+import zipfile
+import hashlib
+import getpass
+import socket
+import logging
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ExportToDir_Engine import MAX_WORKERS, formatSize
+
+#   xxHash is optional, only offered if the module is installed
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+logger = logging.getLogger(__name__)
+
+
+HASH_OFF = "Off"
+HASH_MD5 = "MD5"
+HASH_SHA256 = "SHA-256"
+HASH_XXH64 = "XXH64"
+
+HASH_FACTORIES = {HASH_MD5: hashlib.md5,
+                  HASH_SHA256: hashlib.sha256}
+if xxhash is not None:
+    HASH_FACTORIES[HASH_XXH64] = xxhash.xxh64
+
+HASH_ALGORITHMS = [HASH_OFF] + list(HASH_FACTORIES)
+
+MANIFEST_CHECKSUM = "Checksum"
+MANIFEST_MHL = "MHL"
+MANIFEST_FORMATS = [MANIFEST_CHECKSUM, MANIFEST_MHL]
+
+#   Sidecar extension of the checksum format, and hash element name in MHL
+CHECKSUM_EXTENSIONS = {HASH_MD5: ".md5", HASH_SHA256: ".sha256", HASH_XXH64: ".xxh64"}
+MHL_EXTENSION = ".mhl"
+MHL_TAGS = {HASH_MD5: "md5", HASH_SHA256: "sha256", HASH_XXH64: "xxhash64be"}
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def getVerifySettings(settings):
+    #   Returns sanitized verify settings with defaults for missing keys
+    settings = settings or {}
+
+    algorithm = settings.get("Algorithm", HASH_OFF)
+    if algorithm not in HASH_ALGORITHMS:
+        if algorithm != HASH_OFF:
+            logger.warning(f"ERROR: Hash algorithm {algorithm} is not available, verify is off")
+        algorithm = HASH_OFF
+
+    manifestFormat = settings.get("ManifestFormat", MANIFEST_CHECKSUM)
+    if manifestFormat not in MANIFEST_FORMATS:
+        manifestFormat = MANIFEST_CHECKSUM
+
+    return {"Algorithm": algorithm,
+            "ManifestFormat": manifestFormat}
+
+
+#   Returns a callable making new hash objects, None if verify is off
+def getHashFactory(algorithm):
+    return HASH_FACTORIES.get(algorithm)
+
+
+#   Sidecar sits beside the output file or directory, like the journal
+def getManifestPath(outputPath, settings):
+    if settings["ManifestFormat"] == MANIFEST_MHL:
+        return os.path.normpath(outputPath) + MHL_EXTENSION
+
+    return os.path.normpath(outputPath) + CHECKSUM_EXTENSIONS[settings["Algorithm"]]
+
+
+def hashFile(path, hashFactory, token=None):
+    hasher = hashFactory()
+    with open(path, "rb") as hashedFile:
+        while True:
+            if token is not None:
+                token.check()
+            block = hashedFile.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+class VerifyResult(object):
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+        #   (dest, hash) of every verified file, in export order
+        self.hashes = []
+        self.mismatches = []
+
+        #   Written files that failed and are removed so a rerun copies them again
+        self.badOutputs = []
+
+        #   Hardlinks and symlinks to their source.  Reading them back reads the
+        #   source again, so they are only hashed for the manifest.
+        self.linkedFiles = 0
+        self.linkedBytes = 0
+
+
+    @property
+    def passed(self):
+        return not self.mismatches
+
+
+    def getReport(self):
+        if self.mismatches:
+            return f"Verify FAILED for {len(self.mismatches)} of {self.files} files ({self.algorithm})"
+
+        linkedReport = f"{self.linkedFiles} linked files ({formatSize(self.linkedBytes)}) not verified"
+        if not self.files and self.linkedFiles:
+            return linkedReport
+
+        report = f"Verified {self.files} files ({formatSize(self.bytes)}, {self.algorithm}) in {self.seconds:.1f} s"
+        if self.linkedFiles:
+            report += ", " + linkedReport
+
+        return report
+
+
+def isLinkedOutput(src, dest):
+    #   True if dest is a symlink or hardlink to src, so its data cannot differ
+    try:
+        return os.path.islink(dest) or os.path.samefile(src, dest)
+    except OSError:
+        return False
+
+
+#   Reads back the written (src, dest, size) files and compares them with the
+#   source hashes taken during the copy.  Sources without a hash (files skipped
+#   by a resumed or sync export) are read again.  Files are hashed in parallel.
+#   Outputs linked to their source are not compared, only hashed for the manifest.
+def verifyFiles(fileList, hashFactory, algorithm, sourceHashes=None, workers=1, token=None):
+    sourceHashes = sourceHashes or {}
+    result = VerifyResult(algorithm)
+    hashes = {}
+    startTime = time.perf_counter()
+
+    def verifyItem(src, dest):
+        srcHash = sourceHashes.get(dest) or hashFile(src, hashFactory, token)
+        if isLinkedOutput(src, dest):
+            return srcHash, None
+        return srcHash, hashFile(dest, hashFactory, token)
+
+    workers = min(max(int(workers), 1), MAX_WORKERS)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ExportToDir_Verify")
+    try:
+        futures = {executor.submit(verifyItem, src, dest): (dest, size) for src, dest, size in fileList}
+        for future in as_completed(futures):
+            dest, size = futures[future]
+            srcHash, destHash = future.result()
+            hashes[dest] = srcHash
+            if destHash is None:
+                result.linkedFiles += 1
+                result.linkedBytes += size
+                continue
+
+            result.files += 1
+            result.bytes += size
+            if srcHash != destHash:
+                result.mismatches.append(dest)
+                result.badOutputs.append(dest)
+                logger.warning(f"ERROR: Verify failed, {dest} does not match its source")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    #   Hashes are written to the manifest in the export order
+    result.hashes = [(dest, hashes[dest]) for _, dest, _ in fileList]
+    result.seconds = time.perf_counter() - startTime
+
+    return result
+
+
+#   A zip is verified by checking the CRC of every member and hashing the
+#   archive for the manifest
+def verifyZip(zipPath, hashFactory, algorithm, token=None):
+    result = VerifyResult(algorithm)
+    startTime = time.perf_counter()
+
+    with zipfile.ZipFile(zipPath, "r") as zipFile:
+        for zinfo in zipFile.infolist():
+            if token is not None:
+                token.check()
+            try:
+                with zipFile.open(zinfo) as member:
+                    while member.read(HASH_BLOCK_SIZE):
+                        pass
+            except zipfile.BadZipFile:
+                result.mismatches.append(zinfo.filename)
+                logger.warning(f"ERROR: Verify failed, bad CRC for {zinfo.filename} in {zipPath}")
+
+    if result.mismatches:
+        result.badOutputs.append(zipPath)
+
+    result.files = 1
+    result.bytes = os.path.getsize(zipPath)
+    result.hashes = [(zipPath, hashFile(zipPath, hashFactory, token))]
+    result.seconds = time.perf_counter() - startTime
+
+    return result
+
+
+#   Writes the sidecar.  Paths are relative to the sidecar's directory so
+#   "md5sum -c" (or sha256sum) works from there.
+def writeManifest(manifestPath, hashes, settings):
+    rootDir = os.path.dirname(manifestPath)
+    items = [(os.path.relpath(dest, rootDir).replace(os.sep, "/"), dest, fileHash) for dest, fileHash in hashes]
+
+    tempPath = manifestPath + ".tmp"
+    with open(tempPath, "w", encoding="utf-8", newline="\n") as manifestFile:
+        if settings["ManifestFormat"] == MANIFEST_MHL:
+            manifestFile.write(getMhlText(items, settings["Algorithm"]))
+        else:
+            for relPath, _, fileHash in items:
+                manifestFile.write(f"{fileHash}  {relPath}\n")
+
+    os.replace(tempPath, manifestPath)
+    logger.debug(f"Wrote checksum manifest {manifestPath}")
+
+
+def getMhlText(items, algorithm):
+    tag = MHL_TAGS[algorithm]
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<hashlist version="1.1">',
+             "  <creatorinfo>",
+             f"    <username>{escape(getpass.getuser())}</username>",
+             f"    <hostname>{escape(socket.gethostname())}</hostname>",
+             "    <tool>ExportToDir</tool>",
+             f"    <startdate>{now}</startdate>",
+             f"    <finishdate>{now}</finishdate>",
+             "  </creatorinfo>"]
+
+    for relPath, dest, fileHash in items:
+        stat = os.stat(dest)
+        modified = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_mtime))
+        lines += ["  <hash>",
+                  f"    <file>{escape(relPath)}</file>",
+                  f"    <size>{stat.st_size}</size>",
+                  f"    <lastmodificationdate>{modified}</lastmodificationdate>",
+                  f"    <{tag}>{fileHash}</{tag}>",
+                  f"    <hashdate>{now}</hashdate>",
+                  "  </hash>"]
+
+    lines.append("</hashlist>")
+
+    return "\n".join(lines) + "\n"
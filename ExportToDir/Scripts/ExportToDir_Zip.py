@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2021 Richard Frangenberg
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+####################################################
+#
+#           ExportToDir Plugin for Prism2
+#
+#                 Joshua Breckeen
+#                    Alta Arts
+#                josh@alta-arts.com
+#
+####################################################
+
+
+#   Parallel zip compression.  Members are deflated in a pool of worker
+#   threads (zlib releases the GIL) and written to the archive in order.
+#   Large files are split into chunks that are deflated in parallel and
+#   joined into one deflate stream, the same way pigz does.
+
+import os
+import bz2
+import time
+import zlib
+import zipfile
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ExportToDir_Engine import formatSize
+
+
+logger = logging.getLogger(__name__)
+
+
+#   Files larger than this are compressed in chunks
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+#   Deflate window used to prime each chunk from the previous one
+DEFLATE_WINDOW = 32 * 1024
+
+MAX_ZIP_WORKERS = 64
+
+#   Compression methods a policy can pick per member
+COMPRESS_STORE = "Store"
+COMPRESS_DEFLATE = "Deflate"
+COMPRESS_LZMA = "LZMA"
+COMPRESS_BZIP2 = "BZIP2"
+COMPRESS_TYPES = {COMPRESS_STORE: zipfile.ZIP_STORED,
+                  COMPRESS_DEFLATE: zipfile.ZIP_DEFLATED,
+                  COMPRESS_LZMA: zipfile.ZIP_LZMA,
+                  COMPRESS_BZIP2: zipfile.ZIP_BZIP2}
+
+#   Already compressed media that gains almost nothing from DEFLATE
+DEFAULT_STORE_EXTENSIONS = [".exr", ".jpg", ".jpeg", ".png", ".webp", ".gif",
+                            ".mp4", ".mov", ".m4v", ".mkv", ".avi", ".mxf", ".webm",
+                            ".mp3", ".aac", ".m4a", ".ogg",
+                            ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst"]
+
+#   Probe: first block is deflated at level 1, above this ratio the file is stored
+DEFAULT_PROBE_SIZE = 64 * 1024
+DEFAULT_PROBE_RATIO = 0.95
+
+
+def getCompressionPolicy(settings):
+    #   Returns sanitized policy settings with defaults for missing keys
+    settings = settings or {}
+
+    default = settings.get("Default", COMPRESS_DEFLATE)
+    if default not in COMPRESS_TYPES:
+        default = COMPRESS_DEFLATE
+
+    extensions = {}
+    for method in COMPRESS_TYPES:
+        if method in settings:
+            extList = settings.get(method)
+        elif method == COMPRESS_STORE:
+            extList = DEFAULT_STORE_EXTENSIONS
+        else:
+            extList = []
+        if not isinstance(extList, list):
+            extList = []
+        extensions[method] = [ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+                              for ext in extList if isinstance(ext, str) and ext]
+
+    try:
+        probeSize = int(settings.get("ProbeSize", DEFAULT_PROBE_SIZE))
+        probeRatio = float(settings.get("ProbeRatio", DEFAULT_PROBE_RATIO))
+    except (TypeError, ValueError):
+        probeSize = DEFAULT_PROBE_SIZE
+        probeRatio = DEFAULT_PROBE_RATIO
+
+    return {"Enabled": bool(settings.get("Enabled", True)),
+            "Default": default,
+            COMPRESS_STORE: extensions[COMPRESS_STORE],
+            COMPRESS_DEFLATE: extensions[COMPRESS_DEFLATE],
+            COMPRESS_LZMA: extensions[COMPRESS_LZMA],
+            COMPRESS_BZIP2: extensions[COMPRESS_BZIP2],
+            "EntropyProbe": bool(settings.get("EntropyProbe", True)),
+            "ProbeSize": max(probeSize, 1024),
+            "ProbeRatio": probeRatio}
+
+
+def getCompressor(method):
+    #   Streaming compressor for the non-deflate methods
+    if method == COMPRESS_BZIP2:
+        return bz2.BZ2Compressor()
+    if method == COMPRESS_LZMA:
+        return zipfile.LZMACompressor()
+
+    raise ValueError(f"No streaming compressor for {method}")
+
+
+#   Picks the zip compression method for each member from extension
+#   rules and a quick entropy probe of the first block
+class CompressionPolicy(object):
+    def __init__(self, settings=None):
+        self.settings = getCompressionPolicy(settings)
+
+        self.extensionMethods = {}
+        for method in COMPRESS_TYPES:
+            for ext in self.settings[method]:
+                self.extensionMethods[ext] = method
+
+
+    def getMethod(self, path, firstBlock=None):
+        if not self.settings["Enabled"]:
+            return COMPRESS_DEFLATE
+
+        ext = os.path.splitext(path)[1].lower()
+        if ext in self.extensionMethods:
+            return self.extensionMethods[ext]
+
+        if firstBlock and self.settings["EntropyProbe"] and self.isIncompressible(firstBlock):
+            return COMPRESS_STORE
+
+        return self.settings["Default"]
+
+
+    #   Deflating a sample at the fastest level is a cheap estimate of its entropy
+    def isIncompressible(self, block):
+        sample = block[:self.settings["ProbeSize"]]
+        if len(sample) < 1024:
+            return False
+
+        ratio = len(zlib.compress(sample, 1)) / len(sample)
+        return ratio >= self.settings["ProbeRatio"]
+
+
+def getZipWorkers(workers):
+    #   0 uses one worker per core
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers < 1:
+        workers = os.cpu_count() or 1
+
+    return min(workers, MAX_ZIP_WORKERS)
+
+
+def deflateData(data, level=zlib.Z_DEFAULT_COMPRESSION, zdict=None, final=True):
+    #   Raw deflate (no zlib header) as used inside zip archives
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    #   Non-final chunks end on a byte boundary so the streams can be joined
+    flushMode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+    return compressor.compress(data) + compressor.flush(flushMode)
+
+
+def _deflateTimed(data, level, zdict=None, final=True):
+    #   Worker job for one chunk, returns the deflate time for the policy report
+    startTime = time.perf_counter()
+    compressed = deflateData(data, level, zdict, final)
+    return compressed, time.perf_counter() - startTime
+
+
+def _compressFile(path, level, policy):
+    #   Worker job for a small file: read, checksum and compress by policy
+    with open(path, "rb") as srcFile:
+        data = srcFile.read()
+
+    method = policy.getMethod(path, data)
+    deflateTime = 0.0
+
+    if method == COMPRESS_STORE:
+        compressed = data
+    elif method == COMPRESS_DEFLATE:
+        compressed, deflateTime = _deflateTimed(data, level)
+    else:
+        compressor = getCompressor(method)
+        compressed = compressor.compress(data) + compressor.flush()
+
+    return len(data), zlib.crc32(data), compressed, method, deflateTime
+
+
+#   Totals used to report what the compression policy saved
+class ZipStats(object):
+    def __init__(self):
+        self.totalBytes = 0
+        self.archiveBytes = 0
+        self.storedFiles = 0
+        self.storedBytes = 0
+        self.deflatedBytes = 0
+        self.deflateTime = 0.0
+
+        #   Members in the finished archive, including those kept from an interrupted run
+        self.members = 0
+        self.resumedMembers = 0
+
+
+    def addMember(self, method, fileSize, compressSize, deflateTime):
+        self.totalBytes += fileSize
+        self.archiveBytes += compressSize
+        if method == COMPRESS_STORE:
+            self.storedFiles += 1
+            self.storedBytes += fileSize
+        elif method == COMPRESS_DEFLATE:
+            self.deflatedBytes += fileSize
+            self.deflateTime += deflateTime
+
+
+    #   Counts members restored from the journal of an interrupted run.  Their
+    #   deflate time is not known, so they do not change the time estimate.
+    def addResumed(self, members):
+        for member in members:
+            self.resumedMembers += 1
+            self.totalBytes += member["fsize"]
+            self.archiveBytes += member["csize"]
+            if member["type"] == zipfile.ZIP_STORED and not member["name"].endswith("/"):
+                self.storedFiles += 1
+                self.storedBytes += member["fsize"]
+
+
+    #   CPU seconds not spent deflating stored members, based on the measured deflate rate
+    def getTimeSaved(self):
+        if not self.deflatedBytes or not self.deflateTime:
+            return None
+        return self.storedBytes / (self.deflatedBytes / self.deflateTime)
+
+
+    def getSpaceSaved(self):
+        return self.totalBytes - self.archiveBytes
+
+
+    def getReport(self):
+        if self.members:
+            report = (f"Zipped {self.members} members ({formatSize(self.totalBytes)}), "
+                      f"saved {formatSize(max(self.getSpaceSaved(), 0))}")
+        else:
+            report = f"Zip saved {formatSize(max(self.getSpaceSaved(), 0))}"
+        if self.resumedMembers:
+            report += f", {self.resumedMembers} members kept from the interrupted export"
+        if self.storedFiles:
+            report += f", stored {self.storedFiles} files ({formatSize(self.storedBytes)})"
+            timeSaved = self.getTimeSaved()
+            if timeSaved is not None:
+                report += f" saving ~{timeSaved:.1f}s CPU"
+
+        return report
+
+
+def restoreMembers(zipFile, members):
+    #   Re-adds members already written by an interrupted export (see
+    #   TransferJournal.zipMemberDone) so they are kept in the central directory
+    for member in members:
+        zinfo = zipfile.ZipInfo(member["name"], tuple(member["date"]))
+        zinfo.compress_type = member["type"]
+        zinfo.flag_bits = member["flags"]
+        zinfo.external_attr = member["attr"]
+        zinfo.CRC = member["crc"]
+        zinfo.compress_size = member["csize"]
+        zinfo.file_size = member["fsize"]
+        zinfo.header_offset = member["offset"]
+        zinfo.create_version = member["cver"]
+        zinfo.extract_version = member["xver"]
+        zinfo.create_system = member["sys"]
+
+        zipFile.filelist.append(zinfo)
+        zipFile.NameToInfo[zinfo.filename] = zinfo
+
+
+class ParallelZipWriter(object):
+    def __init__(self, zipFile, workers=0, level=zlib.Z_DEFAULT_COMPRESSION, chunkSize=DEFAULT_CHUNK_SIZE,
+                 policy=None, token=None):
+        self.zipFile = zipFile
+        self.workers = getZipWorkers(workers)
+        self.level = level
+        self.chunkSize = chunkSize
+        self.policy = policy or CompressionPolicy()
+        self.stats = ZipStats()
+
+        #   Optional ControlToken checked between members and chunks
+        self.token = token
+
+        #   Number of jobs allowed in flight, bounds memory use
+        self.window = self.workers * 2
+
+
+    #   Writes manifest entries (path, relPath, size, isDir) to the archive.
+    #   progressCallback(numBytes) is called with the bytes of each written member or chunk.
+    #   memberCallback(entry, zinfo, endOffset) is called after each finished member.
+    def writeEntries(self, entries, progressCallback=None, memberCallback=None):
+        self.progressCallback = progressCallback
+        self.memberCallback = memberCallback
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ExportToDirZip") as executor:
+            self.executor = executor
+            pending = deque()
+
+            try:
+                for entry in entries:
+                    self.checkToken()
+                    if entry.isDir or entry.size > self.chunkSize:
+                        future = None
+                    else:
+                        future = executor.submit(_compressFile, entry.path, self.level, self.policy)
+                    pending.append((entry, future))
+
+                    while len(pending) > self.window:
+                        self._writeEntry(*pending.popleft())
+
+                while pending:
+                    self.checkToken()
+                    self._writeEntry(*pending.popleft())
+
+            except BaseException:
+                for entry, future in pending:
+                    if future:
+                        future.cancel()
+                raise
+
+            finally:
+                self.executor = None
+
+        logger.debug(self.stats.getReport())
+
+
+    def checkToken(self):
+        if self.token is not None:
+            self.token.check()
+
+
+    def _writeEntry(self, entry, future):
+        if entry.isDir:
+            self.zipFile.write(entry.path, arcname=entry.relPath)
+        else:
+            self._writeFileEntry(entry, future)
+
+        if self.memberCallback:
+            self.memberCallback(entry, self.zipFile.filelist[-1], self.zipFile.start_dir)
+
+
+    def _writeFileEntry(self, entry, future):
+        zinfo = zipfile.ZipInfo.from_file(entry.path, arcname=entry.relPath)
+
+        if future is not None:
+            fileSize, crc, compressed, method, deflateTime = future.result()
+            zinfo.file_size = fileSize
+            self.deflateTime = deflateTime
+            self._writeMember(zinfo, method, [(fileSize, compressed)], crc)
+        else:
+            self.deflateTime = 0.0
+            with open(entry.path, "rb") as srcFile:
+                firstChunk = srcFile.read(self.chunkSize)
+                method = self.policy.getMethod(entry.path, firstChunk)
+                chunks = self._compressChunks(srcFile, firstChunk, method)
+                self._writeMember(zinfo, method, chunks, None)
+
+
+    #   Reads a large file in chunks.  Deflate chunks are compressed in parallel,
+    #   other methods are streamed.  Yields (rawSize, compressedData) in order,
+    #   CRC is kept on self.chunkCrc
+    def _compressChunks(self, srcFile, firstChunk, method):
+        self.chunkCrc = 0
+        pending = deque()
+        chunk = firstChunk
+        zdict = None
+
+        if method not in (COMPRESS_STORE, COMPRESS_DEFLATE):
+            compressor = getCompressor(method)
+
+        while chunk:
+            self.checkToken()
+            nextChunk = srcFile.read(self.chunkSize)
+            self.chunkCrc = zlib.crc32(chunk, self.chunkCrc)
+
+            if method == COMPRESS_STORE:
+                yield len(chunk), chunk
+
+            elif method == COMPRESS_DEFLATE:
+                future = self.executor.submit(_deflateTimed, chunk, self.level, zdict, not nextChunk)
+                pending.append((len(chunk), future))
+                zdict = chunk[-DEFLATE_WINDOW:]
+
+                while len(pending) > self.window:
+                    yield self._getChunkResult(*pending.popleft())
+
+            else:
+                yield len(chunk), compressor.compress(chunk)
+
+            chunk = nextChunk
+
+        while pending:
+            yield self._getChunkResult(*pending.popleft())
+
+        #   Empty file still needs a valid deflate stream
+        if method == COMPRESS_DEFLATE and not firstChunk:
+            yield 0, deflateData(b"", self.level)
+
+        elif method not in (COMPRESS_STORE, COMPRESS_DEFLATE):
+            yield 0, compressor.flush()
+
+
+    def _getChunkResult(self, rawSize, future):
+        compressed, deflateTime = future.result()
+        self.deflateTime += deflateTime
+        return rawSize, compressed
+
+
+    #   Writes a member with already deflated data, mirroring ZipFile.open(mode="w")
+    def _writeMember(self, zinfo, method, dataChunks, crc):
+        zipFile = self.zipFile
+        fp = zipFile.fp
+
+        zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        zinfo.compress_type = COMPRESS_TYPES[method]
+        zinfo.flag_bits = 0x00
+        if method == COMPRESS_LZMA:
+            #   Compressed data includes an end-of-stream marker
+            zinfo.flag_bits |= 0x02
+        zinfo.compress_size = 0
+        zinfo.CRC = 0
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+
+        fp.seek(zipFile.start_dir)
+        zinfo.header_offset = fp.tell()
+        zipFile._writecheck(zinfo)
+        zipFile._didModify = True
+        fp.write(zinfo.FileHeader(zip64))
+
+        fileSize = 0
+        compressSize = 0
+        for rawSize, compressed in dataChunks:
+            fp.write(compressed)
+            fileSize += rawSize
+            compressSize += len(compressed)
+            if self.progressCallback:
+                self.progressCallback(rawSize)
+
+        if crc is None:
+            crc = self.chunkCrc
+
+        zinfo.file_size = fileSize
+        zinfo.compress_size = compressSize
+        zinfo.CRC = crc
+
+        if not zip64 and (fileSize > zipfile.ZIP64_LIMIT or compressSize > zipfile.ZIP64_LIMIT):
+            raise RuntimeError(f"File size too large for zip without ZIP64: {zinfo.filename}")
+
+        #   Rewrites the header with the final CRC and sizes
+        zipFile.start_dir = fp.tell()
+        fp.seek(zinfo.header_offset)
+        fp.write(zinfo.FileHeader(zip64))
+        fp.seek(zipFile.start_dir)
+
+        zipFile.filelist.append(zinfo)
+        zipFile.NameToInfo[zinfo.filename] = zinfo
+
+        self.stats.addMember(method, fileSize, compressSize, self.deflateTime)
@@ -41,14 +41,9 @@
 
 
 import os
-import shutil
-import re
 import subprocess
-import threading
-import zipfile
-import tempfile
-import json
 import ntpath
+import threading
 import logging
 from datetime import datetime
 
@@ -62,11 +57,35 @@ from PrismUtils.Decorators import err_catcher_plugin as err_catcher
 logger = logging.getLogger(__name__)
 
 from ExportToDir import ExportToDir
+from ExportToDir_Journal import getJournalPath
+from ExportToDir_Template import (DATE_FORMAT, resolveTemplate, getTemplateErrors, sanitizeName, isReservedName,
+                                  getOutputFilename)
+from ExportToDir_Runner import ExportRunner, STATE_COMPLETE, STATE_ERROR, STATE_CANCELLED
+from ExportToDir_Settings import SettingsStore
+from ExportToDir_Telemetry import TELEMETRY_FILENAME, readRecords, getSummaryText, getAverageThroughput
+from ExportToDir_Preflight import estimateExport, combineEstimates, checkFreeSpace, getSpaceReport
+from ExportToDir_Sequence import getFrameNumbers, getFrameNames, selectFrames, formatFrameRanges
+from ExportToDir_Queue import (JobQueue, ExportJob, PRIORITIES, DEFAULT_PRIORITY, JOB_RUNNING, JOB_FAILED,
+                               JOB_CANCELLED, JOB_INTERRUPTED, FINISHED_STATES, getQueueFilename)
+from ExportToDir_Zip import MAX_ZIP_WORKERS, getCompressionPolicy
+from ExportToDir_Filter import (FILTER_TYPES, PATTERN_SEPARATOR, getFilterRules, getFilterErrors, parsePatterns,
+                                formatPatterns)
+from ExportToDir_Verify import HASH_ALGORITHMS, MANIFEST_FORMATS, getVerifySettings
+from ExportToDir_Engine import (COPY_ENGINES, BUFFER_SIZES, MAX_WORKERS, MAX_DEST_JOBS, ZIP_MODES, LINK_MODES,
+                                getEngineSettings, getWorkerCount)
 
 #   Colors for Progress Bar
 PROG_GREEN = "QProgressBar::chunk { background-color: rgb(0, 150, 0); }"
 PROG_BLUE = "QProgressBar::chunk { background-color: rgb(0, 131, 195); }"
 PROG_RED = "QProgressBar::chunk { background-color: rgb(225, 0, 0); }"
+PROG_GREY = "QProgressBar::chunk { background-color: rgb(120, 120, 120); }"
+
+TEMPLATE_INVALID = "QLineEdit { border: 1px solid rgb(225, 0, 0); }"
+
+#   Progress bar color for each end state of an export
+STATE_COLORS = {STATE_COMPLETE: PROG_GREEN,
+                STATE_ERROR: PROG_RED,
+                STATE_CANCELLED: PROG_GREY}
 
 
 class Prism_ExportToDir_Functions(object):
@@ -76,13 +95,37 @@ class Prism_ExportToDir_Functions(object):
 
         self.loadedPlugins = []
         self.singleFileMode = True
+        #   File data of each item when exporting a multi-selection
+        self.batchItems = None
+        #   Project data cached per project (see getProjectName)
+        self.projectCache = {}
 
         #   Global Settings File Data
         pluginLocation = os.path.dirname(os.path.dirname(__file__))
         self.settingsFile = os.path.join(pluginLocation, "ExportToDir_Config.json")
+        self.telemetryFile = os.path.join(pluginLocation, TELEMETRY_FILENAME)
+        #   Cached, debounced access to the (possibly shared) settings file
+        self.settingsStore = SettingsStore(self.settingsFile)
 
         self.loadSettings()
 
+        #   Shows export errors from the main thread
+        self.errorRelay = ExportErrorRelay(self.core)
+
+        #   Export job queue.  Waiting jobs left by a previous session are started
+        #   again, interrupted ones only when the user confirms.
+        self.jobDialogs = {}
+        self.jobQueue = JobQueue(self.getQueuePath(), self.runJob, self.engineSettings["JobsPerDestination"])
+        self.jobQueue.load()
+        self.jobQueue.schedule()
+        if self.jobQueue.getInterruptedJobs() and getattr(self.core, "uiAvailable", True):
+            QTimer.singleShot(0, self.promptInterruptedJobs)
+
+        #   Running jobs are interrupted (and can be resumed) when Prism closes
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.jobQueue.shutdown)
+
         #   Callbacks      
         self.core.registerCallback("projectWidgetGetContextMenu", self.projectWidgetGetContextMenu, plugin=self)      
         self.core.registerCallback("openPBAssetContextMenu", self.openPBAssetContextMenu, plugin=self)   
@@ -93,6 +136,40 @@ class Prism_ExportToDir_Functions(object):
         self.core.registerCallback("textureLibraryTextureContextMenuRequested", self.textureLibraryTextureContextMenuRequested, plugin=self)
         self.core.registerCallback("userSettings_loadUI", self.userSettings_loadUI, plugin=self)
         self.core.registerCallback("onUserSettingsSave", self.onUserSettingsSave, plugin=self)
+        self.core.registerCallback("onProjectChanged", self.onProjectChanged, plugin=self)
+
+
+    #   The queue is kept per user and machine in the Prism user prefs,
+    #   the plugin directory may be shared by everyone
+    @err_catcher(name=__name__)
+    def getQueuePath(self):
+        try:
+            queueDir = self.core.getUserPrefDir()
+        except AttributeError:
+            queueDir = os.path.dirname(os.path.dirname(__file__))
+
+        return os.path.join(queueDir, getQueueFilename())
+
+
+    #   Asks before resuming this user's exports that were running when Prism closed
+    @err_catcher(name=__name__)
+    def promptInterruptedJobs(self):
+        jobs = self.jobQueue.getInterruptedJobs()
+        if not jobs:
+            return
+
+        reply = QMessageBox.question(
+            None,
+            "Interrupted Exports",
+            f"{len(jobs)} exports were interrupted when Prism closed:\n\n"
+            f"{chr(10).join(job.name for job in jobs[:10])}\n\n"
+            f"Do you want to resume them now?\n\n"
+            f"(No keeps them in the Export Queue, where they can be resumed or removed)",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if reply == QMessageBox.Yes:
+            self.jobQueue.resumeInterrupted([job.jobId for job in jobs])
 
 
     # if returns true, the plugin will be loaded by Prism
@@ -110,33 +187,13 @@ class Prism_ExportToDir_Functions(object):
     # #   Called with Callback - Project Widget
     @err_catcher(name=__name__)
     def projectWidgetGetContextMenu(self, origin, menu):
+        pdata = origin.data
 
-        self.menuContext = "Project Files:"
-        self.singleFileMode = False
-        fileData = {}
-
-        try:
-            logger.debug("Loading Project Data")
-
-            pdata = origin.data
-            fileData["project_name"] = pdata["name"]
-            fileData["filename"] = pdata["name"]
-            fileData["sourcePath"] = os.path.dirname(os.path.dirname(pdata["configPath"]))
-            fileData["user"] = self.core.user
-
-        except Exception as e:
-            msg = f"Error accessing Project Data {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot access Project Data: {msg}")
-
-        #   Sends File Info to get sorted
-        self.sortData(fileData)
-
-        #   Adds Right Click Item
-        if os.path.exists(fileData["sourcePath"]):
-            exportToAct = QAction("Export to Dir...", menu)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            menu.addAction(exportToAct)
+        #   Adds Right Click Item, data is gathered when clicked
+        exportToAct = QAction("Export to Dir...", menu)
+        exportToAct.triggered.connect(lambda: self.exportItem("Project Files:", False,
+                                                              lambda: self.getProjectFileData(pdata)))
+        menu.addAction(exportToAct)
 
 
     #   Called with Callback - Asset Browser
@@ -150,53 +207,22 @@ class Prism_ExportToDir_Functions(object):
             except:
                 return
 
-        self.menuContext = "Shot Files:"
-        self.singleFileMode = False
-        fileData = {}
-
-        #   Retrieves Asset Info
-        try:
-            logger.debug("Loading Shot Data")
-
-            shotData = cItem.data(0, Qt.UserRole)
+        shotData = cItem.data(0, Qt.UserRole)
 
-            entity = self.core.pb.sceneBrowser.getCurrentEntity()
-            shotPath = self.core.getEntityPath(entity=entity)
+        #   Adds Right Click Item, data is gathered when clicked
+        exportToAct = QAction("Export to Dir...", rcmenu)
+        exportToAct.triggered.connect(lambda: self.exportItem("Shot Files:", False,
+                                                              lambda: self.getShotFileData(shotData)))
+        rcmenu.addAction(exportToAct)
 
-            sequence = shotData["sequence"]
-            shot = shotData["shot"]
-
-            fileData["filename"] = f"{sequence}--{shot}"
-            fileData["sourcePath"] = shotPath
-            fileData["sequence"] = sequence
-            fileData["shot"] = shot
-            fileData["sourceFilename"] = shot
-            fileData["user"] = self.core.user
-
-        except Exception as e:
-            msg = f"Error accessing Shot Data {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot access Shot Data: {msg}")
-
-        #   Retrieves File Info from Project Config
-        try:
-            logger.debug("Loading Project Data")
-            pData = self.core.getConfig(config="project", dft=3)        
-            fileData["project_name"] = pData["globals"]["project_name"]
-
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot load Project Data: {msg}")
-
-        #   Sends File Info to get sorted
-        self.sortData(fileData)
-
-        #   Adds Right Click Item
-        if os.path.exists(fileData["sourcePath"]):
-            exportToAct = QAction("Export to Dir...", rcmenu)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            rcmenu.addAction(exportToAct)
+        #   Adds Batch Item if several Shots are selected
+        selectedShots = self.getSelectedEntities(origin, "shot")
+        if len(selectedShots) > 1:
+            batchAct = QAction(f"Export {len(selectedShots)} Shots to Dir...", rcmenu)
+            batchAct.triggered.connect(lambda: self.exportBatchDialogue("Shot Files:", False,
+                                                                        self.getBatchItems(self.getShotFileData,
+                                                                                           selectedShots)))
+            rcmenu.addAction(batchAct)
 
 
     #   Called with Callback - Asset Browser
@@ -211,86 +237,32 @@ class Prism_ExportToDir_Functions(object):
             except:
                 return
 
-        self.menuContext = "Asset Files:"
-        self.singleFileMode = False
-        fileData = {}
-
-        #   Retrieves Asset Info
-        try:
-            logger.debug("Loading Asset Data")
+        assetData = cItem.data(0, Qt.UserRole)
 
-            assetData = cItem.data(0, Qt.UserRole)
-            
-            fileData["filename"] = assetData["asset"]
-            fileData["sourcePath"] = assetData["paths"][0]
-            fileData["asset"] = assetData["asset"]
-            fileData["sourceFilename"] = assetData["asset"]
-            fileData["user"] = self.core.user
+        #   Adds Right Click Item, data is gathered when clicked
+        exportToAct = QAction("Export to Dir...", rcmenu)
+        exportToAct.triggered.connect(lambda: self.exportItem("Asset Files:", False,
+                                                              lambda: self.getAssetFileData(assetData)))
+        rcmenu.addAction(exportToAct)
 
-        except Exception as e:
-            msg = f"Error accessing Asset Data {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot access Asset Data: {msg}")
-
-        #   Retrieves File Info from Project Config
-        try:
-            logger.debug("Loading Project Data")
-            pData = self.core.getConfig(config="project", dft=3)        
-            fileData["project_name"] = pData["globals"]["project_name"]
-
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot load Project Data: {msg}")
-
-        #   Sends File Info to get sorted
-        self.sortData(fileData)
-
-        #   Adds Right Click Item
-        if os.path.exists(fileData["sourcePath"]):
-            exportToAct = QAction("Export to Dir...", rcmenu)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            rcmenu.addAction(exportToAct)
+        #   Adds Batch Item if several Assets are selected
+        selectedAssets = self.getSelectedEntities(origin, "asset")
+        if len(selectedAssets) > 1:
+            batchAct = QAction(f"Export {len(selectedAssets)} Assets to Dir...", rcmenu)
+            batchAct.triggered.connect(lambda: self.exportBatchDialogue("Asset Files:", False,
+                                                                        self.getBatchItems(self.getAssetFileData,
+                                                                                           selectedAssets)))
+            rcmenu.addAction(batchAct)
 
 
     #   Called with Callback - SceneFiles Browser
     @err_catcher(name=__name__)
     def openPBFileContextMenu(self, origin, rcmenu, filePath):
-        self.menuContext = "Scene Files:"
-        self.singleFileMode = True
-        fileData = None
-
-        #   Retrieves File Info from Core
-        try:
-            logger.debug("Loading Scene Data")
-            fileData = self.core.getScenefileData(filePath)
-            fileData["sourceDir"], fileData["sourceFilename"] = ntpath.split(fileData["filename"])
-            fileData["sourcePath"] = fileData["filename"]
-
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot load Scene Data: {msg}")
-
-        #   Retrieves File Info from Project Config
-        try:
-            logger.debug("Loading Project Data")
-            pData = self.core.getConfig(config="project", dft=3)        
-            fileData["project_name"] = pData["globals"]["project_name"]
-
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot load Project Data: {msg}")
-
-        #   Sends File Info to get sorted
-        self.sortData(fileData)
-
-        #   Adds Right Click Item
-        if os.path.isfile(fileData["filename"]):
-            exportToAct = QAction("Export to Dir...", rcmenu)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            rcmenu.addAction(exportToAct)
+        #   Adds Right Click Item, data is gathered when clicked
+        exportToAct = QAction("Export to Dir...", rcmenu)
+        exportToAct.triggered.connect(lambda: self.exportItem("Scene Files:", True,
+                                                              lambda: self.getSceneFileData(filePath)))
+        rcmenu.addAction(exportToAct)
 
 
     #   Called with Callback - Product Browser
@@ -302,43 +274,30 @@ class Prism_ExportToDir_Functions(object):
             return
         if viewUi != origin.tw_versions:
             return
-        
-        self.menuContext = "Product Files:"
-        self.singleFileMode = True
-        fileData = None
 
-        try:
-            logger.debug("Loading Product Data")
-            #   Gets Source Path from Last Column
-            row = viewUi.rowAt(pos.y())
-            numCols = viewUi.columnCount()
-            if row >= 0:
-                sourcePath = viewUi.item(row, numCols - 1).text()
-
-            #   Retrieves File Info        
-            infoFolder = self.core.products.getVersionInfoPathFromProductFilepath(sourcePath)
-            infoPath = self.core.getVersioninfoPath(infoFolder)
-            fileData = self.core.getConfig(configPath=infoPath)
-
-            fileData["project_name"] = self.core.projectName
-            fileData["sourcePath"] = sourcePath
-            fileData["sourceDir"], fileData["sourceFilename"] = ntpath.split(sourcePath)
-            fileData["extension"] = os.path.splitext(fileData["sourceFilename"])[1]
-
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: Failed to Load Product Data: {msg}")
+        #   Gets Source Path from Last Column
+        row = viewUi.rowAt(pos.y())
+        numCols = viewUi.columnCount()
+        if row < 0 or not viewUi.item(row, numCols - 1):
             return
-        
-        #   Sends File Info to get sorted
-        self.sortData(fileData)
-
-        #   Adds Right Click Item
-        if os.path.exists(sourcePath):
-            exportToAct = QAction("Export to Dir...", viewUi)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            rcmenu.addAction(exportToAct)
+        sourcePath = viewUi.item(row, numCols - 1).text()
+
+        #   Adds Right Click Item, data is gathered when clicked
+        exportToAct = QAction("Export to Dir...", viewUi)
+        exportToAct.triggered.connect(lambda: self.exportItem("Product Files:", True,
+                                                              lambda: self.getProductFileData(sourcePath)))
+        rcmenu.addAction(exportToAct)
+
+        #   Adds Batch Item if several Versions are selected
+        selectedRows = sorted({index.row() for index in viewUi.selectedIndexes()})
+        productPaths = [viewUi.item(row, numCols - 1).text() for row in selectedRows
+                        if viewUi.item(row, numCols - 1)]
+        if len(productPaths) > 1:
+            batchAct = QAction(f"Export {len(productPaths)} Versions to Dir...", viewUi)
+            batchAct.triggered.connect(lambda: self.exportBatchDialogue("Product Files:", True,
+                                                                        self.getBatchItems(self.getProductFileData,
+                                                                                           productPaths)))
+            rcmenu.addAction(batchAct)
         
 
     #   Called with Callback - Media Browser
@@ -352,95 +311,234 @@ class Prism_ExportToDir_Functions(object):
         if not version:
             return 
 
-        self.menuContext = "Media Files:"
-        fileData = None
-
         if not origin.seq:
             return
 
-        try:
-            logger.debug("Loading Media Data")
-            #   Retrieves some File Data
-            rawData = origin.getSelectedContexts()
-            if rawData and isinstance(rawData[0], dict):
-                fileData = rawData[0]
-            else:
-                fileData = {}
+        #   Keeps the sequence and frame shown now, the rest is gathered when clicked
+        seq = list(origin.seq)
+        currentFrame = origin.getCurrentFrame()
+        contexts = origin.getSelectedContexts()
+
+        exportToAct = QAction("Export to Dir...", self.core.pb.mediaBrowser)
+        exportToAct.triggered.connect(lambda: self.exportItem("Media Files:", len(seq) < 2,
+                                                              lambda: self.getMediaFileData(seq, currentFrame,
+                                                                                            contexts)))
+        menu.addAction(exportToAct)
+
+
+    #   Called with Callback - Library Browser
+    @err_catcher(name=__name__)                                             #   TODO Handle Tex Groups
+    def textureLibraryTextureContextMenuRequested(self, origin, menu):
+
+        if not type(origin).__name__ == "TextureWidget":
+            return
+
+        sourcePath = origin.path
+
+        exportToAct = QAction("Export to Dir...", self.core.pb.mediaBrowser)
+        exportToAct.triggered.connect(lambda: self.exportItem("Library Files:", True,
+                                                              lambda: self.getLibraryFileData(sourcePath)))
+        menu.addAction(exportToAct)
+
+
+    #   Called with Callback - clears project data cached for the last project
+    @err_catcher(name=__name__)
+    def onProjectChanged(self, origin):
+        self.projectCache = {}
+
+
+    #   Project data read once per project.  Keyed by the project config path
+    #   so a stale entry is never used after a project switch.
+    @err_catcher(name=__name__)
+    def getProjectName(self):
+        projectKey = getattr(self.core, "prismIni", None) or self.core.projectName
+
+        if projectKey not in self.projectCache:
+            logger.debug("Loading Project Data")
+            pData = self.core.getConfig(config="project", dft=3)
+            self.projectCache = {projectKey: {"project_name": pData["globals"]["project_name"]}}
+
+        return self.projectCache[projectKey]["project_name"]
 
-            fileData["sourceDir"] = fileData["path"]
-            fileData["extension"] = os.path.splitext(fileData["source"])[1]
+
+    #   Runs when a menu item is clicked:  gathers the item data, checks the
+    #   source and opens the Export dialogue
+    @err_catcher(name=__name__)
+    def exportItem(self, menuContext, singleFileMode, getFileData):
+        try:
+            fileData = getFileData()
 
         except Exception as e:
-            msg = f"Error Getting File Context Info {str(e)}"
+            msg = f"Error accessing {menuContext.rstrip(':')} Data {str(e)}"
             self.core.popup(msg)
-            logger.warning(f"ERROR: Cannot Load Media Data: {e}")
+            logger.warning(f"ERROR: {msg}")
+            return
+
+        sourcePath = fileData["sourcePath"]
+        if isinstance(sourcePath, list):
+            sourcePath = sourcePath[0]
+        if not os.path.exists(sourcePath):
+            self.core.popup(f"The source could not be found:\n\n{sourcePath}")
+            return
+
+        self.menuContext = menuContext
+        self.singleFileMode = singleFileMode
+        self.sortData(fileData)
+        self.exportToDialogue()
+
+
+    def getProjectFileData(self, pdata):
+        fileData = {}
+        fileData["project_name"] = pdata["name"]
+        fileData["filename"] = pdata["name"]
+        fileData["sourcePath"] = os.path.dirname(os.path.dirname(pdata["configPath"]))
+        fileData["user"] = self.core.user
+
+        return fileData
+
+
+    def getShotFileData(self, shotData):
+        sequence = shotData["sequence"]
+        shot = shotData["shot"]
+
+        fileData = {}
+        fileData["filename"] = f"{sequence}--{shot}"
+        fileData["sourcePath"] = self.core.getEntityPath(entity=shotData)
+        fileData["sequence"] = sequence
+        fileData["shot"] = shot
+        fileData["sourceFilename"] = shot
+        fileData["user"] = self.core.user
+        fileData["project_name"] = self.getProjectName()
+
+        return fileData
+
+
+    def getAssetFileData(self, assetData):
+        fileData = {}
+        fileData["filename"] = assetData["asset"]
+        fileData["sourcePath"] = assetData["paths"][0]
+        fileData["asset"] = assetData["asset"]
+        fileData["sourceFilename"] = assetData["asset"]
+        fileData["user"] = self.core.user
+        fileData["project_name"] = self.getProjectName()
+
+        return fileData
+
+
+    def getSceneFileData(self, filePath):
+        fileData = self.core.getScenefileData(filePath)
+        fileData["sourceDir"], fileData["sourceFilename"] = ntpath.split(fileData["filename"])
+        fileData["sourcePath"] = fileData["filename"]
+        fileData["project_name"] = self.getProjectName()
+
+        return fileData
+
+
+    def getProductFileData(self, sourcePath):
+        #   Retrieves File Info
+        infoFolder = self.core.products.getVersionInfoPathFromProductFilepath(sourcePath)
+        infoPath = self.core.getVersioninfoPath(infoFolder)
+        fileData = self.core.getConfig(configPath=infoPath) or {}
+
+        fileData["project_name"] = self.core.projectName
+        fileData["sourcePath"] = sourcePath
+        fileData["sourceDir"], fileData["sourceFilename"] = ntpath.split(sourcePath)
+        fileData["extension"] = os.path.splitext(fileData["sourceFilename"])[1]
+
+        return fileData
+
+
+    def getMediaFileData(self, seq, currentFrame, contexts):
+        #   Retrieves some File Data
+        if contexts and isinstance(contexts[0], dict):
+            fileData = dict(contexts[0])
+        else:
+            fileData = {}
+
+        fileData["sourceDir"] = fileData["path"]
+        fileData["extension"] = os.path.splitext(fileData["source"])[1]
 
         #   If the item is a single file
-        if len(origin.seq) < 2:
-            self.singleFileMode = True
-            fileData["sourcePath"] = origin.seq[0]
-            fileData["sourceFilename"] = os.path.basename(origin.seq[0])
+        if len(seq) < 2:
+            fileData["sourcePath"] = seq[0]
+            fileData["sourceFilename"] = os.path.basename(seq[0])
 
         #   If the item is an Image Sequence
-        elif len(origin.seq) > 1:
-            self.singleFileMode = False
-            fileData["currentFrame"] = os.path.basename(origin.seq[origin.getCurrentFrame()])
+        else:
+            fileData["currentFrame"] = os.path.basename(seq[currentFrame])
             filenameNoExt = os.path.splitext(fileData["currentFrame"])[0]
             fileData["frameNumber"] = os.path.splitext(filenameNoExt)[1]
             fileData["sourceFilename"] = fileData["source"]
+            fileData["sourcePath"] = list(seq)
 
-            fileList = []
-            for file in origin.seq:
-                fileList.append(file)
-            fileData["sourcePath"] = fileList
+        return fileData
 
-        self.sortData(fileData)
 
-        exportToAct = QAction("Export to Dir...", self.core.pb.mediaBrowser)
-        exportToAct.triggered.connect(lambda: self.exportToDialogue())
-        menu.addAction(exportToAct)
+    def getLibraryFileData(self, sourcePath):                           #   TODO    Still want to get more Details
+        sourceDir = os.path.dirname(sourcePath)
+        sourceBasename = os.path.basename(sourcePath)
+        sourceFilename, sourceExt = os.path.splitext(sourceBasename)
 
+        fileData = {}
+        fileData["project_name"] = self.getProjectName()
+        fileData["sourcePath"] = sourcePath
+        fileData["sourceDir"] = sourceDir
+        fileData["sourceFilename"] = sourceFilename
+        fileData["extension"] = sourceExt
+        fileData["user"] = self.core.user
 
-    #   Called with Callback - Library Browser
-    @err_catcher(name=__name__)                                             #   TODO Handle Tex Groups
-    def textureLibraryTextureContextMenuRequested(self, origin, menu):
+        return fileData
 
-        if not type(origin).__name__ == "TextureWidget":
-            return
-        
-        self.menuContext = "Library Files:"
-        self.singleFileMode = True
 
-        logger.debug("Loading Library Data")
+    #   Returns the data of the selected entities of entityType in a Browser tree
+    @err_catcher(name=__name__)
+    def getSelectedEntities(self, origin, entityType):
+        try:
+            selectedItems = origin.tw_tree.selectedItems()
+        except AttributeError:
+            return []
 
-        try:                                                            #   TODO    Still want to get more Details
-            sourcePath = origin.path
-            sourceDir = os.path.dirname(sourcePath)
-            sourceBasename = os.path.basename(sourcePath)
-            sourceFilename, sourceExt = os.path.splitext(sourceBasename)
+        entities = []
+        for item in selectedItems:
+            itemData = item.data(0, Qt.UserRole)
+            if isinstance(itemData, dict) and itemData.get("type") == entityType:
+                entities.append(itemData)
 
-            fileData = {}
+        return entities
 
-            pData = self.core.getConfig(config="project", dft=3)        
-            fileData["project_name"] = pData["globals"]["project_name"]
 
-            fileData["sourcePath"] = sourcePath
-            fileData["sourceDir"] = sourceDir
-            fileData["sourceFilename"] = sourceFilename
-            fileData["extension"] = sourceExt
-            fileData["user"] = self.core.user
+    #   Batch file data for the selected items, gathered when the batch is started.
+    #   Items that cannot be read are left out.
+    @err_catcher(name=__name__)
+    def getBatchItems(self, getFileData, selection):
+        batchItems = []
+        for item in selection:
+            try:
+                batchItems.append(getFileData(item))
+            except Exception as e:
+                logger.warning(f"ERROR: Cannot access item data for batch export: {e}")
 
-        except Exception as e:
-            msg = f"Error opening Config File {str(e)}"
-            self.core.popup(msg)
-            logger.warning(f"ERROR: {msg}")
+        return batchItems
 
-        self.sortData(fileData)        
-            
-        if os.path.isfile(fileData["sourcePath"]):
-            exportToAct = QAction("Export to Dir...", self.core.pb.mediaBrowser)
-            exportToAct.triggered.connect(lambda: self.exportToDialogue())
-            menu.addAction(exportToAct)
+
+    #   Opens the Export dialogue for several items.  Each item is named with
+    #   the template and all are exported to the same directory.
+    @err_catcher(name=__name__)
+    def exportBatchDialogue(self, menuContext, singleFileMode, batchItems):
+        batchItems = [item for item in batchItems if os.path.exists(item["sourcePath"])]
+        if not batchItems:
+            self.core.popup("None of the selected items could be found.")
+            return
+
+        self.menuContext = menuContext
+        self.singleFileMode = singleFileMode
+        self.batchItems = batchItems
+        self.sortData(batchItems[0])
+
+        try:
+            self.exportToDialogue()
+        finally:
+            self.batchItems = None
 
 
     #   Called with Callback
@@ -477,7 +575,8 @@ class Prism_ExportToDir_Functions(object):
             "@PRODUCT@": ["Product"],
             "@AOV@": ["Media"],
             "@CHANNEL@": ["Media"],
-            "@IDENTIFIER@": ["Media"]
+            "@IDENTIFIER@": ["Media"],
+            "@FRAME@": ["Media"]
             }
 
         # Add Text Boxes
@@ -549,6 +648,45 @@ class Prism_ExportToDir_Functions(object):
 
         # Add the "File Naming Template" box before the "Export to Dir" group box
         origin.lo_exportTo.addWidget(gb_fileNamingTemplate)
+
+        # Add the "Export Filters" box below the templates
+        gb_exportFilters = QGroupBox("Export Filters                         (files left out of Project, Asset and Shot exports)")
+        lo_exportFilters = QGridLayout()
+        gb_exportFilters.setLayout(lo_exportFilters)
+
+        lo_exportFilters.addWidget(QLabel("Include:"), 0, 1)
+        lo_exportFilters.addWidget(QLabel("Exclude:"), 0, 2)
+
+        filterTip = ("Patterns separated by \"{separator}\".  Globs without \"/\" match file and directory\n"
+                     "names at any depth (*.bak, autosave), globs with \"/\" match the path from\n"
+                     "the export root (*/renders/*).  A trailing \"/\" only matches directories\n"
+                     "(cache/).  Regular expressions start with \"re:\" (re:_v\\d+_backup).\n\n"
+                     "Excluded directories are skipped without being read.  If Include has\n"
+                     "patterns, only matching files (or files in matching directories) are exported."
+                     ).format(separator=PATTERN_SEPARATOR)
+
+        self.filterEdits = {}
+        for row, filterType in enumerate(FILTER_TYPES, start=1):
+            e_include = QLineEdit()
+            e_exclude = QLineEdit()
+            e_include.setText(formatPatterns(self.filterRules[filterType]["Include"]))
+            e_exclude.setText(formatPatterns(self.filterRules[filterType]["Exclude"]))
+
+            lo_exportFilters.addWidget(QLabel(filterType), row, 0)
+            lo_exportFilters.addWidget(e_include, row, 1)
+            lo_exportFilters.addWidget(e_exclude, row, 2)
+
+            #   Checks patterns while they are edited
+            for lineEdit in (e_include, e_exclude):
+                lineEdit.textChanged.connect(lambda text, lineEdit=lineEdit: self.validateFilter(lineEdit, filterTip))
+                self.validateFilter(lineEdit, filterTip)
+
+            self.filterEdits[filterType] = (e_include, e_exclude)
+
+        lo_exportFilters.setColumnStretch(1, 1)
+        lo_exportFilters.setColumnStretch(2, 1)
+        origin.lo_exportTo.addWidget(gb_exportFilters)
+
         spacer = QSpacerItem(20, 20, QSizePolicy.Minimum, QSizePolicy.Fixed)
         origin.lo_exportTo.addItem(spacer)
 
@@ -557,7 +695,7 @@ class Prism_ExportToDir_Functions(object):
         lo_exportTo = QVBoxLayout()
         gb_exportTo.setLayout(lo_exportTo)
 
-        headerLabels = ["Name", "Path"]
+        headerLabels = ["Name", "Path", "Workers"]
         self.tw_exportTo = QTableWidget()
         self.tw_exportTo.setColumnCount(len(headerLabels))
         self.tw_exportTo.setHorizontalHeaderLabels(headerLabels)
@@ -613,15 +751,26 @@ class Prism_ExportToDir_Functions(object):
         self.e_naming_MediaFiles.setText(namingTemplateData.get("Media Files:", ""))
         self.e_naming_LibraryFiles.setText(namingTemplateData.get("Library Files:", ""))
 
+        #   Checks templates while they are edited
+        for name in ["ProjectFiles", "AssetFiles", "ShotFiles", "SceneFiles", "ProductFiles", "MediaFiles",
+                     "LibraryFiles"]:
+            lineEdit = getattr(self, f"e_naming_{name}")
+            tip = lineEdit.toolTip()
+            lineEdit.textChanged.connect(lambda text, lineEdit=lineEdit, tip=tip: self.validateTemplate(lineEdit, tip))
+            self.validateTemplate(lineEdit, tip)
+
         for item in self.exportPaths:
             row_position = self.tw_exportTo.rowCount()
             self.tw_exportTo.insertRow(row_position)
             self.tw_exportTo.setItem(row_position, 0, QTableWidgetItem(item.get("Name", "")))
             self.tw_exportTo.setItem(row_position, 1, QTableWidgetItem(item.get("Path", "")))
+            self.tw_exportTo.setItem(row_position, 2, QTableWidgetItem(self.formatWorkers(item.get("Workers", 0))))
 
         #   Tooltips
         tip = ("Directories that will be available in ExportToDir in addition to Project Locations.\n\n"
-               "Short Name will be displayed in the right-click menu."
+               "Short Name will be displayed in the right-click menu.\n\n"
+               "Workers is the number of files copied at once to that directory\n"
+               "(Auto uses the Local or Network worker count below)."
                 )
         self.tw_exportTo.setToolTip(tip)
 
@@ -645,10 +794,210 @@ class Prism_ExportToDir_Functions(object):
         # Connect item selection changed signal to the method
         self.tw_exportTo.itemSelectionChanged.connect(lambda: self.updateButtonStates(b_moveItemUp, b_moveItemDn, b_removeoexportTo))
 
+        # Add the "Copy Engine" group box
+        gb_copyEngine = QGroupBox("Copy Engine")
+        lo_copyEngine = QGridLayout()
+        gb_copyEngine.setLayout(lo_copyEngine)
+
+        l_copyEngine = QLabel("Engine:")
+        self.cb_copyEngine = QComboBox()
+        self.cb_copyEngine.addItems(COPY_ENGINES)
+
+        l_bufferSize = QLabel("Buffer Size:")
+        self.cb_bufferSize = QComboBox()
+        for size in BUFFER_SIZES:
+            self.cb_bufferSize.addItem(f"{size} MB", size)
+
+        lo_copyEngine.addWidget(l_copyEngine, 0, 0)
+        lo_copyEngine.addWidget(self.cb_copyEngine, 0, 1)
+        l_localWorkers = QLabel("Local Workers:")
+        self.sp_localWorkers = QSpinBox()
+        self.sp_localWorkers.setRange(1, MAX_WORKERS)
+        self.sp_localWorkers.setValue(self.engineSettings["LocalWorkers"])
+
+        l_networkWorkers = QLabel("Network Workers:")
+        self.sp_networkWorkers = QSpinBox()
+        self.sp_networkWorkers.setRange(1, MAX_WORKERS)
+        self.sp_networkWorkers.setValue(self.engineSettings["NetworkWorkers"])
+
+        l_zipMode = QLabel("Zip Mode:")
+        self.cb_zipMode = QComboBox()
+        self.cb_zipMode.addItems(ZIP_MODES)
+        zipModeIndex = self.cb_zipMode.findText(self.engineSettings["ZipMode"])
+        if zipModeIndex != -1:
+            self.cb_zipMode.setCurrentIndex(zipModeIndex)
+
+        l_zipWorkers = QLabel("Zip Workers:")
+        self.sp_zipWorkers = QSpinBox()
+        self.sp_zipWorkers.setRange(0, MAX_ZIP_WORKERS)
+        self.sp_zipWorkers.setSpecialValueText("Auto")
+        self.sp_zipWorkers.setValue(self.engineSettings["ZipWorkers"])
+
+        l_destJobs = QLabel("Jobs per Destination:")
+        self.sp_destJobs = QSpinBox()
+        self.sp_destJobs.setRange(1, MAX_DEST_JOBS)
+        self.sp_destJobs.setValue(self.engineSettings["JobsPerDestination"])
+
+        l_linkMode = QLabel("Link Mode:")
+        self.cb_linkMode = QComboBox()
+        self.cb_linkMode.addItems(LINK_MODES)
+        self.cb_linkMode.setCurrentText(self.engineSettings["LinkMode"])
+
+        lo_copyEngine.addWidget(l_bufferSize, 1, 0)
+        lo_copyEngine.addWidget(self.cb_bufferSize, 1, 1)
+        lo_copyEngine.addWidget(l_localWorkers, 2, 0)
+        lo_copyEngine.addWidget(self.sp_localWorkers, 2, 1)
+        lo_copyEngine.addWidget(l_networkWorkers, 3, 0)
+        lo_copyEngine.addWidget(self.sp_networkWorkers, 3, 1)
+        lo_copyEngine.addWidget(l_zipMode, 4, 0)
+        lo_copyEngine.addWidget(self.cb_zipMode, 4, 1)
+        lo_copyEngine.addWidget(l_zipWorkers, 5, 0)
+        lo_copyEngine.addWidget(self.sp_zipWorkers, 5, 1)
+        lo_copyEngine.addWidget(l_destJobs, 6, 0)
+        lo_copyEngine.addWidget(self.sp_destJobs, 6, 1)
+        lo_copyEngine.addWidget(l_linkMode, 7, 0)
+        lo_copyEngine.addWidget(self.cb_linkMode, 7, 1)
+        lo_copyEngine.setColumnStretch(2, 1)
+
+        origin.lo_exportTo.addWidget(gb_copyEngine)
+
+        # Populates engine options from Settings File Data
+        engineIndex = self.cb_copyEngine.findText(self.engineSettings["Engine"])
+        if engineIndex != -1:
+            self.cb_copyEngine.setCurrentIndex(engineIndex)
+
+        bufferIndex = self.cb_bufferSize.findData(self.engineSettings["BufferSize"])
+        if bufferIndex == -1:
+            self.cb_bufferSize.addItem(f"{self.engineSettings['BufferSize']} MB", self.engineSettings["BufferSize"])
+            bufferIndex = self.cb_bufferSize.count() - 1
+        self.cb_bufferSize.setCurrentIndex(bufferIndex)
+
+        tip = ("Method used to copy file data:\n\n"
+               "Auto:  fastest method available on this platform\n"
+               "Kernel:  zero-copy copy_file_range / sendfile (Linux)\n"
+               "Shutil:  OS native file copy (no progress within a file)\n"
+               "Buffered:  large buffered reads into a reused buffer"
+                )
+        l_copyEngine.setToolTip(tip)
+        self.cb_copyEngine.setToolTip(tip)
+
+        tip = "Size of each chunk read and written by the Buffered engine."
+        l_bufferSize.setToolTip(tip)
+        self.cb_bufferSize.setToolTip(tip)
+
+        tip = ("Number of files copied at once when exporting directories\n"
+               "to a local drive.  Set to 1 to copy one file at a time."
+                )
+        l_localWorkers.setToolTip(tip)
+        self.sp_localWorkers.setToolTip(tip)
+
+        tip = ("Number of files copied at once when exporting directories\n"
+               "to a network share.  Higher counts hide per-file latency."
+                )
+        l_networkWorkers.setToolTip(tip)
+        self.sp_networkWorkers.setToolTip(tip)
+
+        tip = ("Stream:  writes the .zip directly to the output location and\n"
+               "renames it into place when complete.\n\n"
+               "Temp Dir:  builds the .zip in the system temp directory first\n"
+               "and then copies it to the output location."
+                )
+        l_zipMode.setToolTip(tip)
+        self.cb_zipMode.setToolTip(tip)
+
+        tip = ("Number of CPU cores used to compress .zip exports.\n\n"
+               "Auto uses all available cores."
+                )
+        l_zipWorkers.setToolTip(tip)
+        self.sp_zipWorkers.setToolTip(tip)
+
+        tip = ("Number of queued exports that may write to the same drive\n"
+               "or network share at once.  Other jobs wait in the queue."
+                )
+        l_destJobs.setToolTip(tip)
+        self.sp_destJobs.setToolTip(tip)
+
+        tip = ("Exports files without zip by linking them to the source instead\n"
+               "of copying the data, where the output supports it:\n\n"
+               "Copy:  always copies the file data\n"
+               "Hardlink:  same drive only, the export shares the source file\n"
+               "Reflink:  same drive only, copy-on-write clone (Btrfs, XFS)\n"
+               "Symlink:  links pointing to the source files\n\n"
+               "Files are copied if the output does not support the link.\n"
+               "Editing a hardlinked or symlinked file also changes the source."
+                )
+        l_linkMode.setToolTip(tip)
+        self.cb_linkMode.setToolTip(tip)
+
+        # Add the "Verify" group box
+        gb_verify = QGroupBox("Verify")
+        lo_verify = QGridLayout()
+        gb_verify.setLayout(lo_verify)
+
+        l_verifyHash = QLabel("Hash:")
+        self.cb_verifyHash = QComboBox()
+        self.cb_verifyHash.addItems(HASH_ALGORITHMS)
+        self.cb_verifyHash.setCurrentText(self.verifySettings["Algorithm"])
+
+        l_manifestFormat = QLabel("Manifest:")
+        self.cb_manifestFormat = QComboBox()
+        self.cb_manifestFormat.addItems(MANIFEST_FORMATS)
+        self.cb_manifestFormat.setCurrentText(self.verifySettings["ManifestFormat"])
+
+        lo_verify.addWidget(l_verifyHash, 0, 0)
+        lo_verify.addWidget(self.cb_verifyHash, 0, 1)
+        lo_verify.addWidget(l_manifestFormat, 1, 0)
+        lo_verify.addWidget(self.cb_manifestFormat, 1, 1)
+        lo_verify.setColumnStretch(2, 1)
+
+        origin.lo_exportTo.addWidget(gb_verify)
+
+        tip = ("Hash used to verify exports.  Source files are hashed while they\n"
+               "are copied, then the output is read back and compared.\n\n"
+               "Off:  no verify (kernel and native copies can be used)"
+                )
+        l_verifyHash.setToolTip(tip)
+        self.cb_verifyHash.setToolTip(tip)
+
+        tip = ("Checksum manifest written next to a verified export:\n\n"
+               "Checksum:  md5sum / sha256sum style list (.md5, .sha256)\n"
+               "MHL:  Media Hash List style XML (.mhl)"
+                )
+        l_manifestFormat.setToolTip(tip)
+        self.cb_manifestFormat.setToolTip(tip)
+
+        # Add the "Export Telemetry" group box
+        gb_telemetry = QGroupBox("Export Telemetry")
+        lo_telemetry = QVBoxLayout()
+        gb_telemetry.setLayout(lo_telemetry)
+
+        self.l_telemetry = QLabel()
+        self.l_telemetry.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        b_refreshTelemetry = QPushButton("Refresh")
+        b_refreshTelemetry.setMaximumWidth(100)
+        b_refreshTelemetry.clicked.connect(self.refreshTelemetry)
+
+        lo_telemetry.addWidget(self.l_telemetry)
+        lo_telemetry.addWidget(b_refreshTelemetry)
+        origin.lo_exportTo.addWidget(gb_telemetry)
+        self.refreshTelemetry()
+
+        tip = ("Summary of recent exports from the telemetry log:\n\n"
+               f"{self.telemetryFile}\n\n"
+               "Shows how long exports spent scanning, comparing, copying,\n"
+               "zipping and cleaning up, to find what slow exports are limited by."
+                )
+        gb_telemetry.setToolTip(tip)
+
         # Add Tab to User Settings
         origin.addTab(origin.w_exportTo, "Export to Dir")
 
 
+    @err_catcher(name=__name__)
+    def refreshTelemetry(self):
+        self.l_telemetry.setText(getSummaryText(readRecords(self.telemetryFile)))
+
+
     #   Set Settings Tooltips
     @err_catcher(name=__name__)
     def getToolTipItems(self, template, textbox):
@@ -657,12 +1006,52 @@ class Prism_ExportToDir_Functions(object):
         for key, value in template.items():
             if textbox in value:
                 templateItems += key + "\n"
+
+        #   @FRAME@ only has a value for frames of image sequences, else it is empty
+        if textbox in template.get("@FRAME@", []):
+            templateItems += ("\n@FRAME@ is the frame number of the viewed frame of an image sequence,\n"
+                              "it is empty for other media")
+            templateItems += "\n\nItems can be formatted, e.g. @VERSION:03d@ or @FRAME:05d@"
+        else:
+            templateItems += "\nItems can be formatted, e.g. @VERSION:03d@"
         
         logger.debug("Loading Template Items")
 
         return templateItems
 
 
+    #   Marks a naming template with errors and lists them in its tooltip
+    @err_catcher(name=__name__)
+    def validateTemplate(self, lineEdit, tip):
+        errors = getTemplateErrors(lineEdit.text())
+        if errors:
+            lineEdit.setStyleSheet(TEMPLATE_INVALID)
+            lineEdit.setToolTip("\n".join(errors) + "\n\n" + tip)
+        else:
+            lineEdit.setStyleSheet("")
+            lineEdit.setToolTip(tip)
+
+
+    #   Marks a filter pattern line edit with errors and lists them in its tooltip
+    @err_catcher(name=__name__)
+    def validateFilter(self, lineEdit, tip):
+        errors = getFilterErrors(parsePatterns(lineEdit.text()))
+        if errors:
+            lineEdit.setStyleSheet(TEMPLATE_INVALID)
+            lineEdit.setToolTip("\n".join(errors) + "\n\n" + tip)
+        else:
+            lineEdit.setStyleSheet("")
+            lineEdit.setToolTip(tip)
+
+
+    #   Display text for Export Dir worker count
+    @err_catcher(name=__name__)
+    def formatWorkers(self, workers):
+        if workers:
+            return str(workers)
+        return "Auto"
+
+
     @err_catcher(name=__name__)
     def updateButtonStates(self, b_moveItemUp, b_moveItemDn, b_removeOpenWith):
         selectedItems = self.tw_exportTo.selectedItems()
@@ -780,7 +1169,7 @@ class Prism_ExportToDir_Functions(object):
                 self.sourceExt = fileData["extension"]
 
             curDate = datetime.now()
-            self.dateStamp = curDate.strftime("%d%m%y")
+            self.dateStamp = curDate.strftime(DATE_FORMAT)
 
         except Exception as e:
             msg = f"Error opening Config File {str(e)}"
@@ -790,22 +1179,18 @@ class Prism_ExportToDir_Functions(object):
 
     #   Load Settings from Global Settings File
     @err_catcher(name=__name__)
-    def loadSettings(self):
+    def loadSettings(self, retry=True):
         logger.debug("Loading Settings")
 
         try:
-            with open(self.settingsFile, "r") as json_file:
-                settingsData = json.load(json_file)
-
-            self.nameTemplateData = settingsData["NamingTemplate"]
-            self.exportPaths = settingsData["ExportPaths"]
-            self.recents = settingsData["Recents"]
+            #   Served from memory unless the file changed on disk
+            settingsData = self.settingsStore.load()
+            self.applySettings(settingsData)
 
         except FileNotFoundError:
             logger.debug("Setting do not exist.  Creating new Settings Files.")
             # Create the settings file if it doesn't exist
-            self.createSettings()
-            self.loadSettings()
+            self.resetSettings(retry)
         
         except Exception as e:
             self.core.popup(f"ExportToDir Config file is corrupt.\n"
@@ -813,10 +1198,33 @@ class Prism_ExportToDir_Functions(object):
                             f"{e}"
                             )
             #   Removes Corrupt Settings File and creates new
-            os.remove(self.settingsFile)
-            self.createSettings()
-            self.loadSettings()
-            
+            if os.path.exists(self.settingsFile):
+                os.remove(self.settingsFile)
+            self.resetSettings(retry)
+
+
+    #   Writes the default settings and loads them once more.  If the file
+    #   still cannot be read the defaults are used for this session.
+    @err_catcher(name=__name__)
+    def resetSettings(self, retry):
+        self.createSettings()
+        if retry:
+            self.loadSettings(retry=False)
+        else:
+            logger.warning(f"Unable to read new Config File, using defaults: {self.settingsFile}")
+            self.applySettings(self.settingsData)
+
+
+    #   Raises KeyError for a config missing a section, handled as corrupt
+    def applySettings(self, settingsData):
+        self.nameTemplateData = settingsData["NamingTemplate"]
+        self.exportPaths = settingsData["ExportPaths"]
+        self.recents = settingsData["Recents"]
+        self.engineSettings = getEngineSettings(settingsData.get("EngineSettings"))
+        self.compressionPolicy = getCompressionPolicy(settingsData.get("CompressionPolicy"))
+        self.verifySettings = getVerifySettings(settingsData.get("VerifySettings"))
+        self.filterRules = getFilterRules(settingsData.get("FilterRules"))
+
 
     #   Saves Settings to Global Settings File
     @err_catcher(name=__name__)
@@ -844,10 +1252,15 @@ class Prism_ExportToDir_Functions(object):
 
         #   Makes the data list
         self.settingsData = {"NamingTemplate": namingTemplateData,
+                            "FilterRules": getFilterRules(None),
                             "ExportPaths": exportPathsData,
-                            "Recents": recents}
+                            "Recents": recents,
+                            "EngineSettings": getEngineSettings(None),
+                            "CompressionPolicy": getCompressionPolicy(None),
+                            "VerifySettings": getVerifySettings(None)}
 
-        self.saveSettings()
+        #   Every key is written, the cached settings may already equal the defaults
+        self.settingsStore.update(self.settingsData, immediate=True, force=True)
         logger.debug("Created Settings File")
     
 
@@ -870,6 +1283,9 @@ class Prism_ExportToDir_Functions(object):
         currRecents["customFolder"] = self.dlg.e_customLoc.text()
         currRecents["appendFolder"] = self.dlg.e_appendFolder.text()
         currRecents["useZip"] = self.dlg.chb_zipFile.isChecked()
+        currRecents["useSync"] = self.dlg.chb_sync.isChecked()
+        currRecents["syncHash"] = self.dlg.chb_syncHash.isChecked()
+        currRecents["syncDelete"] = self.dlg.chb_syncDelete.isChecked()
 
         # Check if an item with the same "ProjectName" already exists and remove if exists
         for existingRecents in recentsList:
@@ -928,20 +1344,54 @@ class Prism_ExportToDir_Functions(object):
             for row in range(self.tw_exportTo.rowCount()):
                 nameItem = self.tw_exportTo.item(row, 0)
                 pathItem = self.tw_exportTo.item(row, 1)
+                workersItem = self.tw_exportTo.item(row, 2)
 
                 if nameItem and pathItem:
                     name = nameItem.text()
                     location = pathItem.text()
-                    exportPathsData.append({"Name": name, "Path": location})
+                    exportPathData = {"Name": name, "Path": location}
+
+                    if workersItem and workersItem.text().isdigit():
+                        exportPathData["Workers"] = int(workersItem.text())
+
+                    exportPathsData.append(exportPathData)
+
+            #   Copy engine options
+            engineSettings = {"Engine": self.cb_copyEngine.currentText(),
+                              "BufferSize": self.cb_bufferSize.currentData(),
+                              "LocalWorkers": self.sp_localWorkers.value(),
+                              "NetworkWorkers": self.sp_networkWorkers.value(),
+                              "ZipMode": self.cb_zipMode.currentText(),
+                              "ZipWorkers": self.sp_zipWorkers.value(),
+                              "JobsPerDestination": self.sp_destJobs.value(),
+                              "LinkMode": self.cb_linkMode.currentText()}
+
+            #   Verify options
+            verifySettings = {"Algorithm": self.cb_verifyHash.currentText(),
+                              "ManifestFormat": self.cb_manifestFormat.currentText()}
+
+            #   Include and exclude patterns of tree exports
+            filterRules = {}
+            for filterType, (e_include, e_exclude) in self.filterEdits.items():
+                filterRules[filterType] = {"Include": parsePatterns(e_include.text()),
+                                           "Exclude": parsePatterns(e_exclude.text())}
 
             #   Updates current with new
             self.nameTemplateData = namingTemplateData        
             self.exportPaths = exportPathsData
+            self.engineSettings = getEngineSettings(engineSettings)
+            self.verifySettings = getVerifySettings(verifySettings)
+            self.filterRules = getFilterRules(filterRules)
+            self.jobQueue.setDestinationLimit(self.engineSettings["JobsPerDestination"])
 
             #   Builds dict but does not update recents list
             self.settingsData = {"NamingTemplate": namingTemplateData,
+                                "FilterRules": self.filterRules,
                                 "ExportPaths": exportPathsData,
-                                "Recents": self.recents}
+                                "Recents": self.recents,
+                                "EngineSettings": self.engineSettings,
+                                "CompressionPolicy": self.compressionPolicy,
+                                "VerifySettings": self.verifySettings}
 
         #   Used from Export Dialogue when executing
         elif mode == "Recents":
@@ -950,12 +1400,15 @@ class Prism_ExportToDir_Functions(object):
 
             #   Builds dict and only updates recent list
             self.settingsData = {"NamingTemplate": self.nameTemplateData,
+                                "FilterRules": self.filterRules,
                                 "ExportPaths": self.exportPaths,
-                                "Recents": self.recents}
+                                "Recents": self.recents,
+                                "EngineSettings": self.engineSettings,
+                                "CompressionPolicy": self.compressionPolicy,
+                                "VerifySettings": self.verifySettings}
 
-        # Save to file
-        with open(self.settingsFile, "w") as json_file:
-            json.dump(self.settingsData, json_file, indent=4)
+        #   Written to file after a short delay, repeated saves are combined
+        self.settingsStore.update(self.settingsData)
 
         logger.debug("Settings Saved")
 
@@ -968,13 +1421,14 @@ class Prism_ExportToDir_Functions(object):
 
         #   Adds Name and Path to UI List
         if dialog.exec_() == QDialog.Accepted:
-            name, path = dialog.getValues()
+            name, path, workers = dialog.getValues()
 
             if name and path:
                 row_position = tw_exportTo.rowCount()
                 tw_exportTo.insertRow(row_position)
                 tw_exportTo.setItem(row_position, 0, QTableWidgetItem(name))
                 tw_exportTo.setItem(row_position, 1, QTableWidgetItem(path))
+                tw_exportTo.setItem(row_position, 2, QTableWidgetItem(self.formatWorkers(workers)))
 
             logger.debug("Export Directory added.")
             #   Saves UI List to JSON file
@@ -1050,12 +1504,16 @@ class Prism_ExportToDir_Functions(object):
         self.dlg = ExportToDir()
 
         self.dlg.setWindowTitle("Export to Directory")
+        if self.batchItems:
+            self.dlg.setWindowTitle(f"Export to Directory  -  Batch ({len(self.batchItems)} items)")
 
         #   Configures UI based on SingleImage
         self.dlg.rb_singleImage.hide()
         self.dlg.rb_imageSeq.hide()
         self.dlg.rb_singleImage.setChecked(True)
 
+        #   Picks up settings saved by other users
+        self.loadSettings()
         #   Loads Settings Data
         self.loadData()
 
@@ -1067,6 +1525,20 @@ class Prism_ExportToDir_Functions(object):
 
         #   Sets Placeholder name based on Template
         self.setPlaceholderName(load=True)
+
+        #   Filter patterns of tree exports default to the User Settings rules
+        if self.menuContext in FILTER_TYPES:
+            self.dlg.e_filterInclude.setText(formatPatterns(self.filterRules[self.menuContext]["Include"]))
+            self.dlg.e_filterExclude.setText(formatPatterns(self.filterRules[self.menuContext]["Exclude"]))
+        else:
+            self.dlg.setFilterVisible(False)
+
+        #   Empty frame range exports all frames of a sequence
+        if isinstance(self.sourcePath, list):
+            frames = getFrameNumbers(self.sourcePath)
+            if frames:
+                self.dlg.e_frameRange.setPlaceholderText(f"{min(frames)}-{max(frames)}")
+
         #   Configures Single or Image Sequence
         self.setSequenceMode()
 
@@ -1085,9 +1557,17 @@ class Prism_ExportToDir_Functions(object):
             self.dlg.e_customLoc.setText(recents["customFolder"])
             self.dlg.e_appendFolder.setText(recents["appendFolder"])
             self.dlg.chb_zipFile.setChecked(recents["useZip"])
+            self.dlg.chb_sync.setChecked(recents.get("useSync", False))
+            self.dlg.chb_syncHash.setChecked(recents.get("syncHash", False))
+            self.dlg.chb_syncDelete.setChecked(recents.get("syncDelete", False))
+            self.setSyncMode()
+
+        self.dlg.cb_priority.addItems(PRIORITIES)
+        self.dlg.cb_priority.setCurrentText(DEFAULT_PRIORITY)
 
         #   Tooltips for Dialogue
-        tip = "Filename for export.  Template used to create default can be modified in User Settings"
+        tip = ("Filename for export.  Template used to create default can be modified in User Settings\n\n"
+               "For image sequences each frame is named from this, the \"#\" are replaced by the frame number")
         self.dlg.l_mediaName.setToolTip(tip)
         self.dlg.e_mediaName.setToolTip(tip)
         tip = "Click to revert to template filename"
@@ -1107,8 +1587,47 @@ class Prism_ExportToDir_Functions(object):
         tip = "Sub directory that will be appended to the Dir selected above"
         self.dlg.l_appendFolder.setToolTip(tip)
         self.dlg.e_appendFolder.setToolTip(tip)          
+        tip = ("Frames of the sequence to export, e.g. 1001-1100, 1001-1100x2 (every 2nd frame)\n"
+               "or 1001, 1010-1020.  Leave empty to export all frames.")
+        self.dlg.l_frameRange.setToolTip(tip)
+        self.dlg.e_frameRange.setToolTip(tip)
+        tip = ("Added to each frame number of the exported frames, e.g. -1000 renumbers\n"
+               "1001-1100 to 0001-0100.  The \"#\" in the Filename set the frame padding.")
+        self.dlg.l_frameOffset.setToolTip(tip)
+        self.dlg.sp_frameOffset.setToolTip(tip)
         tip = "Select to .zip the export contents to a single file"
         self.dlg.chb_zipFile.setToolTip(tip)  
+        tip = ("Only copy files that are new or changed (size or modified time)\n"
+               "compared to the files already in the output directory")
+        self.dlg.chb_sync.setToolTip(tip)
+        tip = "Compare file contents instead of modified time (slower)"
+        self.dlg.chb_syncHash.setToolTip(tip)
+        tip = "Delete files in the output directory that are not in the export"
+        self.dlg.chb_syncDelete.setToolTip(tip)
+        tip = ("Only export files matching these patterns (or in matching directories).\n"
+               f"Patterns are separated by \"{PATTERN_SEPARATOR}\", e.g. *.ma{PATTERN_SEPARATOR} *.abc{PATTERN_SEPARATOR} renders/.  "
+               "Leave empty to export all files.\n\n"
+               "Defaults are set in User Settings->ExportToDir")
+        self.dlg.l_filterInclude.setToolTip(tip)
+        self.dlg.e_filterInclude.setToolTip(tip)
+        tip = ("Files and directories matching these patterns are not exported, e.g.\n"
+               f"*.bak{PATTERN_SEPARATOR} autosave/{PATTERN_SEPARATOR} _pipeline/{PATTERN_SEPARATOR} re:_backup\\d+.  "
+               "Excluded directories are not scanned.\n\n"
+               "Defaults are set in User Settings->ExportToDir")
+        self.dlg.l_filterExclude.setToolTip(tip)
+        self.dlg.e_filterExclude.setToolTip(tip)
+        tip = "Scan the export with the filters and show the number of files and size"
+        self.dlg.but_filterPreview.setToolTip(tip)
+        tip = ("Order of this export in the queue.  Higher priority exports\n"
+               "start first when several are waiting for the same destination")
+        self.dlg.l_priority.setToolTip(tip)
+        self.dlg.cb_priority.setToolTip(tip)
+        tip = "Show pending, running and finished exports"
+        self.dlg.but_queue.setToolTip(tip)
+        tip = "Pause or resume the running export"
+        self.dlg.but_pause.setToolTip(tip)
+        tip = "Stop the export and remove its partial output"
+        self.dlg.but_cancel.setToolTip(tip)
         tip = "Final output path of export"
         self.dlg.e_outputName.setToolTip(tip)  
         tip = "Open export directory"
@@ -1124,8 +1643,17 @@ class Prism_ExportToDir_Functions(object):
         self.dlg.e_appendFolder.textEdited.connect(lambda: self.formatAppendFolder())
         self.dlg.chb_zipFile.clicked.connect(lambda: self.setSequenceMode())
         self.dlg.but_explorer.clicked.connect(lambda: self.openExplorer(self.outputPath))        
+        self.dlg.e_filterInclude.textChanged.connect(
+            lambda: self.validateFilter(self.dlg.e_filterInclude, self.dlg.l_filterInclude.toolTip()))
+        self.dlg.e_filterExclude.textChanged.connect(
+            lambda: self.validateFilter(self.dlg.e_filterExclude, self.dlg.l_filterExclude.toolTip()))
+        self.dlg.but_filterPreview.clicked.connect(lambda: self.previewExport())
         self.dlg.but_execute.clicked.connect(lambda: self.execute())
-        self.dlg.but_close.clicked.connect(self.dlg.reject)        
+        self.dlg.but_queue.clicked.connect(lambda: self.openQueuePanel())
+        self.dlg.but_pause.clicked.connect(lambda: self.pauseDialogueJob())
+        self.dlg.but_cancel.clicked.connect(lambda: self.cancelDialogueJob())
+        self.dlg.but_close.clicked.connect(lambda: self.dlg.reject())        
+        self.dlg.closeCallback = self.closeDialogue
 
         self.refreshOutputName()
         self.dlg.exec_()
@@ -1164,20 +1692,41 @@ class Prism_ExportToDir_Functions(object):
             else:
                 self.singleFileMode = False
 
-            if self.dlg.rb_imageSeq.isChecked() and not self.dlg.chb_zipFile.isChecked():
-                self.dlg.e_mediaName.setReadOnly(True)
-                self.dlg.e_mediaName.setStyleSheet("color: rgb(120, 120, 120);")
-            else:
-                self.dlg.e_mediaName.setReadOnly(False)
-                self.dlg.e_mediaName.setStyleSheet("color: ;")
+            #   Frame range and offset are only used for the whole sequence
+            showFrames = isinstance(self.sourcePath, list) and self.dlg.rb_imageSeq.isChecked()
+            self.dlg.l_frameRange.setVisible(showFrames)
+            self.dlg.e_frameRange.setVisible(showFrames)
+            self.dlg.l_frameOffset.setVisible(showFrames)
+            self.dlg.sp_frameOffset.setVisible(showFrames)
 
+        self.setSyncMode()
         self.setPlaceholderName()
 
         logger.debug(f"Sequence Mode changed to {not self.singleFileMode}")
 
 
+    #   Sync is only available for directory exports without zip
+    @err_catcher(name=__name__)
+    def setSyncMode(self):
+        syncAvailable = not self.singleFileMode and not self.dlg.chb_zipFile.isChecked()
+
+        self.dlg.chb_sync.setEnabled(syncAvailable)
+        self.dlg.chb_syncHash.setEnabled(syncAvailable and self.dlg.chb_sync.isChecked())
+        self.dlg.chb_syncDelete.setEnabled(syncAvailable and self.dlg.chb_sync.isChecked())
+
+
     @err_catcher(name=__name__)
     def setPlaceholderName(self, load=False):
+        #   Batch items are each named from the template when executed
+        if self.batchItems:
+            self.dlg.e_mediaName.setText(f"{len(self.batchItems)} items named by the "
+                                         f"\"{self.menuContext}\" template")
+            self.dlg.e_mediaName.setReadOnly(True)
+            self.dlg.e_mediaName.setStyleSheet("color: rgb(120, 120, 120);")
+            if not load:
+                self.refreshOutputName()
+            return
+
         if self.singleFileMode:
             #   Formats Filename
             if self.currentFrame:
@@ -1200,28 +1749,39 @@ class Prism_ExportToDir_Functions(object):
                 fileNameNoExt = os.path.splitext(self.currentFrame)[0]
             
         formattedNameNoExt = self.formatName(fileNameNoExt)
+        placeholderName = self.getTemplateName(formattedNameNoExt)
+
+        self.dlg.e_mediaName.setText(placeholderName)
+
+        if not load:
+            self.refreshOutputName()
+
+
+    #   Builds the export name from the current item data (see sortData)
+    #   and the naming template of the menu context
+    def getTemplateName(self, formattedNameNoExt):
         formattedName = formattedNameNoExt + self.sourceExt
 
         #   Possible replacements
-        replacements = {
-            "@PROJECT@": self.projectName,
-            "@USER@": self.userName,
-            "@DATE@": self.dateStamp,
-            "@TYPE@": self.entityType,
-            "@SEQUENCE@": self.sequenceName,
-            "@SHOT@": self.shotName,
-            "@ASSET@": self.assetName,
-            "@DEPARTMENT@": self.deptName,
-            "@TASK@": self.taskName,
-            "@PRODUCT@": self.productName,
-            "@IDENTIFIER@": self.identifier,
-            "@VERSION@": self.version,
-            "@AOV@": self.aov,
-            "@CHANNEL@": self.channel,
-            "@FILENAME@": formattedName,
-            "@FRAME@": self.frameNumber,
-            "@FILETYPE@": self.sourceExt.removeprefix(".").upper(),
-            "@EXTENSION@": self.sourceExt
+        values = {
+            "PROJECT": self.projectName,
+            "USER": self.userName,
+            "DATE": self.dateStamp,
+            "TYPE": self.entityType,
+            "SEQUENCE": self.sequenceName,
+            "SHOT": self.shotName,
+            "ASSET": self.assetName,
+            "DEPARTMENT": self.deptName,
+            "TASK": self.taskName,
+            "PRODUCT": self.productName,
+            "IDENTIFIER": self.identifier,
+            "VERSION": self.version,
+            "AOV": self.aov,
+            "CHANNEL": self.channel,
+            "FILENAME": formattedName,
+            "FRAME": self.frameNumber,
+            "FILETYPE": self.sourceExt.removeprefix(".").upper(),
+            "EXTENSION": self.sourceExt
             }
 
         # Perform replacements
@@ -1229,25 +1789,17 @@ class Prism_ExportToDir_Functions(object):
         template = templateData.get(self.menuContext)
        
         if template:    #   Check if template loaded from Settings File
-            placeholderName = template  # Initialize with the original template
-            for placeholder, value in replacements.items():
-                placeholderName = placeholderName.replace(placeholder, value)
-        else:
-            placeholderName = formattedName     #   Fallback name
+            return resolveTemplate(template, values)
 
-        self.dlg.e_mediaName.setText(placeholderName)
-
-        if not load:
-            self.refreshOutputName()
+        return formattedName     #   Fallback name
 
 
     def formatName(self, inputName):
         # Replace invalid characters with underscores
-        validName = re.sub(r"[^a-zA-Z0-9_\- ()#.]", "_", inputName)
+        validName = sanitizeName(inputName)
 
         # Check for reserved names for outputName
-        reserved_names = set(['CON', 'PRN', 'AUX', 'NUL'] + [f'COM{i}' for i in range(1, 10)] + [f'LPT{i}' for i in range(1, 10)])
-        if validName.upper() in reserved_names:
+        if isReservedName(validName):
             self.core.popup("Name Not Allowed\n\nDo Not Use:\n\n   CON, PRN, AUX, NUL, COM, LPT")
 
         return validName
@@ -1274,28 +1826,40 @@ class Prism_ExportToDir_Functions(object):
             self.refreshOutputName()
 
 
-    @err_catcher(name=__name__)                                     #   TODO RENAMING SEQ's
+    @err_catcher(name=__name__)
     def refreshOutputName(self):
+        #   Batch exports only show the output directory
+        if self.batchItems:
+            self.outputPath = self.getOutputDir()
+            self.dlg.e_outputName.setText(self.outputPath)
+            self.resetProgBar()
+            return
+
         #   Get name form UI
         placeholderName = self.dlg.e_mediaName.text()
-        root, extension = os.path.splitext(placeholderName)
 
-        #   Check if name in UI has an extension
-        if extension:
-            fileNameNoExt = root
-        else:
-            fileNameNoExt = placeholderName                                             
-        
-        formatedName = self.formatName(fileNameNoExt)
-        
-        #   Change extension to .zip if checked
-        if self.dlg.chb_zipFile.isChecked():
-            if not self.singleFileMode:
-                formatedName = formatedName.rstrip('#_.')
-            formatedName = formatedName + ".zip"
+        #   Warns about reserved names
+        self.formatName(os.path.splitext(placeholderName)[0])
+
+        #   Changes extension to .zip if checked
+        formatedName = getOutputFilename(placeholderName, self.sourceExt,
+                                         zipFiles=self.dlg.chb_zipFile.isChecked(),
+                                         singleFile=self.singleFileMode)
+
+        outputDir = self.getOutputDir()
+        if self.dlg.e_appendFolder.text():
+            self.outputPath = os.path.normpath(os.path.join(outputDir, formatedName))
         else:
-            formatedName = fileNameNoExt + self.sourceExt
+            self.outputPath = os.path.join(outputDir, formatedName)
+
+        self.dlg.e_outputName.setText(self.outputPath)
+
+        self.resetProgBar()
 
+
+    #   Output directory selected in the dialogue, with the append folder
+    @err_catcher(name=__name__)
+    def getOutputDir(self):
         #   User selected output folder type
         if self.dlg.rb_ProjectFolder.isChecked():
             pathItem = self.dlg.cb_mediaFolders.currentText()
@@ -1312,15 +1876,9 @@ class Prism_ExportToDir_Functions(object):
             if appendFolder.startswith("\\"):
                 appendFolder = appendFolder[1:]
 
-            AppendedOutputPath = os.path.normpath(os.path.join(outputPath, appendFolder))
-            self.outputPath = os.path.normpath(os.path.join(AppendedOutputPath, formatedName))
-
-        else:
-            self.outputPath = os.path.join(outputPath, formatedName)
+            return os.path.normpath(os.path.join(outputPath, appendFolder))
 
-        self.dlg.e_outputName.setText(self.outputPath)
-
-        self.resetProgBar()
+        return outputPath
 
 
     @err_catcher(name=__name__)
@@ -1361,6 +1919,9 @@ class Prism_ExportToDir_Functions(object):
 
     @err_catcher(name=__name__)
     def execute(self):
+        if self.batchItems:
+            self.executeBatch()
+            return
 
         self.resetProgBar()
 
@@ -1381,6 +1942,17 @@ class Prism_ExportToDir_Functions(object):
         if zipFiles:
             outputPath = os.path.splitext(outputPath)[0] + '.zip'
 
+        #   Number of files copied at once for directory exports
+        workers = getWorkerCount(outputPath, self.engineSettings, self.exportPaths)
+
+        #   Incremental export options
+        syncOptions = self.getSyncOptions()
+
+        #   Include / exclude patterns of tree exports
+        if not self.checkFilterPatterns():
+            return
+        filterRules = self.getDialogueFilter()
+
         # Copy a single file
         if self.singleFileMode:
             if self.menuContext == "Media Files:":
@@ -1392,83 +1964,587 @@ class Prism_ExportToDir_Functions(object):
                 sourcePath = self.sourcePath
 
             #   Checks if file already exists and then opens Dialogue
-            if os.path.exists(outputPath):
+            resume = self.checkResume(outputPath)
+            if not resume and os.path.exists(outputPath):
                 if self.executePopUp("File", outputPath) == False:
                     logger.debug(f"File already exists: {outputPath}")
                     return
 
-            #   Makes Dir if it doesn't exist    
             outputDir = os.path.dirname(outputPath)
-            if not os.path.exists(outputDir):
-                os.mkdir(outputDir)
-
-            copyThread = CopyThread(self.core, self.dlg, 1, sourcePath, outputPath, zipFiles)
+            case, exportSource, exportDest = 1, sourcePath, outputPath
 
         # Copy entire directory
         elif not self.singleFileMode and not zipFiles:
             if self.menuContext in ["Project Files:", "Asset Files:", "Shot Files:"]:
                 sourceDir = self.sourcePath
                 outputDir = outputPath
+                case = 2
 
-                #   Checks if Dir exists and then opens Dialogue
-                if os.path.exists(outputDir):
-                    if self.executePopUp("Directory", outputDir) == False:
-                        return
-
-                else:   #   Makes Dir if it doesn't exist
-                    os.makedirs(outputDir)
-
-                copyThread = CopyThread(self.core, self.dlg, 2, sourceDir, outputDir, zipFiles)
-
-            else:    
-                sourceDir = os.path.dirname(self.sourcePath[0])
+            else:
+                #   Image sequence:  only the selected frames are exported
+                sourceDir = self.getSelectedFrames()
+                if not sourceDir:
+                    return
                 outputDir = os.path.dirname(outputPath)
+                case = 3
 
-                #   Checks if Dir exists and then opens Dialogue
-                if os.path.exists(outputDir):
-                    if self.executePopUp("Directory", outputDir) == False:
-                        return
-                    
-                else:   #   Makes Dir if it doesn't exist
-                    os.mkdir(outputDir)
+            #   Checks if Dir exists and then opens Dialogue
+            resume = self.checkResume(outputDir, isDir=True)
+            if os.path.exists(outputDir):
+                if not resume and not self.confirmDirectoryExport(outputDir, syncOptions):
+                    return
 
-                copyThread = CopyThread(self.core, self.dlg, 3, sourceDir, outputDir, zipFiles)
+            exportSource, exportDest = sourceDir, outputDir
 
         # Copy and Zip directory
         else:
             if self.menuContext in ["Project Files:", "Asset Files:", "Shot Files:"]:
                 sourceDir = self.sourcePath
-                outputDir = os.path.dirname(outputPath)
+                case = 4
+            else:
+                sourceDir = self.getSelectedFrames()
+                if not sourceDir:
+                    return
+                case = 5
 
-                #   Checks if file already exists and then opens Dialogue
-                if os.path.exists(outputPath):
-                    if self.executePopUp("File", outputPath) == False:
-                        return
+            outputDir = os.path.dirname(outputPath)
 
-                #   Makes Dir if it doesn't exist    
-                if not os.path.exists(outputDir):
-                    os.makedirs(outputDir)
-                    
-                copyThread = CopyThread(self.core, self.dlg, 4, sourceDir, outputPath, zipFiles)  
+            #   Checks if file already exists and then opens Dialogue
+            resume = self.checkResume(outputPath)
+            if not resume and os.path.exists(outputPath):
+                if self.executePopUp("File", outputPath) == False:
+                    return
 
-            else:
-                sourceDir = os.path.dirname(self.sourcePath[0])
-                outputDir = os.path.dirname(outputPath)
+            exportSource, exportDest = sourceDir, outputPath
+
+        if case not in [2, 4]:
+            filterRules = None
 
-                #   Checks if file already exists and then opens Dialogue
-                if os.path.exists(outputPath):
-                    if self.executePopUp("File", outputPath) == False:
-                        return
-                    
-                #   Makes Dir if it doesn't exist    
-                if not os.path.exists(outputDir):
-                    os.mkdir(outputDir)
-                    
-                copyThread = CopyThread(self.core, self.dlg, 5, sourceDir, outputPath, zipFiles)
-
-        copyThread.progressUpdated.connect(self.dlg.progressBar.setValue)
-        thread = threading.Thread(target=copyThread.run)
+        #   Checks the size against the free space before anything is written
+        estimates = self.preflightCheck([(case, exportSource, exportDest)], zipFiles, filterRules)
+        if estimates is None:
+            return
+
+        #   Makes the parent Dir if it doesn't exist, an output Dir is made by the export
+        os.makedirs(os.path.dirname(exportDest), exist_ok=True)
+
+        #   Sequence frames are named from the Filename, "#" marks the frame number
+        frameNaming = None
+        if case in [3, 5]:
+            frameNaming = {"Name": os.path.splitext(outputName)[0] + self.sourceExt,
+                           "Offset": self.dlg.sp_frameOffset.value()}
+            try:
+                getFrameNames(exportSource, frameNaming["Name"], frameNaming["Offset"])
+            except ValueError as e:
+                self.core.popup(str(e))
+                return
+
+        #   Everything the worker needs is stored so the job survives a restart
+        params = {"case": case,
+                  "sourcePath": exportSource,
+                  "outputPath": exportDest,
+                  "zipFiles": zipFiles,
+                  "engineSettings": self.engineSettings,
+                  "workers": workers,
+                  "compressionPolicy": self.compressionPolicy,
+                  "verifySettings": self.verifySettings,
+                  "frameNaming": frameNaming,
+                  "filterRules": filterRules,
+                  "syncOptions": syncOptions,
+                  "resume": resume}
+
+        job = ExportJob(os.path.basename(exportDest), params, self.dlg.cb_priority.currentText())
+        job.manifest = estimates[0].manifest
+        self.jobDialogs[job.jobId] = self.dlg
+        self.dlg.jobIds = [job.jobId]
+        self.dlg.l_status.setText(job.status)
+        self.dlg.but_pause.setText("Pause")
+        self.dlg.but_pause.setEnabled(True)
+        self.dlg.but_cancel.setEnabled(True)
+        self.jobQueue.addJob(job)
+
+
+    #   Frames of the sequence in the frame range.  Asks before exporting a
+    #   range with missing frames.
+    @err_catcher(name=__name__)
+    def getSelectedFrames(self):
+        try:
+            frameList, missing = selectFrames(self.sourcePath, self.dlg.e_frameRange.text())
+        except ValueError as e:
+            self.core.popup(f"{e}\n\nUse frames and ranges such as 1001-1100, 1001-1100x2 or 1001, 1005")
+            return None
+
+        if not frameList:
+            self.core.popup("None of the frames in the frame range exist in the sequence.")
+            return None
+
+        if missing:
+            reply = QMessageBox.question(
+                self.dlg,
+                "Missing Frames",
+                f"{len(missing)} frames are missing from the sequence:\n\n"
+                f"{formatFrameRanges(missing)}\n\n"
+                f"Do you want to export the {len(frameList)} frames that exist?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return None
+
+        return frameList
+
+
+    #   Scans the (case, source, output) exports before they are queued and shows
+    #   the size estimate and ETA.  Asks before starting exports that do not fit.
+    #   Returns the estimates, their scans are reused by the exports, or None to stop.
+    @err_catcher(name=__name__)
+    def preflightCheck(self, exports, zipFiles, filterRules=None):
+        engineSettings = getEngineSettings(self.engineSettings)
+
+        def estimateExports():
+            estimates = [estimateExport(case, sourcePath, outputPath, zipFiles, engineSettings["ZipMode"],
+                                        self.compressionPolicy, linkMode=engineSettings["LinkMode"],
+                                        filterRules=filterRules)
+                         for case, sourcePath, outputPath in exports]
+            return estimates, checkFreeSpace(estimates)
+
+        #   The dialogue is disabled while scanning so the export is not started twice
+        self.dlg.l_status.setText("Estimating...")
+        self.dlg.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            estimates, problems = self.runInBackground(estimateExports)
+
+        except OSError as e:
+            self.core.popup(f"Unable to read the export source:\n\n{e}")
+            logger.warning(f"ERROR: Pre-flight check failed: {e}")
+            return None
+
+        finally:
+            QApplication.restoreOverrideCursor()
+            self.dlg.setEnabled(True)
+            self.dlg.l_status.setText("Idle...")
+
+        estimate = combineEstimates(estimates) if len(estimates) > 1 else estimates[0]
+        throughput = getAverageThroughput(readRecords(self.telemetryFile), zipFiles)
+        self.dlg.l_estimate.setText(estimate.getReport(throughput))
+
+        if problems:
+            reply = QMessageBox.question(
+                self.dlg,
+                "Not Enough Space",
+                f"The export may not fit on the drive:\n\n"
+                f"{getSpaceReport(problems)}\n\n"
+                f"Do you want to start it anyway?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return None
+
+        return estimates
+
+
+    #   Runs func in a worker thread and returns its result.  A local event loop
+    #   keeps Prism responsive meanwhile, e.g. while scanning a network project.
+    def runInBackground(self, func):
+        result = {}
+
+        def work():
+            try:
+                result["value"] = func()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=work, daemon=True)
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(lambda: None if thread.is_alive() else loop.quit())
         thread.start()
+        timer.start(50)
+        loop.exec_()
+        timer.stop()
+
+        if "error" in result:
+            raise result["error"]
+
+        return result["value"]
+
+
+    #   Incremental export options selected in the dialogue
+    def getSyncOptions(self):
+        if self.dlg.chb_sync.isEnabled() and self.dlg.chb_sync.isChecked():
+            return {"Hash": self.dlg.chb_syncHash.isChecked(),
+                    "DeleteOrphans": self.dlg.chb_syncDelete.isChecked()}
+
+        return None
+
+
+    #   Include / exclude patterns from the dialogue, None if the export is not filtered
+    def getDialogueFilter(self):
+        if self.menuContext not in FILTER_TYPES:
+            return None
+
+        filterRules = {"Include": parsePatterns(self.dlg.e_filterInclude.text()),
+                       "Exclude": parsePatterns(self.dlg.e_filterExclude.text())}
+        if not filterRules["Include"] and not filterRules["Exclude"]:
+            return None
+
+        return filterRules
+
+
+    @err_catcher(name=__name__)
+    def checkFilterPatterns(self):
+        filterRules = self.getDialogueFilter()
+        if not filterRules:
+            return True
+
+        errors = getFilterErrors(filterRules["Include"] + filterRules["Exclude"])
+        if errors:
+            self.core.popup("The export filter has invalid patterns:\n\n" + "\n".join(errors))
+            return False
+
+        return True
+
+
+    #   Scans the selected item(s) with the filter patterns and shows the
+    #   files and bytes that will be exported, without queueing anything
+    @err_catcher(name=__name__)
+    def previewExport(self):
+        if not self.checkFilterPatterns():
+            return
+
+        zipFiles = self.dlg.chb_zipFile.isChecked()
+        case = 4 if zipFiles else 2
+        outputPath = self.getOutputDir() or self.dlg.e_outputName.text()
+
+        sourcePaths = [self.sourcePath]
+        if self.batchItems:
+            sourcePaths = []
+            for fileData in self.batchItems:
+                self.sortData(fileData)
+                sourcePaths.append(self.sourcePath)
+            self.sortData(self.batchItems[0])
+
+        filterRules = self.getDialogueFilter()
+
+        def estimateExports():
+            return [estimateExport(case, sourcePath, outputPath, zipFiles,
+                                   compressionPolicy=self.compressionPolicy, filterRules=filterRules)
+                    for sourcePath in sourcePaths]
+
+        self.dlg.l_status.setText("Scanning...")
+        self.dlg.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            estimates = self.runInBackground(estimateExports)
+
+        except OSError as e:
+            self.core.popup(f"Unable to read the export source:\n\n{e}")
+            return
+
+        finally:
+            QApplication.restoreOverrideCursor()
+            self.dlg.setEnabled(True)
+            self.dlg.l_status.setText("Idle...")
+
+        estimate = combineEstimates(estimates) if len(estimates) > 1 else estimates[0]
+        self.dlg.l_estimate.setText(estimate.getReport())
+
+
+    #   Queues one export per batch item.  Names come from the template, all
+    #   outputs go to the selected directory, and one progress bar shows the
+    #   whole batch.  The queue runs them with its per-destination limit.
+    @err_catcher(name=__name__)
+    def executeBatch(self):
+        self.resetProgBar()
+        self.saveSettings(mode="Recents")
+
+        zipFiles = self.dlg.chb_zipFile.isChecked()
+        syncOptions = self.getSyncOptions()
+        if not self.checkFilterPatterns():
+            return
+        filterRules = self.getDialogueFilter()
+        outputDir = self.getOutputDir()
+        if not outputDir:
+            self.core.popup("No output directory selected.")
+            return
+
+        #   Resolves case and output for each item
+        exports = []
+        for fileData in self.batchItems:
+            self.sortData(fileData)
+            if self.singleFileMode:
+                fileNameNoExt = os.path.splitext(self.sourceFilename)[0]
+            else:
+                fileNameNoExt = self.sourceFilename
+
+            name = self.getTemplateName(sanitizeName(fileNameNoExt))
+            outputName = getOutputFilename(name, self.sourceExt, zipFiles=zipFiles, singleFile=self.singleFileMode)
+
+            if self.singleFileMode:
+                case = 1
+            else:
+                case = 4 if zipFiles else 2
+
+            exports.append((case, self.sourcePath, os.path.join(outputDir, outputName)))
+
+        #   Restores the dialogue data of the first item
+        self.sortData(self.batchItems[0])
+
+        #   Template must give each item its own name
+        outputPaths = [os.path.normcase(outputPath) for _, _, outputPath in exports]
+        duplicates = sorted({os.path.basename(path) for path in outputPaths if outputPaths.count(path) > 1})
+        if duplicates:
+            self.core.popup(f"The naming template gives several items the same name:\n\n"
+                            f"{chr(10).join(duplicates[:10])}\n\n"
+                            f"Add items such as @SHOT@ or @ASSET@ to the \"{self.menuContext}\" template.")
+            return
+
+        #   One question for all existing outputs, interrupted exports are resumed
+        existing = [outputPath for case, _, outputPath in exports
+                    if os.path.exists(outputPath)
+                    and not os.path.isfile(getJournalPath(outputPath, case in [2, 3]))]
+        syncOnly = syncOptions is not None and not syncOptions["DeleteOrphans"]
+        if existing and not syncOnly:
+            reply = QMessageBox.question(
+                self.dlg,
+                "Outputs Exist",
+                f"{len(existing)} of {len(exports)} outputs already exist:\n\n"
+                f"{chr(10).join(existing[:10])}\n\n"
+                f"Do you want to overwrite them?\n\n"
+                f"(No will skip the existing outputs)",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+                QMessageBox.No
+            )
+            if reply == QMessageBox.Cancel:
+                return
+            if reply == QMessageBox.No:
+                exports = [export for export in exports if export[2] not in existing]
+
+        if not exports:
+            return
+
+        estimates = self.preflightCheck(exports, zipFiles, filterRules)
+        if estimates is None:
+            return
+
+        #   The parent Dir is made once for the whole batch, output Dirs by each export
+        os.makedirs(outputDir, exist_ok=True)
+
+        workers = getWorkerCount(outputDir, self.engineSettings, self.exportPaths)
+        priority = self.dlg.cb_priority.currentText()
+
+        jobs = []
+        for (case, sourcePath, outputPath), estimate in zip(exports, estimates):
+            params = {"case": case,
+                      "sourcePath": sourcePath,
+                      "outputPath": outputPath,
+                      "zipFiles": zipFiles,
+                      "engineSettings": self.engineSettings,
+                      "workers": workers,
+                      "compressionPolicy": self.compressionPolicy,
+                      "verifySettings": self.verifySettings,
+                      "filterRules": filterRules if case in [2, 4] else None,
+                      "syncOptions": syncOptions if case == 2 else None,
+                      "resume": os.path.isfile(getJournalPath(outputPath, case in [2, 3]))}
+
+            job = ExportJob(os.path.basename(outputPath), params, priority)
+            job.manifest = estimate.manifest
+            jobs.append(job)
+
+        self.dlg.jobIds = [job.jobId for job in jobs]
+        self.dlg.l_status.setText(f"Batch:  {len(jobs)} exports queued...")
+        self.dlg.but_pause.setText("Pause")
+        self.dlg.but_pause.setEnabled(True)
+        self.dlg.but_cancel.setEnabled(True)
+        self.jobQueue.addJobs(jobs)
+
+        #   Combined progress is read from the queue in the main thread
+        dlg = self.dlg
+        if dlg.batchTimer is None:
+            dlg.batchTimer = QTimer(dlg)
+            dlg.batchTimer.timeout.connect(lambda: self.refreshBatchProgress(dlg))
+        dlg.batchTimer.start(250)
+
+
+    #   Shows the batch as one progress bar, each job counts the same
+    def refreshBatchProgress(self, dlg):
+        jobs = [job for job in (self.jobQueue.getJob(jobId) for jobId in dlg.jobIds) if job]
+        if not jobs:
+            dlg.batchTimer.stop()
+            return
+
+        finished = [job for job in jobs if job.state in FINISHED_STATES]
+        running = sum(1 for job in jobs if job.state == JOB_RUNNING)
+        failed = sum(1 for job in jobs if job.state == JOB_FAILED)
+        cancelled = sum(1 for job in jobs if job.state == JOB_CANCELLED)
+
+        progress = sum(100 if job.state in FINISHED_STATES else job.progress for job in jobs) / len(jobs)
+        dlg.progressBar.setValue(int(progress))
+
+        status = f"Batch:  {len(finished)} of {len(jobs)} done,  {running} running"
+        if failed:
+            status += f",  {failed} failed"
+        if cancelled:
+            status += f",  {cancelled} cancelled"
+        dlg.l_status.setText(status)
+
+        if len(finished) == len(jobs):
+            dlg.batchTimer.stop()
+            if failed:
+                dlg.progressBar.setStyleSheet(STATE_COLORS[STATE_ERROR])
+            elif cancelled == len(jobs):
+                dlg.progressBar.setStyleSheet(STATE_COLORS[STATE_CANCELLED])
+            else:
+                dlg.progressBar.setStyleSheet(STATE_COLORS[STATE_COMPLETE])
+            dlg.onExportFinished(not failed)
+
+
+    #   Returns the unfinished jobs started from the dialogue
+    def getDialogueJobs(self):
+        jobs = [self.jobQueue.getJob(jobId) for jobId in self.dlg.jobIds]
+        return [job for job in jobs if job is not None and job.state not in FINISHED_STATES]
+
+
+    @err_catcher(name=__name__)
+    def pauseDialogueJob(self):
+        jobs = self.getDialogueJobs()
+        if not jobs:
+            return
+
+        if all(job.token.isPaused() for job in jobs):
+            for job in jobs:
+                self.jobQueue.resumeJob(job.jobId)
+            self.dlg.but_pause.setText("Pause")
+        else:
+            for job in jobs:
+                self.jobQueue.pauseJob(job.jobId)
+            self.dlg.but_pause.setText("Resume")
+            self.dlg.l_status.setText("Paused...")
+
+
+    @err_catcher(name=__name__)
+    def cancelDialogueJob(self):
+        jobs = self.getDialogueJobs()
+        if not jobs:
+            return
+
+        for job in jobs:
+            self.jobQueue.cancelJob(job.jobId)
+        if len(jobs) == 1:
+            self.dlg.l_status.setText(jobs[0].status)
+        self.dlg.but_pause.setEnabled(False)
+        self.dlg.but_cancel.setEnabled(False)
+
+
+    #   Called when the dialogue closes (Close, window X or Esc).  A running
+    #   export keeps going in the background unless cancelled.
+    @err_catcher(name=__name__)
+    def closeDialogue(self):
+        jobs = self.getDialogueJobs()
+        if jobs:
+            if len(jobs) == 1:
+                running = f"The export is still running:\n\n{jobs[0].destination}"
+                question = "Do you want to cancel it?"
+            else:
+                running = f"{len(jobs)} exports of the batch are still running or queued."
+                question = "Do you want to cancel them?"
+
+            reply = QMessageBox.question(
+                self.dlg,
+                "Export Running",
+                f"{running}\n\n"
+                f"{question}\n\n"
+                f"(No will keep it running in the Export Queue)",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                for job in jobs:
+                    self.jobQueue.cancelJob(job.jobId)
+
+
+    #   Runs a queued export in the queue's worker thread.  Progress goes to the
+    #   job, and to the dialog it was started from if there is one.
+    def runJob(self, job):
+        params = job.params
+        dlg = self.jobDialogs.pop(job.jobId, None)
+
+        copyThread = CopyThread(params["case"], params["sourcePath"], params["outputPath"], params["zipFiles"],
+                                engineSettings=params["engineSettings"],
+                                workers=params["workers"],
+                                compressionPolicy=params["compressionPolicy"],
+                                verifySettings=params.get("verifySettings"),
+                                frameNaming=params.get("frameNaming"),
+                                filterRules=params.get("filterRules"),
+                                syncOptions=params["syncOptions"],
+                                resume=params["resume"] or job.resumed,
+                                token=job.token,
+                                telemetryPath=self.telemetryFile,
+                                manifest=job.manifest)
+        job.manifest = None
+
+        #   Widgets and the popup are only updated by queued signals in the main thread
+        copyThread.progressUpdated.connect(job.setProgress)
+        copyThread.statusUpdated.connect(job.setStatus)
+        copyThread.errorOccurred.connect(self.errorRelay.showError)
+        if dlg:
+            copyThread.progressUpdated.connect(dlg.progressBar.setValue)
+            copyThread.statusUpdated.connect(dlg.l_status.setText)
+            copyThread.colorUpdated.connect(dlg.progressBar.setStyleSheet)
+            copyThread.exportFinished.connect(dlg.onExportFinished)
+
+        copyThread.run()
+
+        return not copyThread.failed
+
+
+    @err_catcher(name=__name__)
+    def openQueuePanel(self):
+        queuePanel = JobQueuePanel(self.jobQueue, self.dlg)
+        queuePanel.exec_()
+
+
+    #   Asks to resume if an earlier export to destPath was interrupted
+    @err_catcher(name=__name__)
+    def checkResume(self, destPath, isDir=False):
+        journalPath = getJournalPath(destPath, isDir)
+        if not os.path.isfile(journalPath):
+            return False
+
+        reply = QMessageBox.question(
+            self.dlg,
+            "Resume Export",
+            f"A previous export to this location was interrupted:\n\n"
+            f"{destPath}\n\n"
+            f"Do you want to resume it?\n\n"
+            f"(No will start the export over)",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        return reply == QMessageBox.Yes
+
+
+    #   Sync exports only ask when orphans will be deleted
+    @err_catcher(name=__name__)
+    def confirmDirectoryExport(self, outputDir, syncOptions):
+        if syncOptions is None:
+            return self.executePopUp("Directory", outputDir)
+
+        if syncOptions["DeleteOrphans"]:
+            reply = QMessageBox.question(
+                self.dlg,
+                "Delete Orphans",
+                f"Files in the directory that are not part of the export will be deleted:\n\n"
+                f"{outputDir}\n\n"
+                f"Do you want to continue?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            return reply == QMessageBox.Yes
+
+        return True
 
 
     @err_catcher(name=__name__)
@@ -1486,301 +2562,198 @@ class Prism_ExportToDir_Functions(object):
         
 
 
+#   Qt side of ExportRunner.  Runs in a queue worker thread and never touches
+#   widgets, everything the UI shows is delivered through the signals below.
 class CopyThread(QObject):
     progressUpdated = Signal(int)
+    statusUpdated = Signal(str)
+    colorUpdated = Signal(str)
+    errorOccurred = Signal(str)
+    exportFinished = Signal(bool)
+
+    def __init__(self, case, sourcePath, outputPath, zipFiles=False, engineSettings=None, workers=1,
+                 compressionPolicy=None, syncOptions=None, resume=False, token=None, telemetryPath=None,
+                 verifySettings=None, frameNaming=None, filterRules=None, manifest=None):
+        super().__init__()
+        self.runner = ExportRunner(case, sourcePath, outputPath, zipFiles,
+                                   engineSettings=engineSettings,
+                                   workers=workers,
+                                   compressionPolicy=compressionPolicy,
+                                   syncOptions=syncOptions,
+                                   resume=resume,
+                                   token=token,
+                                   telemetryPath=telemetryPath,
+                                   verifySettings=verifySettings,
+                                   frameNaming=frameNaming,
+                                   filterRules=filterRules,
+                                   manifest=manifest)
+
+        self.runner.onProgress = self.progressUpdated.emit
+        self.runner.onStatus = self.statusUpdated.emit
+        self.runner.onState = self.emitState
+        self.runner.onError = self.errorOccurred.emit
+
+
+    @property
+    def failed(self):
+        return self.runner.failed
 
-    def __init__(self, core, dlg, case, sourcePath, outputPath, zipFiles=False):
+
+    def emitState(self, state):
+        self.colorUpdated.emit(STATE_COLORS[state])
+
+
+    def run(self):
+        self.runner.run()
+        self.exportFinished.emit(not self.runner.failed)
+
+
+#   Created in the main thread, so errors emitted by workers are shown from there
+class ExportErrorRelay(QObject):
+    def __init__(self, core):
         super().__init__()
         self.core = core
-        self.dlg = dlg
-        self.case = case
-        self.sourcePath = sourcePath
-        self.outputPath = outputPath
-        self.zipFiles = zipFiles
-   
-    
-    @err_catcher(name=__name__)
-    def run(self):
-        logger.info("Executing Export")
-        try:
-            originalPath = self.sourcePath
-            self.tempDir = None
-
-            #   Single File
-            if self.case == 1:
-                if self.zipFiles:
-                    #   Changes extension to .zip if needed
-                    filename = os.path.basename(originalPath)
-                    zipFilename = os.path.splitext(filename)[0] + ".zip"
-
-                    #   Zips file in tempDir made in the method
-                    zipPath = self.executeZip(originalPath, zipFilename)
-                    #   Copies to the file with progress
-                    self.dlg.l_status.setText("Copying...")
-                    self.copyFile(zipPath, self.outputPath)
-                    #   Sets Prog Bar to finished
-                    self.progressUpdated.emit(100)
-                    self.dlg.l_status.setText("Complete.")
-                    self.dlg.progressBar.setStyleSheet(PROG_GREEN)
 
-                else:
-                    outputPathWithExt = self.outputPath
-                    #   Copies to the file with progress
-                    self.dlg.l_status.setText("Copying...")
-                    self.copyFile(originalPath, outputPathWithExt)
-                    self.progressUpdated.emit(100)
-                    self.dlg.l_status.setText("Complete.")
-                    self.dlg.progressBar.setStyleSheet(PROG_GREEN)
-
-            #   Complete Directory Tree
-            elif self.case == 2:
-                self.copyEntireDirectory(originalPath, self.outputPath)
-
-            #   Single Directory without Zip
-            elif self.case == 3:    
-                self.copyDirectory(originalPath, self.outputPath)
-
-            #   Complete Directory Tree with Zip
-            elif self.case == 4:
-                #   Changes extension to .zip
-                zipFilename = f"{os.path.basename(self.outputPath)}.zip"
-                #   Zips file in tempDir made in the method
-                zipPath = self.executeZip(originalPath, zipFilename)
-                #   Copies to the file with progress
-                self.copyFile(zipPath, self.outputPath)
-
-            #   Single Directory with Zip
-            elif self.case == 5:
-                #   Changes extension to .zip
-                zipFilename = f"{os.path.basename(self.outputPath)}.zip"
-                #   Zips file in tempDir made in the method
-                zipPath = self.executeZip(originalPath, zipFilename)
-                #   Copies to the file with progress
-                self.copyFile(zipPath, self.outputPath)
 
-            else:
-                return
-            
-            #   Removes tempDir
-            if self.tempDir:
-                shutil.rmtree(self.tempDir)
+    @Slot(str)
+    def showError(self, message):
+        self.core.popup(message)
 
-        except Exception as e:
-            self.dlg.l_status.setText("ERROR")
-            self.dlg.progressBar.setStyleSheet(PROG_RED)
-            self.progressUpdated.emit(100)
-            self.core.popup(e)
-            logger.warning(f"ERROR: Export Failed:  {e}")
 
+class JobQueuePanel(QDialog):
+    def __init__(self, jobQueue, parent=None):
+        super().__init__(parent)
+        self.jobQueue = jobQueue
+
+        self.setWindowTitle("Export Queue")
+
+        self.tw_jobs = QTableWidget(0, 5)
+        self.tw_jobs.setHorizontalHeaderLabels(["Name", "Priority", "State", "Progress", "Status"])
+        self.tw_jobs.setSelectionBehavior(QTableWidget.SelectRows)
+        self.tw_jobs.setSelectionMode(QTableWidget.SingleSelection)
+        self.tw_jobs.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tw_jobs.verticalHeader().setVisible(False)
+        self.tw_jobs.horizontalHeader().setStretchLastSection(True)
+
+        self.but_raise = QPushButton("Raise Priority")
+        self.but_raise.clicked.connect(lambda: self.changePriority(1))
+        self.but_lower = QPushButton("Lower Priority")
+        self.but_lower.clicked.connect(lambda: self.changePriority(-1))
+        self.but_remove = QPushButton("Remove")
+        self.but_remove.setToolTip("Removes a pending or finished job.  Running jobs cannot be removed.")
+        self.but_remove.clicked.connect(self.removeJob)
+        self.but_pause = QPushButton("Pause / Resume")
+        self.but_pause.setToolTip("Pauses or resumes a running job, or continues a job interrupted when Prism closed.")
+        self.but_pause.clicked.connect(self.pauseJob)
+        self.but_cancel = QPushButton("Cancel")
+        self.but_cancel.setToolTip("Stops the job and removes its partial output.")
+        self.but_cancel.clicked.connect(self.cancelJob)
+        self.but_clear = QPushButton("Clear Finished")
+        self.but_clear.clicked.connect(self.clearFinished)
+        self.but_close = QPushButton("Close")
+        self.but_close.clicked.connect(self.accept)
+
+        lo_buttons = QHBoxLayout()
+        lo_buttons.addWidget(self.but_raise)
+        lo_buttons.addWidget(self.but_lower)
+        lo_buttons.addWidget(self.but_pause)
+        lo_buttons.addWidget(self.but_cancel)
+        lo_buttons.addWidget(self.but_remove)
+        lo_buttons.addWidget(self.but_clear)
+        lo_buttons.addStretch()
+        lo_buttons.addWidget(self.but_close)
 
-    @err_catcher(name=__name__)
-    def copyFile(self, src, dest, showProg=True):
-        logger.debug(f"Copying: {src}")
+        layout = QVBoxLayout()
+        layout.addWidget(self.tw_jobs)
+        layout.addLayout(lo_buttons)
+        self.setLayout(layout)
+        self.resize(800, 350)
 
-        try:
-            if showProg:
-                self.progressUpdated.emit(0)
-                self.dlg.l_status.setText("Copying...")
-
-            if os.path.isdir(src):
-                # If it's a directory, use copy2 to preserve metadata
-                shutil.copy2(src, dest)
-            elif os.path.isfile(src):
-                # If it's a file, call self.copyFile
-                totalSize = os.path.getsize(src)
-                copiedSize = 0
-                with open(src, 'rb') as srcFile, open(dest, 'wb') as destFile:
-                    while True:
-                        chunk = srcFile.read(4096)
-                        if not chunk:
-                            break
-                        destFile.write(chunk)
-                        copiedSize += len(chunk)
-                        if showProg:
-                            progressPercentage = int(copiedSize / totalSize * 100)
-                            self.progressUpdated.emit(progressPercentage)
-            else:
-                logger.warning(f"Skipping unsupported item: {src}")
+        #   Jobs are updated by worker threads, the table polls them
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.timeout.connect(self.refresh)
+        self.refreshTimer.start(500)
 
-            if showProg:
-                self.dlg.l_status.setText("Complete.")
-                self.dlg.progressBar.setStyleSheet(PROG_GREEN)
+        self.refresh()
 
-            logger.debug(f"SUCCESS: Copied {src}")
 
-        except Exception as e:
-            self.dlg.l_status.setText("ERROR")
-            self.dlg.progressBar.setStyleSheet(PROG_RED)
-            self.progressUpdated.emit(100)
-            self.core.popup(e)
-            logger.warning(f"ERROR: Failed to copy: {e}")
+    def refresh(self):
+        selectedId = self.getSelectedJobId()
+        jobs = self.jobQueue.getJobs()
 
+        self.tw_jobs.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            values = [job.name, job.priority, job.displayState, f"{job.progress}%", job.status]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, job.jobId)
+                if column == 0:
+                    item.setToolTip(job.destination)
+                self.tw_jobs.setItem(row, column, item)
 
-    @err_catcher(name=__name__)
-    def dirFileAmount(self, dirPath, mode="shallow"):
-        #   Gets number of files in directory
-        try:
-            #   For only counting files in this dir
-            if mode == "shallow":
-                if os.path.isdir(dirPath):
-                    entries = os.listdir(dirPath)
-                    files = [entry for entry in entries if os.path.isfile(os.path.join(dirPath, entry))]
-                    return len(files)
-                else:
-                    return 0
-            #   For counting all files in dir and child dirs
-            elif  mode == "deep":
-                fileCount = 0
-                for root, _, files in os.walk(dirPath):
-                    fileCount += len(files)
-
-                return fileCount
-            
-        except FileNotFoundError:
-            return 0
-        
+            if job.jobId == selectedId:
+                self.tw_jobs.selectRow(row)
 
-    @err_catcher(name=__name__)
-    def copyDirectory(self, src, dest):
-        logger.debug("Copying Directory")
-        try:
-            self.dlg.l_status.setText("Copying...")
-            #   Gets number of files in directory
-            totalFiles = self.dirFileAmount(src)
-            copiedFiles = 0
-            #   Copies all files in dir with progress
-            for root, _, files in os.walk(src):
-                for file in files:
-                    srcFile = os.path.join(root, file)
-                    # Ensure it's a file and not in a subdirectory
-                    if os.path.isfile(srcFile) and os.path.dirname(srcFile) == src:
-                        destFile = os.path.join(dest, os.path.relpath(srcFile, src))
-
-                        #   Calls copyFile for each file, but disables prog for each file
-                        self.copyFile(srcFile, destFile, showProg=False)
-
-                        copiedFiles += 1
-                        progressPercentage = int(copiedFiles / totalFiles * 100)
-                        self.progressUpdated.emit(progressPercentage)
-
-            self.dlg.l_status.setText("Complete.")
-            self.progressUpdated.emit(100)
-            self.dlg.progressBar.setStyleSheet(PROG_GREEN)
-            logger.debug(f"SUCCESS: Copied {src}")
+        self.tw_jobs.resizeColumnsToContents()
 
-        except Exception as e:
-            self.dlg.l_status.setText("ERROR.")
-            self.progressUpdated.emit(100)
-            self.dlg.progressBar.setStyleSheet(PROG_RED)
-            self.core.popup(e)  # TESTING
-            logger.warning(f"ERROR: Copying failed for {src}")
-            logger.warning(e)
 
+    def getSelectedJobId(self):
+        selectedItems = self.tw_jobs.selectedItems()
+        if not selectedItems:
+            return None
 
-    @err_catcher(name=__name__)
-    def copyEntireDirectory(self, src, dest):
-        logger.debug("Copying Directory")
-        try:
-            self.dlg.l_status.setText("Copying...")
-
-            totalFiles = self.dirFileAmount(src, mode="deep")
-            copiedFiles = 0
-
-            # Iterate through all items in the source directory
-            for root, dirs, files in os.walk(src):
-                # Copy directories
-                for dirName in dirs:
-                    srcDir = os.path.join(root, dirName)
-                    destDir = os.path.join(dest, os.path.relpath(srcDir, src))
-                    os.makedirs(destDir, exist_ok=True)
-
-                # Copy files
-                for fileName in files:
-                    srcFile = os.path.join(root, fileName)
-                    destFile = os.path.join(dest, os.path.relpath(srcFile, src))
-                    self.copyFile(srcFile, destFile, showProg=False)
-
-                    copiedFiles += 1
-                    progressPercentage = int(copiedFiles / totalFiles * 100)
-                    self.progressUpdated.emit(progressPercentage)
-
-            self.dlg.l_status.setText("Complete.")
-            self.progressUpdated.emit(100)
-            self.dlg.progressBar.setStyleSheet(PROG_GREEN)
-            logger.debug(f"SUCCESS: Copied {src}")
+        return selectedItems[0].data(Qt.UserRole)
 
-        except Exception as e:
-            self.dlg.l_status.setText("ERROR.")
-            self.progressUpdated.emit(100)
-            self.dlg.progressBar.setStyleSheet(PROG_RED)
-            self.core.popup(e)
-            logger.warning(f"ERROR: Copying failed for {src}")
-            logger.warning(e)
 
+    def changePriority(self, step):
+        job = self.jobQueue.getJob(self.getSelectedJobId())
+        if job is None:
+            return
 
-    @err_catcher(name=__name__)
-    def executeZip(self, originalPath, zipFilename):                        #   TODO  RENAME FILES
-        zippedFiles = 0
-        #   Makes tempDir
-        self.tempDir = tempfile.mkdtemp(prefix="PrismTemp_")
-        zipPath = os.path.join(self.tempDir, zipFilename)
+        index = min(max(PRIORITIES.index(job.priority) + step, 0), len(PRIORITIES) - 1)
+        self.jobQueue.setPriority(job.jobId, PRIORITIES[index])
+        self.refresh()
 
-        self.dlg.l_status.setText("Zipping...")
-        logger.debug(f"Zipping {zipFilename}")
 
-        try:
-            with zipfile.ZipFile(zipPath, 'w', zipfile.ZIP_DEFLATED) as zipFile:
-                if os.path.isdir(originalPath):
-                    if self.case == 4:
-                        #   Get number of files in dir and sub dirs
-                        totalFiles = self.dirFileAmount(originalPath, mode="deep")
-
-                        for root, dirs, files in os.walk(originalPath):
-                            for fileName in files:
-                                filePath = os.path.join(root, fileName)
-                                arcname = os.path.relpath(filePath, originalPath)
-                                zipFile.write(filePath, arcname=arcname)
-                                zippedFiles += 1
-                                progressPercentage = int(zippedFiles / totalFiles * 100)
-                                self.progressUpdated.emit(progressPercentage)
-
-                            # Explicitly add empty directories to the zip file
-                            for dirName in dirs:
-                                dirPath = os.path.join(root, dirName)
-                                arcname = os.path.relpath(dirPath, originalPath)
-                                zipFile.write(dirPath, arcname=arcname)
-
-                    else:
-                        #   Get number of files in directory
-                        totalFiles = self.dirFileAmount(originalPath)
-
-                        # Iterate over files directly in the specified directory
-                        for file in os.listdir(originalPath):
-                            filePath = os.path.join(originalPath, file)
-                            # Ensure it's a file (not a directory)
-                            if os.path.isfile(filePath):
-                                arcname = os.path.relpath(filePath, originalPath)
-                                zipFile.write(filePath, arcname=arcname)
-                                zippedFiles += 1
-                                progressPercentage = int(zippedFiles / totalFiles * 100)
-                                self.progressUpdated.emit(progressPercentage)
-                else:
-                    self.progressUpdated.emit(20)
+    def pauseJob(self):
+        job = self.jobQueue.getJob(self.getSelectedJobId())
+        if job is None:
+            return
 
-                    arcname = os.path.basename(originalPath)
-                    zipFile.write(originalPath, arcname=arcname)
+        if job.state == JOB_INTERRUPTED:
+            self.jobQueue.resumeInterrupted([job.jobId])
+        elif job.token.isPaused():
+            self.jobQueue.resumeJob(job.jobId)
+        else:
+            self.jobQueue.pauseJob(job.jobId)
+        self.refresh()
 
-                    self.progressUpdated.emit(75)
-                    logger.debug(f"SUCCESS: Zipped {zipFilename}")
 
-            return zipPath
-    
-        except Exception as e:
-            self.dlg.l_status.setText("ERROR.")
-            self.progressUpdated.emit(100)
-            self.dlg.progressBar.setStyleSheet(PROG_RED)
-            self.core.popup(e)  # TESTING
-            logger.warning(f"ERROR: Failed to Zip {zipFilename}")
+    def cancelJob(self):
+        job = self.jobQueue.getJob(self.getSelectedJobId())
+        if job is None:
+            return
+
+        self.jobQueue.cancelJob(job.jobId)
+        self.refresh()
+
+
+    def removeJob(self):
+        job = self.jobQueue.getJob(self.getSelectedJobId())
+        if job is None:
+            return
+
+        if job.state == JOB_RUNNING:
+            QMessageBox.information(self, "Export Queue", "Running jobs cannot be removed.")
+            return
+
+        self.jobQueue.removeJob(job.jobId)
+        self.refresh()
+
+
+    def clearFinished(self):
+        self.jobQueue.clearFinished()
+        self.refresh()
 
 
 class AddDirDialog(QDialog):
@@ -1803,6 +2776,16 @@ class AddDirDialog(QDialog):
         self.but_location.setToolTip(tip)
         self.but_location.clicked.connect(lambda: self.selectLocation(self))
 
+        self.l_workers = QLabel("Copy Workers:")
+        self.sp_workers = QSpinBox()
+        self.sp_workers.setRange(0, MAX_WORKERS)
+        self.sp_workers.setSpecialValueText("Auto")
+        tip = ("Number of files copied at once to this location.\n\n"
+               "Auto uses the Local or Network worker count from the Copy Engine settings."
+                )
+        self.l_workers.setToolTip(tip)
+        self.sp_workers.setToolTip(tip)
+
         self.but_ok = QPushButton("OK")
         self.but_ok.clicked.connect(self.accept)
 
@@ -1811,6 +2794,8 @@ class AddDirDialog(QDialog):
         layout.addWidget(self.le_name)
         layout.addWidget(self.l_location)
         layout.addWidget(self.but_location)
+        layout.addWidget(self.l_workers)
+        layout.addWidget(self.sp_workers)
         layout.addWidget(self.but_ok)
 
         self.setLayout(layout)
@@ -1829,6 +2814,7 @@ class AddDirDialog(QDialog):
     def getValues(self):
         name = self.le_name.text()
         location = self.l_location.text()
-        return name, location
+        workers = self.sp_workers.value()
+        return name, location, workers
 
 